@@ -0,0 +1,10 @@
+"""
+OCN Benchmarks
+
+Load, throughput and microbenchmark tooling for the gateway, demo2, the LLM
+parser and the plugin adapters.
+"""
+
+from .histogram import LatencyHistogram
+
+__all__ = ['LatencyHistogram']
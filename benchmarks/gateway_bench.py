@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Gateway End-to-End Benchmark
+
+Drives the gateway's /run/demo1 and demo2's /run in-process through
+httpx.ASGITransport, with every agent call routed to the stand-in apps from
+stubs/agent_stubs.py. No sockets are involved, so network and server
+overhead are out of the numbers. The stub agents run in the same process,
+though, so CPU time per request (and memory) covers the two services and the
+stubs they call together; compare runs against each other rather than reading
+it as the services' cost alone.
+
+For each target and concurrency level it records throughput, latency
+percentiles, CPU time per request (gateway plus stubs) and, in a separate
+tracemalloc pass, allocated and peak traced memory per request.
+
+Usage:
+    python -m benchmarks.gateway_bench --concurrency 1,10,100,1000 --json-out gateway_bench.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from benchmarks.histogram import LatencyHistogram
+from stubs.agent_stubs import StubConfig, create_agent_app
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CONCURRENCY = [1, 10, 100, 1000]
+
+
+class StubRouterTransport(httpx.AsyncBaseTransport):
+    """Route each request to the in-process stand-in app for its host."""
+
+    def __init__(self, agent_urls: Dict[str, str], config: Optional[StubConfig] = None):
+        self.routes: Dict[str, httpx.ASGITransport] = {}
+        for agent, url in agent_urls.items():
+            app = create_agent_app(agent, config)
+            self.routes[urlparse(url).netloc] = httpx.ASGITransport(app=app)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self.routes.get(request.url.netloc.decode())
+        if transport is None:
+            return httpx.Response(502, json={"detail": f"No stand-in for {request.url.host}"})
+        return await transport.handle_async_request(request)
+
+
+def load_targets(config: StubConfig) -> Dict[str, Dict[str, Any]]:
+    """
+    Import the gateway and demo2 apps and point their agent transport at the stand-ins.
+
+    Returns:
+        Mapping of target name to app, path and request body
+    """
+    os.environ.setdefault("SAMPLES_DIR", os.path.join(REPO_ROOT, "samples"))
+
+    from gateway import app as gateway_module
+    from demo2 import app as demo2_module
+
+    targets = {}
+    for name, module, path, body in [
+        ("gateway_demo1", gateway_module, "/run/demo1", {"cart_id": "demo1_oxfords"}),
+        ("demo2_run", demo2_module, "/run", {"demo_id": "bench", "transaction_amount": 410.40}),
+    ]:
+        module.AGENT_TRANSPORT = StubRouterTransport(module.AGENT_URLS, config)
+        logging.getLogger(module.__name__).setLevel(logging.WARNING)
+        targets[name] = {"app": module.app, "path": path, "body": body}
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return targets
+
+
+async def drive(target: Dict[str, Any], concurrency: int, requests: int,
+                on_response: Optional[Callable[[float, httpx.Response], None]] = None) -> float:
+    """
+    Send `requests` POSTs to the target app with at most `concurrency` in flight.
+
+    Returns:
+        Wall-clock seconds for the whole batch
+    """
+    transport = httpx.ASGITransport(app=target["app"])
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post(target["path"], json=target["body"])
+                if on_response:
+                    on_response(time.perf_counter() - started, response)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+        return time.perf_counter() - start
+
+
+async def measure_throughput(target: Dict[str, Any], concurrency: int, requests: int) -> Dict[str, Any]:
+    """Timed pass: throughput, latency and CPU time per request."""
+    histogram = LatencyHistogram()
+    errors = 0
+
+    def record(latency: float, response: httpx.Response):
+        nonlocal errors
+        if response.status_code == 200:
+            histogram.record(latency)
+        else:
+            errors += 1
+
+    gc.collect()
+    cpu_start = time.process_time()
+    wall = await drive(target, concurrency, requests, record)
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_s": wall,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "cpu_ms_per_request": cpu / requests * 1000,
+        "cpu_utilization": cpu / wall if wall else 0.0,
+        "latency": histogram.summary(),
+    }
+
+
+async def measure_memory(target: Dict[str, Any], concurrency: int, requests: int) -> Dict[str, Any]:
+    """Traced pass: allocations per request and peak traced memory."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        baseline_current, _ = tracemalloc.get_traced_memory()
+        await drive(target, concurrency, requests)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, "lineno")
+    allocated_blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+
+    return {
+        "requests": requests,
+        "peak_traced_bytes": peak - baseline_current,
+        "peak_traced_bytes_per_inflight": (peak - baseline_current) / min(concurrency, requests),
+        "retained_bytes": current - baseline_current,
+        "retained_blocks_per_request": allocated_blocks / requests,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Current commit hash, for tracking results across releases."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(targets: Dict[str, Dict[str, Any]], concurrency_levels: List[int],
+                         requests_per_level: int, warmup: int, memory: bool) -> List[Dict[str, Any]]:
+    """Run every target at every concurrency level."""
+    results = []
+    for name, target in targets.items():
+        await drive(target, 1, warmup)
+        for concurrency in concurrency_levels:
+            requests = max(requests_per_level, concurrency * 2)
+            print(f"🚀 {name} at concurrency {concurrency} ({requests} requests)...")
+            result = {"target": name, "concurrency": concurrency}
+            result.update(await measure_throughput(target, concurrency, requests))
+            if memory:
+                result["memory"] = await measure_memory(target, concurrency, requests)
+            latency = result["latency"]
+            print(f"   {result['throughput_rps']:.1f} req/s, "
+                  f"{result['cpu_ms_per_request']:.2f}ms CPU/req incl. stubs, "
+                  f"p50 {latency['p50_ms']:.1f}ms p99 {latency['p99_ms']:.1f}ms, {result['errors']} errors")
+            if memory:
+                print(f"   peak traced {result['memory']['peak_traced_bytes'] / 1024:.0f} KiB, "
+                      f"retained {result['memory']['retained_bytes'] / 1024:.0f} KiB")
+            results.append(result)
+    return results
+
+
+def main():
+    """Main function to run the gateway benchmarks."""
+    parser = argparse.ArgumentParser(description="In-process gateway/demo2 throughput benchmark")
+    parser.add_argument("--concurrency", default=",".join(str(c) for c in DEFAULT_CONCURRENCY),
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Minimum requests per level")
+    parser.add_argument("--warmup", type=int, default=20, help="Warm-up requests per target")
+    parser.add_argument("--targets", default="gateway_demo1,demo2_run", help="Comma-separated targets")
+    parser.add_argument("--stub-config", default=os.getenv("STUB_CONFIG"),
+                        help="Stand-in latency/error config (default: zero latency, no errors)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--json-out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    config = StubConfig.load(args.stub_config)
+    targets = load_targets(config)
+    selected = [name.strip() for name in args.targets.split(",")]
+    unknown = [name for name in selected if name not in targets]
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(unknown)}")
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    results = asyncio.run(run_benchmarks({name: targets[name] for name in selected}, levels,
+                                         args.requests, args.warmup, not args.no_memory))
+
+    document = {
+        "benchmark": "gateway_e2e",
+        "generated_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "httpx": httpx.__version__,
+        "stub_config": args.stub_config,
+        "results": results,
+    }
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"📄 Results written to {args.json_out}")
+    else:
+        print(json.dumps(document, indent=2))
+
+
+if __name__ == "__main__":
+    main()
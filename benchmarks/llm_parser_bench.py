@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+LLM Parser Throughput Benchmark
+
+Measures LLMResponseParser against the local LLM stand-in
+(stubs/llm_stub.py), started in-process on a free port unless --base-url
+points at a running one. Agent responses come from the agent stand-in
+builders with one required spec field removed, so every parse goes through
+the LLM path rather than the spec fast path.
+
+Scenarios:
+- sync: sequential parse_agent_response, buffered and streamed
+- async: --concurrency workers on parse_agent_response_async, buffered and streamed
+- cache: async parsing of a workload drawn with Zipf skew from --distinct
+  responses, with a ParseCache, reporting the hit rate and LLM calls saved
+
+Each row reports parses/s, latency percentiles, fallbacks, LLM requests,
+429s seen and tokens per parse.
+
+Usage:
+    python -m benchmarks.llm_parser_bench --requests 200 --concurrency 16 --ttft-ms 50 --tokens-per-second 400
+    python -m benchmarks.llm_parser_bench --throttle-rate 0.1 --json-out llm_parser_bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.gateway_bench import git_commit
+from benchmarks.histogram import LatencyHistogram
+from llm_extraction_spec import get_extraction_spec
+from llm_parse_cache import ParseCache
+from llm_rate_limiter import LLMRateLimiter
+from llm_response_parser import LLMResponseParser
+from stubs.agent_stubs import LatencyDistribution, okra_quote, olive_incentives, onyx_kyb, opal_methods, orca_negotiate, weave_auction
+from stubs.llm_stub import LLMStubConfig, create_llm_app
+
+BUILDERS = {
+    "okra": okra_quote,
+    "onyx": onyx_kyb,
+    "opal": opal_methods,
+    "orca": orca_negotiate,
+    "olive": olive_incentives,
+    "weave": weave_auction,
+}
+
+
+def build_workload(distinct: int, seed: int = 42) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Distinct agent responses that need the LLM.
+
+    Args:
+        distinct: Number of responses
+        seed: Random seed
+
+    Returns:
+        (agent_name, response) pairs, each missing one required spec field
+    """
+    rng = random.Random(seed)
+    agents = list(BUILDERS)
+    workload = []
+    for index in range(distinct):
+        agent = agents[index % len(agents)]
+        amount = round(rng.uniform(10, 2000), 2)
+        body = {"amount": amount, "cart_total": amount, "transaction_amount": amount}
+        response = BUILDERS[agent](body, {"transaction_amount": str(amount), "actor_id": f"actor_{index}"}, {}, rng)
+        spec = get_extraction_spec(agent)
+        if spec is not None and spec.required_fields:
+            field = spec.fields[rng.choice(spec.required_fields)]
+            for source in field["from"]:
+                response.pop(source, None)
+        response["request_id"] = f"bench-{index}"
+        workload.append((agent, response))
+    return workload
+
+
+def zipf_sample(workload: List[Tuple[str, Dict[str, Any]]], count: int, skew: float,
+                seed: int = 7) -> List[Tuple[str, Dict[str, Any]]]:
+    """Draw count items, item i with weight 1/(i+1)^skew."""
+    rng = random.Random(seed)
+    weights = [1.0 / (index + 1) ** skew for index in range(len(workload))]
+    return rng.choices(workload, weights=weights, k=count)
+
+
+def start_stub(config: LLMStubConfig) -> str:
+    """Serve the LLM stand-in on a free local port in a background thread."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_llm_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("LLM stand-in did not start")
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+def stub_stats(base_url: str) -> Dict[str, Any]:
+    """Counters from the stand-in (empty if it doesn't expose them)."""
+    root = base_url.split("/v1/")[0].split("/chat/")[0]
+    try:
+        return requests.get(f"{root}/_stub/stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return {}
+
+
+def _delta(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: after[key] - before.get(key, 0) for key in after if isinstance(after[key], (int, float))}
+
+
+def summarize(name: str, histogram: LatencyHistogram, elapsed: float, parsed: List[Any],
+              parser: LLMResponseParser, stub_before: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+    """One result row."""
+    stub = _delta(stub_stats(base_url), stub_before)
+    fallbacks = sum(1 for item in parsed if item.response_type in ("fallback_parsed", "fallback"))
+    limiter = parser.rate_limiter.stats()
+    row = {
+        "scenario": name,
+        "parses": len(parsed),
+        "parses_per_s": len(parsed) / elapsed if elapsed else 0.0,
+        "latency": histogram.summary(),
+        "fallbacks": fallbacks,
+        "llm_requests": stub.get("requests"),
+        "throttled": stub.get("throttled"),
+        "limiter_waits": limiter["waited"],
+        "tokens_per_parse": ((stub.get("prompt_tokens", 0) + stub.get("completion_tokens", 0)) / len(parsed)
+                             if stub and parsed else None),
+    }
+    if parser.cache is not None:
+        cache = parser.cache.stats()
+        row["cache_hit_rate"] = cache["hit_rate"]
+        row["cache_hits"] = cache["memory_hits"] + cache["disk_hits"]
+    return row
+
+
+def run_sync(name: str, parser: LLMResponseParser, items: List[Tuple[str, Dict[str, Any]]],
+             base_url: str) -> Dict[str, Any]:
+    """Parse items one after another."""
+    histogram = LatencyHistogram()
+    before = stub_stats(base_url)
+    parsed = []
+    start = time.perf_counter()
+    for agent, response in items:
+        began = time.perf_counter()
+        parsed.append(parser.parse_agent_response(agent, response))
+        histogram.record(time.perf_counter() - began)
+    return summarize(name, histogram, time.perf_counter() - start, parsed, parser, before, base_url)
+
+
+async def run_async(name: str, parser: LLMResponseParser, items: List[Tuple[str, Dict[str, Any]]],
+                    concurrency: int, base_url: str) -> Dict[str, Any]:
+    """Parse items with concurrency workers sharing the parser."""
+    histogram = LatencyHistogram()
+    before = await asyncio.to_thread(stub_stats, base_url)
+    queue = list(reversed(items))
+    parsed = []
+
+    async def worker():
+        while queue:
+            agent, response = queue.pop()
+            began = time.perf_counter()
+            parsed.append(await parser.parse_agent_response_async(agent, response))
+            histogram.record(time.perf_counter() - began)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await parser.aclose()
+    row = summarize(name, histogram, elapsed, parsed, parser, before, base_url)
+    row["concurrency"] = concurrency
+    return row
+
+
+def make_parser(args: argparse.Namespace, base_url: str, stream: bool = False,
+                cache: Optional[ParseCache] = None) -> LLMResponseParser:
+    limiter = LLMRateLimiter(requests_per_minute=args.client_rpm, tokens_per_minute=args.client_tpm,
+                             base_delay=0.05, max_delay=2.0)
+    return LLMResponseParser("bench-key", base_url=base_url, max_concurrency=args.concurrency, timeout=args.timeout,
+                             cache=cache, stream=stream, rate_limiter=limiter)
+
+
+def run_benchmarks(args: argparse.Namespace, base_url: str) -> List[Dict[str, Any]]:
+    """Run every scenario and return result rows."""
+    workload = build_workload(max(args.distinct, 1))
+    items = [workload[index % len(workload)] for index in range(args.requests)]
+    sync_items = items[:max(1, args.requests // 4)]
+    rows = [
+        run_sync("sync", make_parser(args, base_url), sync_items, base_url),
+        run_sync("sync+stream", make_parser(args, base_url, stream=True), sync_items, base_url),
+        asyncio.run(run_async("async", make_parser(args, base_url), items, args.concurrency, base_url)),
+        asyncio.run(run_async("async+stream", make_parser(args, base_url, stream=True), items,
+                              args.concurrency, base_url)),
+    ]
+    skewed = zipf_sample(workload, args.requests, args.skew)
+    rows.append(asyncio.run(run_async("async (zipf, no cache)", make_parser(args, base_url), skewed,
+                                      args.concurrency, base_url)))
+    cache = ParseCache(max_memory_entries=args.cache_entries)
+    rows.append(asyncio.run(run_async("async (zipf, cache)", make_parser(args, base_url, cache=cache), skewed,
+                                      args.concurrency, base_url)))
+    return rows
+
+
+def print_rows(rows: List[Dict[str, Any]]):
+    print(f"{'scenario':<24} {'parses/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'fallback':>8} {'LLM req':>8} "
+          f"{'429s':>5} {'tok/parse':>9} {'hit rate':>8}")
+    for row in rows:
+        latency = row["latency"]
+        hit_rate = f"{row['cache_hit_rate']:.0%}" if "cache_hit_rate" in row else "-"
+        tokens = f"{row['tokens_per_parse']:.0f}" if row["tokens_per_parse"] is not None else "-"
+        print(f"{row['scenario']:<24} {row['parses_per_s']:>9.1f} {latency['p50_ms']:>8.1f} {latency['p99_ms']:>8.1f} "
+              f"{row['fallbacks']:>8} {row['llm_requests'] if row['llm_requests'] is not None else '-':>8} "
+              f"{row['throttled'] if row['throttled'] is not None else '-':>5} {tokens:>9} {hit_rate:>8}")
+
+
+def main():
+    """Main function to run the LLM parser benchmark."""
+    argparser = argparse.ArgumentParser(description="LLMResponseParser throughput against a local LLM stand-in")
+    argparser.add_argument("--base-url", help="Use a running OpenAI-compatible endpoint instead of starting the stub")
+    argparser.add_argument("--requests", type=int, default=200, help="Parses per async scenario (a quarter for sync)")
+    argparser.add_argument("--concurrency", type=int, default=16)
+    argparser.add_argument("--distinct", type=int, default=200, help="Distinct agent responses in the workload")
+    argparser.add_argument("--skew", type=float, default=1.1, help="Zipf skew of the cache scenario")
+    argparser.add_argument("--cache-entries", type=int, default=1024)
+    argparser.add_argument("--timeout", type=float, default=30.0)
+    argparser.add_argument("--client-rpm", type=float, default=60000, help="Client-side requests per minute")
+    argparser.add_argument("--client-tpm", type=float, default=1e9, help="Client-side tokens per minute")
+    argparser.add_argument("--ttft-ms", type=float, default=50.0, help="Stub time to first token")
+    argparser.add_argument("--tokens-per-second", type=float, default=400.0, help="Stub generation rate")
+    argparser.add_argument("--throttle-rate", type=float, default=0.0, help="Stub 429 injection rate")
+    argparser.add_argument("--retry-after", type=float, default=0.2, help="Stub Retry-After seconds")
+    argparser.add_argument("--stub-rpm", type=float, default=0.0, help="Stub requests per minute limit")
+    argparser.add_argument("--seed", type=int, default=42)
+    argparser.add_argument("--json-out", help="Write results as JSON")
+    args = argparser.parse_args()
+
+    logging.getLogger("llm_response_parser").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub_config = LLMStubConfig(
+        ttft=LatencyDistribution("constant", {"ms": args.ttft_ms}),
+        tokens_per_second=args.tokens_per_second,
+        throttle_rate=args.throttle_rate,
+        requests_per_minute=args.stub_rpm,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    base_url = args.base_url or start_stub(stub_config)
+    print(f"🚀 Benchmarking LLMResponseParser against {base_url}")
+    rows = run_benchmarks(args, base_url)
+    print_rows(rows)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"git_commit": git_commit(), "base_url": base_url, "args": vars(args),
+                       "stub": None if args.base_url else stub_config.__dict__, "rows": rows}, f, indent=2, default=str)
+        print(f"📄 Results written to {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
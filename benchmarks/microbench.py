@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for Pure-Python Hot Paths
+
+Times the orchestration and parsing helpers that run on every checkout:
+
+- gateway determine_negotiation_consensus
+- Shopify/WooCommerce/BigCommerce transform_cart_to_orca_request and
+  transform_orca_response_to_platform, plus the compiled cart mappings on
+  their own next to the hand-written transforms they replaced
+  (benchmarks/reference_transforms)
+- LLMResponseParser._fallback_parsing and _extract_ml_features
+- MLModelEnhancer.get_enhanced_features
+
+Each case runs with a realistic input and a scaled-up one (large carts, many
+rail evaluations, many parsed responses). Results can be saved as JSON and
+compared against a previous run with a Mann-Whitney U test, so noise is not
+reported as a regression.
+
+Usage:
+    python -m benchmarks.microbench --json-out before.json
+    python -m benchmarks.microbench --compare before.json
+    python -m benchmarks.microbench --filter consensus --profile consensus.prof
+    python -m benchmarks.microbench --filter transform   # compiled vs reference
+"""
+
+import argparse
+import cProfile
+import json
+import logging
+import math
+import platform
+import pstats
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from benchmarks.reference_transforms import REFERENCE_TRANSFORMS
+from gateway.app import determine_negotiation_consensus
+from llm_response_parser import LLMResponseParser, MLModelEnhancer
+from plugins.bigcommerce.bigcommerce_adapter import BigCommerceAdapter
+from plugins.common.cart_mapping import get_cart_mapping
+from plugins.shopify.shopify_adapter import ShopifyAdapter
+from plugins.woocommerce.woocommerce_adapter import WooCommerceAdapter
+
+RAILS = ["credit", "debit", "ACH", "wire", "Card", "RTP", "Crypto"]
+AGENTS = ["okra", "onyx", "opal", "orca", "olive", "weave"]
+
+
+@dataclass
+class Benchmark:
+    """A named callable with its input scale."""
+    name: str
+    scale: str
+    func: Callable[[], Any]
+
+
+def run_coroutine(coro) -> Any:
+    """Drive a coroutine that never awaits, without event loop overhead."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended; it is not CPU-only")
+
+
+# Input builders
+
+def build_rail_evaluations(count: int) -> List[Dict[str, Any]]:
+    """Rail evaluations in the shape Orca and Opal return."""
+    return [
+        {
+            "rail_type": f"{RAILS[i % len(RAILS)]}_{i}" if i >= len(RAILS) else RAILS[i],
+            "cost_score": (i * 37 % 100) / 100,
+            "speed_score": (i * 53 % 100) / 100,
+            "risk_score": (i * 71 % 100) / 100,
+            "final_score": (i * 89 % 100) / 100,
+            "composite_score": 0.5 + (i % 5) / 10,
+            "base_cost": 50.0 + i,
+            "settlement_days": 1 + i % 3,
+            "ml_risk_score": 0.1 + (i % 7) / 10,
+        }
+        for i in range(count)
+    ]
+
+
+def build_negotiations(count: int) -> Dict[str, Any]:
+    """Disagreeing Orca/Opal negotiations; Opal's rail is evaluated last (worst case)."""
+    evaluations = build_rail_evaluations(count)
+    orca_rail, opal_rail = evaluations[0]["rail_type"], evaluations[-1]["rail_type"]
+    return {
+        "orca": {"optimal_rail": orca_rail, "rail_evaluations": evaluations},
+        "opal": {
+            "consumer_proposal": {"rail_type": opal_rail, "consumer_benefit": 12.5},
+            "confidence": 0.8,
+            "metadata": {"rail_evaluation": {
+                "rail_evaluations": evaluations,
+                "negotiation_strategy": "counter_propose_with_justification",
+            }},
+        },
+    }
+
+
+def build_line_items(count: int, price_key: str = "price") -> List[Dict[str, Any]]:
+    return [{"id": i, "title": f"Item {i}", "quantity": 1 + i % 3, price_key: 19.99 + i % 50} for i in range(count)]
+
+
+def build_carts(items: int) -> Dict[str, Dict[str, Any]]:
+    """Platform carts with the given number of line items."""
+    customer = {"id": "cust_001", "email": "buyer@example.com"}
+    return {
+        "shopify": {
+            "total_price": 41040, "currency": "USD", "line_items": build_line_items(items),
+            "customer": customer, "shipping_address": {"country_code": "US"},
+            "shop_domain": "oxfords.myshopify.com", "category": "apparel",
+        },
+        "woocommerce": {
+            "total": "410.40", "currency": "USD", "items": build_line_items(items),
+            "customer": customer, "shipping": {"country": "US", "method": "express"},
+            "payment_method": "card", "store_id": "wc_store_001", "category": "apparel",
+        },
+        "bigcommerce": {
+            "base_total": 410.40, "currency": "USD",
+            "line_items": {"physical_items": build_line_items(items, "sale_price")},
+            "customer": customer, "shipping_addresses": [{"country_iso2": "US"}],
+            "store_hash": "abc123", "category": "apparel",
+        },
+    }
+
+
+def build_orca_response(rail_count: int) -> Dict[str, Any]:
+    """negotiateCheckout response with the chosen rail evaluated last."""
+    evaluations = build_rail_evaluations(rail_count)
+    return {
+        "chosen_rail": evaluations[-1]["rail_type"],
+        "explanation": {
+            "summary": "ACH selected for lowest cost",
+            "reasoning": "Lowest cost with acceptable settlement time and risk",
+            "confidence": 0.87,
+            "key_signals": ["cost", "risk", "settlement_days"],
+        },
+        "rail_evaluations": evaluations,
+        "timestamp": "2025-01-01T00:00:00",
+        "trace_id": "trace_bench",
+    }
+
+
+def build_agent_responses(list_size: int) -> Dict[str, Dict[str, Any]]:
+    """Raw agent responses as _fallback_parsing sees them."""
+    return {
+        "okra": {"approved": True, "credit_limit": 5000, "apr": 7.99,
+                 "reasons": [f"reason {i}" for i in range(list_size)]},
+        "onyx": {"trust_score": 0.85, "compliance_status": "verified", "sanctions_check": "clear"},
+        "opal": {"payment_methods": [{"id": f"pm_{i}", "type": "card"} for i in range(list_size)]},
+        "orca": {"chosen_rail": "ACH", "confidence": 0.8, "cost_score": 0.9},
+        "olive": {"incentives": [{"id": f"inc_{i}", "value": 1.5} for i in range(list_size)]},
+        "weave": {"candidate_scores": [{"processor": f"p{i}", "score": 0.7} for i in range(list_size)]},
+    }
+
+
+def build_parsed_data(list_size: int) -> Dict[str, Dict[str, Any]]:
+    """LLM parse results as _extract_ml_features sees them."""
+    return {
+        "okra": {"confidence_score": 0.9, "features": {"approved": True, "risk_score": "low", "credit_limit": 5000}},
+        "onyx": {"confidence_score": 0.8, "features": {
+            "trust_score": 0.85, "compliance_status": 0.9,
+            "risk_factors": [f"factor {i}: address mismatch" for i in range(list_size)]}},
+        "opal": {"confidence_score": 0.7, "features": {
+            "payment_methods": [f"pm_{i}" for i in range(list_size)], "avg_fee": 0.025}},
+        "orca": {"confidence_score": 0.9, "features": {"confidence": 0.8, "cost_score": 0.4}},
+        "olive": {"confidence_score": 0.6, "features": {"loyalty_tier": "Gold", "total_discount": 25}},
+        "weave": {"confidence_score": 0.8, "features": {"auction_success": 0.9, "cost_savings": 0.04}},
+    }
+
+
+def build_enhancer(traces: int) -> MLModelEnhancer:
+    """Enhancer holding one fallback-parsed response per agent per trace."""
+    parser = LLMResponseParser()
+    enhancer = MLModelEnhancer(parser)
+    responses = build_agent_responses(3)
+    for _ in range(traces):
+        for agent in AGENTS:
+            enhancer.add_parsed_response(parser._fallback_parsing(agent, responses[agent]))
+    return enhancer
+
+
+# Benchmark catalogue
+
+def build_benchmarks() -> List[Benchmark]:
+    """All benchmark cases, realistic and scaled."""
+    benchmarks: List[Benchmark] = []
+    scales = {"realistic": {"rails": 4, "items": 3, "list": 3, "traces": 1},
+              "scaled": {"rails": 200, "items": 1000, "list": 500, "traces": 100}}
+
+    adapters = {"shopify": ShopifyAdapter(), "woocommerce": WooCommerceAdapter(), "bigcommerce": BigCommerceAdapter()}
+    parser = LLMResponseParser()
+
+    for scale, size in scales.items():
+        negotiations = build_negotiations(size["rails"])
+        benchmarks.append(Benchmark(
+            "gateway.determine_negotiation_consensus", scale,
+            lambda n=negotiations: run_coroutine(determine_negotiation_consensus(n["orca"], n["opal"], 410.40))))
+
+        carts = build_carts(size["items"])
+        orca_response = build_orca_response(size["rails"])
+        for platform_name, adapter in adapters.items():
+            benchmarks.append(Benchmark(
+                f"{platform_name}.transform_cart_to_orca_request", scale,
+                lambda a=adapter, c=carts[platform_name]: a.transform_cart_to_orca_request(c)))
+            benchmarks.append(Benchmark(
+                f"{platform_name}.transform_orca_response_to_platform", scale,
+                lambda a=adapter, r=orca_response: a.transform_orca_response_to_platform(r)))
+            # The compiled mapping alone and the hand-written transforms it replaced
+            mapping = get_cart_mapping(platform_name)
+            benchmarks.append(Benchmark(
+                f"{platform_name}.cart_mapping.transform_cart", scale,
+                lambda m=mapping, c=carts[platform_name]: m.transform_cart(c)))
+            benchmarks.append(Benchmark(
+                f"{platform_name}.cart_mapping.transform_response", scale,
+                lambda m=mapping, r=orca_response: m.transform_response(r)))
+            reference_cart, reference_response = REFERENCE_TRANSFORMS[platform_name]
+            benchmarks.append(Benchmark(
+                f"{platform_name}.reference.transform_cart", scale,
+                lambda f=reference_cart, c=carts[platform_name]: f(c)))
+            benchmarks.append(Benchmark(
+                f"{platform_name}.reference.transform_response", scale,
+                lambda f=reference_response, r=orca_response: f(r)))
+
+        responses = build_agent_responses(size["list"])
+        benchmarks.append(Benchmark(
+            "llm_parser._fallback_parsing", scale,
+            lambda r=responses: [parser._fallback_parsing(agent, r[agent]) for agent in AGENTS]))
+
+        parsed = build_parsed_data(size["list"])
+        benchmarks.append(Benchmark(
+            "llm_parser._extract_ml_features", scale,
+            lambda p=parsed, r=responses: [parser._extract_ml_features(agent, p[agent], r[agent]) for agent in AGENTS]))
+
+        enhancer = build_enhancer(size["traces"])
+        benchmarks.append(Benchmark(
+            "ml_enhancer.get_enhanced_features", scale, enhancer.get_enhanced_features))
+
+    return benchmarks
+
+
+# Timing and statistics
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """
+    Time a callable timeit-style.
+
+    Args:
+        func: Callable to time
+        repeat: Number of timed samples
+        min_time: Target seconds per sample; the loop count is calibrated to it
+
+    Returns:
+        Per-call timing samples (seconds) and summary statistics
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    return {
+        "loops": loops,
+        "samples": samples,
+        "min_us": min(samples) * 1e6,
+        "median_us": statistics.median(samples) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "stdev_us": (statistics.stdev(samples) if len(samples) > 1 else 0.0) * 1e6,
+        "iqr_us": (quartiles[2] - quartiles[0]) * 1e6,
+    }
+
+
+def mann_whitney_u(a: List[float], b: List[float]) -> float:
+    """
+    Two-sided Mann-Whitney U test (normal approximation with tie correction).
+
+    Returns:
+        p-value for the hypothesis that both samples come from the same distribution
+    """
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    n1, n2 = len(a), len(b)
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return math.erfc(max(z, 0.0) / math.sqrt(2))
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    alpha: float, min_change: float) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents case by case.
+
+    A change is reported as significant only when the Mann-Whitney p-value is
+    below `alpha` and the median moved by more than `min_change`.
+    """
+    previous = {(r["name"], r["scale"]): r for r in baseline.get("results", [])}
+    comparisons = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["scale"]))
+        if old is None:
+            continue
+        change = result["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        p_value = mann_whitney_u(result["samples"], old["samples"])
+        if p_value < alpha and abs(change) > min_change:
+            verdict = "slower" if change > 0 else "faster"
+        else:
+            verdict = "same"
+        comparisons.append({
+            "name": result["name"], "scale": result["scale"],
+            "baseline_median_us": old["median_us"], "median_us": result["median_us"],
+            "change": change, "p_value": p_value, "verdict": verdict,
+        })
+    return comparisons
+
+
+def profile(benchmarks: List[Benchmark], path: str, seconds: float = 1.0, top: int = 20):
+    """Run the selected benchmarks under cProfile and dump the stats to `path`."""
+    profiler = cProfile.Profile()
+    for benchmark in benchmarks:
+        deadline = time.perf_counter() + seconds
+        profiler.enable()
+        while time.perf_counter() < deadline:
+            benchmark.func()
+        profiler.disable()
+    profiler.dump_stats(path)
+    print(f"📄 Profile written to {path} (view with: python -m pstats {path} or snakeviz)")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+def main():
+    """Main function to run the microbenchmarks."""
+    parser = argparse.ArgumentParser(description="Microbenchmarks for pure-Python hot paths")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--scale", choices=["realistic", "scaled", "all"], default="all")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.02, help="Target seconds per sample")
+    parser.add_argument("--json-out", help="Write results (with raw samples) as JSON")
+    parser.add_argument("--compare", help="Compare against a previous --json-out file")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level for --compare")
+    parser.add_argument("--min-change", type=float, default=0.05, help="Ignore median changes smaller than this")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the selected benchmarks and dump pstats to PATH")
+    args = parser.parse_args()
+
+    # The adapters and parser log at INFO on every call; keep that out of the timings
+    logging.disable(logging.INFO)
+
+    benchmarks = [
+        b for b in build_benchmarks()
+        if args.filter in b.name and args.scale in ("all", b.scale)
+    ]
+    if not benchmarks:
+        parser.error("No benchmarks selected")
+
+    if args.profile:
+        profile(benchmarks, args.profile)
+        return 0
+
+    results = []
+    print(f"{'benchmark':<52} {'scale':<10} {'median':>12} {'iqr':>10}")
+    for benchmark in benchmarks:
+        timing = measure(benchmark.func, args.repeat, args.min_time)
+        results.append({"name": benchmark.name, "scale": benchmark.scale, **timing})
+        print(f"{benchmark.name:<52} {benchmark.scale:<10} {timing['median_us']:>10.2f}us {timing['iqr_us']:>8.2f}us")
+
+    document = {
+        "benchmark": "microbench",
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"📄 Results written to {args.json_out}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        comparisons = compare_results(document, baseline, args.alpha, args.min_change)
+        print(f"\n{'benchmark':<52} {'scale':<10} {'change':>8} {'p':>8}  verdict")
+        for c in comparisons:
+            print(f"{c['name']:<52} {c['scale']:<10} {c['change']:>+7.1%} {c['p_value']:>8.4f}  {c['verdict']}")
+        if any(c["verdict"] == "slower" for c in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
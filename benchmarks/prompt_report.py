@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Parsing Prompt Size Report
+
+Compares the legacy parsing prompt (schema rebuilt per call, full response
+as indented JSON) with the compiled prompt (schema rendered once, response
+pruned to key fields, compact JSON, per-agent token budget) for realistic
+agent responses from stubs/agent_stubs.py and for verbose, scaled-up ones.
+
+Reports characters, tokens, prompt build time and the latency effect. With
+--base-url and --api-key it times real chat completions with both prompts;
+otherwise it estimates the prefill time saved from --prefill-tokens-per-s.
+
+Usage:
+    python -m benchmarks.prompt_report
+    python -m benchmarks.prompt_report --base-url http://localhost:9100/v1/chat/completions --api-key test --calls 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from llm_response_parser import LLMResponseParser, estimate_tokens
+from stubs.agent_stubs import (
+    okra_quote, olive_incentives, onyx_kyb, opal_methods, orca_negotiate, weave_auction,
+)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_ENCODING.encode(text))
+
+    TOKENIZER = "tiktoken/o200k_base"
+except ImportError:
+    count_tokens = estimate_tokens
+    TOKENIZER = "estimate (4 chars/token)"
+
+
+def legacy_parsing_prompt(agent_name: str, response: Dict[str, Any]) -> str:
+    """The parsing prompt as LLMResponseParser built it before prompt compilation."""
+
+    agent_schemas = {
+        "okra": {
+            "description": "Credit assessment agent",
+            "key_fields": ["approved", "credit_limit", "apr", "risk_score", "reasons"],
+            "ml_features": ["approval_probability", "risk_level", "credit_worthiness"]
+        },
+        "onyx": {
+            "description": "Trust and compliance agent",
+            "key_fields": ["trust_score", "compliance_status", "risk_factors", "sanctions_check"],
+            "ml_features": ["trust_level", "compliance_risk", "sanctions_risk"]
+        },
+        "opal": {
+            "description": "Wallet and payment method agent",
+            "key_fields": ["payment_methods", "fees", "processing_time", "security_features"],
+            "ml_features": ["method_preference", "cost_efficiency", "security_score"]
+        },
+        "orca": {
+            "description": "Checkout and decision agent",
+            "key_fields": ["optimal_rail", "confidence", "cost_analysis", "risk_assessment"],
+            "ml_features": ["rail_preference", "decision_confidence", "cost_optimization"]
+        },
+        "olive": {
+            "description": "Loyalty and incentives agent",
+            "key_fields": ["incentives", "loyalty_tier", "discounts", "rewards"],
+            "ml_features": ["loyalty_value", "incentive_attractiveness", "retention_probability"]
+        },
+        "weave": {
+            "description": "Processor and auction agent",
+            "key_fields": ["auction_results", "processor_rankings", "cost_analysis", "performance_metrics"],
+            "ml_features": ["processor_efficiency", "cost_optimization", "performance_score"]
+        }
+    }
+
+    schema = agent_schemas.get(agent_name, agent_schemas["orca"])
+
+    prompt = f"""
+You are an expert at parsing payment processing agent responses. Your task is to extract structured data from the {agent_name} agent response.
+
+Agent Description: {schema['description']}
+Key Fields to Extract: {', '.join(schema['key_fields'])}
+ML Features to Generate: {', '.join(schema['ml_features'])}
+
+Raw Response:
+{json.dumps(response, indent=2)}
+
+Please parse this response and return a JSON object with the following structure:
+{{
+    "response_type": "string describing the type of response",
+    "features": {{
+        "key_field_1": "extracted_value",
+        "key_field_2": "extracted_value",
+        ...
+    }},
+    "confidence_score": 0.0-1.0,
+    "ml_features": {{
+        "feature_1": numerical_value,
+        "feature_2": numerical_value,
+        ...
+    }},
+    "insights": [
+        "key insight 1",
+        "key insight 2"
+    ],
+    "risk_indicators": [
+        "risk factor 1",
+        "risk factor 2"
+    ]
+}}
+
+Focus on extracting numerical values that can be used by ML models for decision making.
+"""
+    return prompt
+
+
+def build_responses(scale: int, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """
+    Agent responses from the stand-in builders.
+
+    Args:
+        scale: 1 for realistic responses; larger values add proportionally
+            more list entries and diagnostic detail, like verbose agents do
+    """
+    rng = random.Random(seed)
+    body = {"amount": 410.40, "cart_total": 410.40, "transaction_amount": 410.40}
+    responses = {
+        "okra": okra_quote(body, {}, {}, rng),
+        "onyx": onyx_kyb(body, {}, {}, rng),
+        "opal": opal_methods(body, {"actor_id": "demo_actor"}, {}, rng),
+        "orca": orca_negotiate(body, {}, {}, rng),
+        "olive": olive_incentives(body, {"transaction_amount": "410.40"}, {}, rng),
+        "weave": weave_auction(body, {}, {}, rng),
+    }
+    if scale > 1:
+        for agent, response in responses.items():
+            response["diagnostics"] = {
+                "trace": [{"step": i, "component": f"{agent}.stage_{i % 7}", "elapsed_ms": rng.uniform(0.1, 5.0),
+                           "message": f"{agent} evaluated rule set {i} with no adverse findings"}
+                          for i in range(20 * scale)],
+                "model_versions": {f"model_{i}": f"2025.{i}.0" for i in range(5 * scale)},
+            }
+        responses["weave"]["candidate_scores"] = [
+            {"processor": f"processor_{i}", "score": rng.random(), "fee_bps": rng.uniform(100, 300)}
+            for i in range(40 * scale)
+        ]
+        responses["okra"]["reasons"] = [f"Signal {i} within tolerance" for i in range(10 * scale)]
+    return responses
+
+
+def time_build(build: Callable[[], str], loops: int = 200) -> float:
+    """Median microseconds to build a prompt."""
+    samples = []
+    for _ in range(7):
+        start = time.perf_counter()
+        for _ in range(loops):
+            build()
+        samples.append((time.perf_counter() - start) / loops)
+    return statistics.median(samples) * 1e6
+
+
+def time_llm_calls(parser: LLMResponseParser, prompt: str, calls: int) -> Optional[float]:
+    """Median milliseconds for a real chat completion with the given prompt."""
+    headers, payload = parser._build_llm_request(prompt)
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            response = requests.post(parser.base_url, headers=headers, json=payload, timeout=60)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"❌ LLM call failed: {e}")
+            return None
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def build_report(scales: List[int], parser: LLMResponseParser, calls: int, prefill_tokens_per_s: float,
+                 measure_llm: bool) -> List[Dict[str, Any]]:
+    """Measure legacy vs compiled prompts for every agent at every scale."""
+    rows = []
+    for scale in scales:
+        for agent, response in build_responses(scale).items():
+            legacy = legacy_parsing_prompt(agent, response)
+            compiled = parser._create_parsing_prompt(agent, response)
+            legacy_tokens, compiled_tokens = count_tokens(legacy), count_tokens(compiled)
+            row = {
+                "scale": scale,
+                "agent": agent,
+                "legacy_chars": len(legacy),
+                "compiled_chars": len(compiled),
+                "legacy_tokens": legacy_tokens,
+                "compiled_tokens": compiled_tokens,
+                "token_reduction": 1 - compiled_tokens / legacy_tokens,
+                "legacy_build_us": time_build(lambda: legacy_parsing_prompt(agent, response)),
+                "compiled_build_us": time_build(lambda: parser._create_parsing_prompt(agent, response)),
+                "estimated_prefill_saved_ms": (legacy_tokens - compiled_tokens) / prefill_tokens_per_s * 1000,
+            }
+            if measure_llm:
+                row["legacy_llm_ms"] = time_llm_calls(parser, legacy, calls)
+                row["compiled_llm_ms"] = time_llm_calls(parser, compiled, calls)
+            rows.append(row)
+    return rows
+
+
+def main():
+    """Main function to print the prompt size report."""
+    argparser = argparse.ArgumentParser(description="Legacy vs compiled parsing prompt report")
+    argparser.add_argument("--scales", default="1,10", help="Comma-separated response scales (1 = realistic)")
+    argparser.add_argument("--prefill-tokens-per-s", type=float, default=4000.0,
+                           help="Prompt processing rate used to estimate latency saved")
+    argparser.add_argument("--base-url", help="Chat completions URL to time real calls against")
+    argparser.add_argument("--api-key", help="API key for --base-url")
+    argparser.add_argument("--model", default="gpt-4o-mini")
+    argparser.add_argument("--calls", type=int, default=3, help="Real calls per prompt when --base-url is set")
+    argparser.add_argument("--json-out", help="Write the report as JSON")
+    args = argparser.parse_args()
+
+    parser = LLMResponseParser(args.api_key, model=args.model, base_url=args.base_url)
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    measure_llm = bool(args.base_url and args.api_key)
+    rows = build_report(scales, parser, args.calls, args.prefill_tokens_per_s, measure_llm)
+
+    print(f"Tokenizer: {TOKENIZER}")
+    header = f"{'scale':>5} {'agent':<6} {'legacy tok':>10} {'compiled tok':>12} {'saved':>6} {'build us (old/new)':>19} {'est. prefill saved':>19}"
+    if measure_llm:
+        header += f" {'LLM ms (old/new)':>17}"
+    print(header)
+    for row in rows:
+        line = (f"{row['scale']:>5} {row['agent']:<6} {row['legacy_tokens']:>10} {row['compiled_tokens']:>12} "
+                f"{row['token_reduction']:>6.0%} {row['legacy_build_us']:>9.1f}/{row['compiled_build_us']:<9.1f}"
+                f" {row['estimated_prefill_saved_ms']:>16.1f}ms")
+        if measure_llm and row["legacy_llm_ms"] is not None and row["compiled_llm_ms"] is not None:
+            line += f" {row['legacy_llm_ms']:>8.0f}/{row['compiled_llm_ms']:<8.0f}"
+        print(line)
+
+    for scale in scales:
+        selected = [row for row in rows if row["scale"] == scale]
+        legacy = sum(row["legacy_tokens"] for row in selected)
+        compiled = sum(row["compiled_tokens"] for row in selected)
+        print(f"Scale {scale}: {legacy} -> {compiled} tokens per trace ({1 - compiled / legacy:.0%} fewer)")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"tokenizer": TOKENIZER, "rows": rows}, f, indent=2)
+        print(f"📄 Report written to {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Reference Platform Transforms
+
+The hand-written cart and response transforms the Shopify, WooCommerce and
+BigCommerce adapters used before plugins/common/cart_mapping replaced them
+with compiled mappings, kept as plain functions (logging dropped). The
+microbenchmarks time them next to the compiled mappings, and
+test_cart_mapping.py checks the compiled mappings still produce exactly what
+these did.
+"""
+
+from typing import Any, Callable, Dict, Tuple
+
+
+def _rail_candidates():
+    return [
+        {"rail_type": "credit", "base_cost_bps": 150.0, "settlement_days": 1, "risk_score": 0.3},
+        {"rail_type": "debit", "base_cost_bps": 100.0, "settlement_days": 2, "risk_score": 0.2},
+        {"rail_type": "ACH", "base_cost_bps": 50.0, "settlement_days": 1, "risk_score": 0.1},
+    ]
+
+
+def shopify_cart_to_orca_request(shopify_cart: Dict[str, Any]) -> Dict[str, Any]:
+    cart_total = float(shopify_cart.get('total_price', 0)) / 100  # Shopify uses cents
+    currency = shopify_cart.get('currency', 'USD')
+    line_items = shopify_cart.get('line_items', [])
+    item_count = sum(item.get('quantity', 1) for item in line_items)
+
+    customer = shopify_cart.get('customer', {})
+    customer_id = customer.get('id', 'guest')
+    customer_email = customer.get('email', '')
+    shipping_address = shopify_cart.get('shipping_address', {})
+    shipping_country = shipping_address.get('country_code', 'US')
+    shop_domain = shopify_cart.get('shop_domain', 'shopify-store')
+
+    return {
+        "cart_summary": {
+            "total_amount": cart_total,
+            "currency": currency,
+            "item_count": item_count,
+            "merchant_id": shop_domain,
+            "merchant_category": shopify_cart.get('category', 'general'),
+            "channel": "online"
+        },
+        "rail_candidates": _rail_candidates(),
+        "customer_context": {
+            "customer_id": customer_id,
+            "email": customer_email,
+            "shipping_country": shipping_country,
+            "platform": "shopify",
+            "shop_domain": shop_domain
+        },
+        "deterministic_seed": 42
+    }
+
+
+def woocommerce_cart_to_orca_request(woocommerce_cart: Dict[str, Any]) -> Dict[str, Any]:
+    cart_total = float(woocommerce_cart.get('total', 0))
+    currency = woocommerce_cart.get('currency', 'USD')
+    items = woocommerce_cart.get('items', [])
+    item_count = sum(item.get('quantity', 1) for item in items)
+
+    customer = woocommerce_cart.get('customer', {})
+    customer_id = customer.get('id', 'guest')
+    customer_email = customer.get('email', '')
+    shipping = woocommerce_cart.get('shipping', {})
+    shipping_country = shipping.get('country', 'US')
+    shipping_method = shipping.get('method', 'standard')
+    payment_method = woocommerce_cart.get('payment_method', 'card')
+
+    return {
+        "cart_summary": {
+            "total_amount": cart_total,
+            "currency": currency,
+            "item_count": item_count,
+            "merchant_id": woocommerce_cart.get('store_id', 'woocommerce_store'),
+            "merchant_category": woocommerce_cart.get('category', 'general'),
+            "channel": "online"
+        },
+        "rail_candidates": _rail_candidates(),
+        "customer_context": {
+            "customer_id": customer_id,
+            "email": customer_email,
+            "shipping_country": shipping_country,
+            "shipping_method": shipping_method,
+            "payment_method": payment_method,
+            "platform": "woocommerce"
+        },
+        "deterministic_seed": 42
+    }
+
+
+def bigcommerce_cart_to_orca_request(bigcommerce_cart: Dict[str, Any]) -> Dict[str, Any]:
+    cart_total = float(bigcommerce_cart.get('base_total', 0))
+    currency = bigcommerce_cart.get('currency', 'USD')
+    line_items = bigcommerce_cart.get('line_items', {}).get('physical_items', [])
+    item_count = sum(item.get('quantity', 1) for item in line_items)
+
+    customer = bigcommerce_cart.get('customer', {})
+    customer_id = customer.get('id', 'guest')
+    customer_email = customer.get('email', '')
+    shipping_address = bigcommerce_cart.get('shipping_addresses', [{}])[0]
+    shipping_country = shipping_address.get('country_iso2', 'US')
+    store_hash = bigcommerce_cart.get('store_hash', 'bigcommerce-store')
+
+    return {
+        "cart_summary": {
+            "total_amount": cart_total,
+            "currency": currency,
+            "item_count": item_count,
+            "merchant_id": store_hash,
+            "merchant_category": bigcommerce_cart.get('category', 'general'),
+            "channel": "online"
+        },
+        "rail_candidates": _rail_candidates(),
+        "customer_context": {
+            "customer_id": customer_id,
+            "email": customer_email,
+            "shipping_country": shipping_country,
+            "platform": "bigcommerce",
+            "store_hash": store_hash
+        },
+        "deterministic_seed": 42
+    }
+
+
+def _response_transform(method_key: str, rail_mapping: Dict[str, str], default_method: str) -> Callable:
+    """The response transform, identical across platforms apart from the payment method key and mapping."""
+
+    def orca_response_to_platform(orca_response: Dict[str, Any]) -> Dict[str, Any]:
+        chosen_rail = orca_response.get('chosen_rail', 'credit')
+        explanation = orca_response.get('explanation', {})
+        rail_evaluations = orca_response.get('rail_evaluations', [])
+
+        chosen_rail_data = None
+        for rail in rail_evaluations:
+            if rail.get('rail_type') == chosen_rail:
+                chosen_rail_data = rail
+                break
+
+        return {
+            'success': True,
+            method_key: rail_mapping.get(chosen_rail, default_method),
+            'chosen_rail': chosen_rail,
+            'explanation': {
+                'summary': explanation.get('summary', ''),
+                'reasoning': explanation.get('reasoning', ''),
+                'confidence': explanation.get('confidence', 0.0),
+                'key_signals': explanation.get('key_signals', [])
+            },
+            'rail_details': {
+                'cost_score': chosen_rail_data.get('cost_score', 0.0) if chosen_rail_data else 0.0,
+                'speed_score': chosen_rail_data.get('speed_score', 0.0) if chosen_rail_data else 0.0,
+                'risk_score': chosen_rail_data.get('risk_score', 0.0) if chosen_rail_data else 0.0,
+                'final_score': chosen_rail_data.get('final_score', 0.0) if chosen_rail_data else 0.0
+            },
+            'all_rails': [
+                {
+                    'rail_type': rail.get('rail_type'),
+                    'final_score': rail.get('final_score', 0.0),
+                    'cost_score': rail.get('cost_score', 0.0),
+                    'speed_score': rail.get('speed_score', 0.0),
+                    'risk_score': rail.get('risk_score', 0.0)
+                }
+                for rail in rail_evaluations
+            ],
+            'timestamp': orca_response.get('timestamp', ''),
+            'trace_id': orca_response.get('trace_id', '')
+        }
+
+    return orca_response_to_platform
+
+
+# Platform -> (cart transform, response transform)
+REFERENCE_TRANSFORMS: Dict[str, Tuple[Callable, Callable]] = {
+    "shopify": (
+        shopify_cart_to_orca_request,
+        _response_transform("gateway", {'credit': 'stripe', 'debit': 'stripe', 'ACH': 'shopify_payments',
+                                        'wire': 'manual'}, 'stripe'),
+    ),
+    "woocommerce": (
+        woocommerce_cart_to_orca_request,
+        _response_transform("payment_method", {'credit': 'credit_card', 'debit': 'debit_card',
+                                               'ACH': 'bank_transfer', 'wire': 'wire_transfer'}, 'credit_card'),
+    ),
+    "bigcommerce": (
+        bigcommerce_cart_to_orca_request,
+        _response_transform("payment_provider", {'credit': 'stripe', 'debit': 'stripe', 'ACH': 'square',
+                                                 'wire': 'manual'}, 'stripe'),
+    ),
+}
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Synthetic Workload Generator
+
+Learns per-field distributions from the sample payloads in samples/ and
+streams varied, seed-reproducible requests as NDJSON, so load tests stop
+replaying the same cart.json and warming every cache.
+
+Request kinds and their sources:
+    cart      samples/*/cart.json
+    bnpl      samples/*/bnpl_request.json
+    kyb       samples/*/kyb_vendor.json
+    wallet    samples/*/wallet_context.json
+    checkout  samples/ap2/checkout_small.json
+
+Each generated request is built from one of the sample templates with every
+leaf value resampled from what the samples show for that field path. Merchant
+popularity follows a Zipf distribution (--merchant-skew) and cart line counts
+follow --cart-size. Record i depends only on (seed, i), so shards generated
+with --start/--count concatenate to the same stream.
+
+Usage:
+    python -m benchmarks.workload --count 1000000 --seed 7 --merchant-skew 1.2 \\
+        --cart-size lognormal:median=3,sigma=0.8 > workload.ndjson
+"""
+
+import argparse
+import bisect
+import glob
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES_DIR = os.path.join(REPO_ROOT, "samples")
+
+SAMPLE_SOURCES = {
+    "cart": ["*/cart.json"],
+    "bnpl": ["*/bnpl_request.json"],
+    "kyb": ["*/kyb_vendor.json"],
+    "wallet": ["*/wallet_context.json"],
+    "checkout": ["ap2/checkout_small.json"],
+}
+
+DEFAULT_MIX = {"cart": 0.6, "checkout": 0.1, "bnpl": 0.1, "kyb": 0.1, "wallet": 0.1}
+
+# Keys whose values identify an entity and must vary per record
+ID_KEYS = {"customer_id", "actor_id", "entity_id", "session_id", "trace_id", "payment_method_id",
+           "method_id", "registration_number", "ein"}
+MERCHANT_ID_KEYS = {"merchant_id"}
+MCC_KEYS = {"mcc", "merchant_category_code"}
+ITEM_LIST_PATHS = {"cart.items"}
+BASE_TIME = datetime(2025, 1, 25, 10, 0, 0)
+
+
+def _path_key(path: Tuple[str, ...]) -> str:
+    return ".".join(path)
+
+
+class FieldModel:
+    """Distribution learned from every value observed at one field path."""
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+        self.kind = self._infer_kind(values)
+        numbers = [float(v) for v in values if self.kind in ("int", "float", "unit")]
+        if self.kind in ("int", "float"):
+            logs = [math.log(v) for v in numbers if v > 0]
+            self.mu = statistics.fmean(logs) if logs else 0.0
+            # Few samples understate spread; keep a floor so values still vary
+            self.sigma = max(statistics.pstdev(logs) if len(logs) > 1 else 0.0, 0.35)
+            self.low = min(numbers) / 4 if min(numbers) > 0 else 0.0
+            self.high = max(numbers) * 4 if numbers else 1.0
+        elif self.kind == "unit":
+            self.mean = statistics.fmean(numbers)
+            self.sd = max(statistics.pstdev(numbers) if len(numbers) > 1 else 0.0, 0.05)
+        elif self.kind == "bool":
+            self.p_true = sum(1 for v in values if v) / len(values)
+
+    @staticmethod
+    def _infer_kind(values: List[Any]) -> str:
+        if all(isinstance(v, bool) for v in values):
+            return "bool"
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            return "int"
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            return "unit" if all(0.0 <= v <= 1.0 for v in values) else "float"
+        return "categorical"
+
+    def sample(self, rng: random.Random, template_value: Any) -> Any:
+        if self.kind == "bool":
+            return rng.random() < self.p_true
+        if self.kind == "unit":
+            return round(min(max(rng.gauss(self.mean, self.sd), 0.0), 1.0), 4)
+        if self.kind in ("int", "float"):
+            if template_value == 0:
+                return template_value
+            value = min(max(rng.lognormvariate(self.mu, self.sigma), self.low), self.high)
+            return max(int(round(value)), 1) if self.kind == "int" else round(value, 2)
+        return rng.choice(self.values)
+
+
+class CountDistribution:
+    """
+    Distribution of positive counts, parsed from "kind:key=value,...".
+
+    Supported: fixed:n=3, uniform:min=1,max=10, poisson:mean=3,
+    geometric:mean=3, lognormal:median=3,sigma=0.8
+    """
+
+    def __init__(self, spec: str, maximum: int = 1000):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = {k: float(v) for k, v in (p.split("=") for p in params.split(",") if p)}
+        self.maximum = maximum
+        if kind not in ("fixed", "uniform", "poisson", "geometric", "lognormal"):
+            raise ValueError(f"Unknown count distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> int:
+        p = self.params
+        if self.kind == "fixed":
+            value = p.get("n", 1)
+        elif self.kind == "uniform":
+            value = rng.randint(int(p.get("min", 1)), int(p.get("max", 5)))
+        elif self.kind == "poisson":
+            # Knuth's method; fine for the small means carts have
+            limit, value, product = math.exp(-p.get("mean", 3.0)), 0, rng.random()
+            while product > limit:
+                value += 1
+                product *= rng.random()
+        elif self.kind == "geometric":
+            success = 1.0 / max(p.get("mean", 3.0), 1.0)
+            value = 1 if success >= 1 else 1 + int(math.log(1.0 - rng.random()) / math.log(1.0 - success))
+        else:
+            value = round(rng.lognormvariate(math.log(p.get("median", 3.0)), p.get("sigma", 0.8)))
+        return int(min(max(value, 1), self.maximum))
+
+
+class MerchantPopulation:
+    """Merchants with Zipf-distributed popularity and a stable MCC each."""
+
+    def __init__(self, count: int, skew: float, mcc_values: List[Any], seed: int):
+        self.count = count
+        weights = [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+        self.mcc_values = mcc_values or ["5999"]
+        self.seed = seed
+
+    def sample(self, rng: random.Random) -> Dict[str, Any]:
+        rank = bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1]) + 1
+        mcc = random.Random(f"{self.seed}:merchant:{rank}").choice(self.mcc_values)
+        return {"rank": rank, "merchant_id": f"merchant_{rank:06d}", "merchant_name": f"Merchant {rank}", "mcc": mcc}
+
+
+class WorkloadModel:
+    """Field distributions and templates learned from samples/."""
+
+    def __init__(self, samples_dir: str = SAMPLES_DIR):
+        self.templates: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        observed: Dict[str, Dict[str, List[Any]]] = defaultdict(lambda: defaultdict(list))
+        self.mcc_values: List[Any] = []
+
+        for kind, patterns in SAMPLE_SOURCES.items():
+            for pattern in patterns:
+                for path in sorted(glob.glob(os.path.join(samples_dir, pattern))):
+                    with open(path, "r") as f:
+                        document = json.load(f)
+                    self.templates[kind].append(document)
+                    self._observe(document, (), observed[kind])
+
+        if not self.templates:
+            raise FileNotFoundError(f"No sample payloads found under {samples_dir}")
+
+        self.fields = {kind: {key: FieldModel(values) for key, values in paths.items()}
+                       for kind, paths in observed.items()}
+
+    def _observe(self, value: Any, path: Tuple[str, ...], observed: Dict[str, List[Any]]):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                self._observe(child, path + (key,), observed)
+        elif isinstance(value, list):
+            for child in value:
+                self._observe(child, path + ("[]",), observed)
+        else:
+            observed[_path_key(path)].append(value)
+            if path and path[-1] in MCC_KEYS and value not in self.mcc_values:
+                self.mcc_values.append(value)
+
+
+class WorkloadGenerator:
+    """
+    Lazily generates synthetic requests.
+
+    Args:
+        model: Learned workload model
+        seed: Base seed; record i depends only on (seed, i)
+        mix: Relative frequency of each request kind
+        merchants: Size of the merchant population
+        merchant_skew: Zipf exponent (0 = uniform, ~1.1 = typical marketplace)
+        cart_size: Distribution of cart line counts
+        catalog_size: Distinct SKUs per merchant
+    """
+
+    def __init__(self, model: WorkloadModel, seed: int = 0, mix: Optional[Dict[str, float]] = None,
+                 merchants: int = 10000, merchant_skew: float = 1.1,
+                 cart_size: Optional[CountDistribution] = None, catalog_size: int = 5000):
+        self.model = model
+        self.seed = seed
+        mix = {kind: weight for kind, weight in (mix or DEFAULT_MIX).items() if model.templates.get(kind)}
+        self.kinds = list(mix)
+        self.kind_cumulative = list(itertools.accumulate(mix[kind] for kind in self.kinds))
+        self.merchants = MerchantPopulation(merchants, merchant_skew, model.mcc_values, seed)
+        self.cart_size = cart_size or CountDistribution("lognormal:median=2,sigma=0.8")
+        self.catalog_size = catalog_size
+
+    def generate(self, index: int) -> Dict[str, Any]:
+        """Build record `index` of the stream."""
+        rng = random.Random(f"{self.seed}:{index}")
+        kind = self.kinds[bisect.bisect_left(self.kind_cumulative, rng.random() * self.kind_cumulative[-1])]
+        template = rng.choice(self.model.templates[kind])
+        context = {
+            "kind": kind,
+            "index": index,
+            "merchant": self.merchants.sample(rng),
+            "trace_id": f"wl_{self.seed}_{index:010d}",
+            "timestamp": (BASE_TIME + timedelta(milliseconds=index)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+        }
+        request = self._render(template, (), rng, context)
+        if kind in ("cart", "checkout"):
+            self._reconcile_totals(request, rng)
+        return {
+            "seq": index,
+            "kind": kind,
+            "trace_id": context["trace_id"],
+            "merchant_id": context["merchant"]["merchant_id"],
+            "request": request,
+        }
+
+    def stream(self, count: Optional[int] = None, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield records start, start+1, ... (forever if count is None)."""
+        indices = itertools.count(start) if count is None else range(start, start + count)
+        for index in indices:
+            yield self.generate(index)
+
+    def _render(self, value: Any, path: Tuple[str, ...], rng: random.Random, context: Dict[str, Any]) -> Any:
+        if isinstance(value, dict):
+            return {key: self._render(child, path + (key,), rng, context) for key, child in value.items()}
+        if isinstance(value, list):
+            if _path_key(path) in ITEM_LIST_PATHS and value:
+                return [self._render_item(rng.choice(value), path + ("[]",), rng, context)
+                        for _ in range(self.cart_size.sample(rng))]
+            return [self._render(child, path + ("[]",), rng, context) for child in value]
+        return self._leaf(value, path, rng, context)
+
+    def _render_item(self, template: Dict[str, Any], path: Tuple[str, ...], rng: random.Random,
+                     context: Dict[str, Any]) -> Dict[str, Any]:
+        item = self._render(template, path, rng, context)
+        if "sku" in item:
+            product = rng.randrange(self.catalog_size)
+            item["sku"] = f"{context['merchant']['merchant_id']}-SKU-{product:05d}"
+        return item
+
+    def _leaf(self, value: Any, path: Tuple[str, ...], rng: random.Random, context: Dict[str, Any]) -> Any:
+        key = path[-1] if path else ""
+        merchant = context["merchant"]
+        if key in MERCHANT_ID_KEYS:
+            return merchant["merchant_id"]
+        if key == "merchant_name":
+            return merchant["merchant_name"]
+        if key in MCC_KEYS:
+            mcc = merchant["mcc"]
+            return type(value)(mcc) if isinstance(value, (int, str)) else mcc
+        if key == "trace_id":
+            return context["trace_id"]
+        if key == "timestamp":
+            return context["timestamp"]
+        if key in ID_KEYS:
+            return f"{key.replace('_id', '')}_{rng.randrange(10 ** 9):09d}"
+        model = self.model.fields[context["kind"]].get(_path_key(path))
+        return model.sample(rng, value) if model else value
+
+    @staticmethod
+    def _reconcile_totals(request: Dict[str, Any], rng: random.Random):
+        """Make line subtotals, cart totals and intent amount agree."""
+        cart = request.get("cart", {})
+        items = cart.get("items", [])
+        subtotal = 0.0
+        for item in items:
+            quantity = item.get("qty", item.get("quantity", 1))
+            if "unit_price" in item:
+                line = quantity * item["unit_price"]
+                if "subtotal" in item:
+                    item["subtotal"] = round(line, 2)
+            else:
+                line = item.get("amount", 0.0)
+            subtotal += line
+
+        tax = 0.0
+        if "tax" in cart:
+            tax = round(subtotal * rng.uniform(0.0, 0.1), 2)
+            cart["tax"] = tax
+        if "subtotal" in cart:
+            cart["subtotal"] = round(subtotal, 2)
+        total = round(subtotal + tax, 2)
+        for key in ("total", "total_amount"):
+            if key in cart:
+                cart[key] = total
+        intent = request.get("intent")
+        if isinstance(intent, dict) and "amount" in intent:
+            intent["amount"] = total
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "cart=0.6,bnpl=0.2,..." into relative weights."""
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in SAMPLE_SOURCES:
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    """Main function to stream a synthetic workload."""
+    parser = argparse.ArgumentParser(description="Stream synthetic OCN requests as NDJSON")
+    parser.add_argument("--count", type=int, default=1000, help="Records to emit (0 = unbounded)")
+    parser.add_argument("--start", type=int, default=0, help="First record index (for sharding)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", type=parse_mix, help="Request kind weights, e.g. cart=0.8,bnpl=0.2")
+    parser.add_argument("--merchants", type=int, default=10000, help="Merchant population size")
+    parser.add_argument("--merchant-skew", type=float, default=1.1, help="Zipf exponent for merchant popularity")
+    parser.add_argument("--cart-size", default="lognormal:median=2,sigma=0.8",
+                        help="Line-count distribution: fixed:n=3, uniform:min=1,max=10, poisson:mean=3, "
+                             "geometric:mean=3, lognormal:median=3,sigma=0.8")
+    parser.add_argument("--max-items", type=int, default=1000)
+    parser.add_argument("--catalog-size", type=int, default=5000, help="Distinct SKUs per merchant")
+    parser.add_argument("--samples-dir", default=SAMPLES_DIR)
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    generator = WorkloadGenerator(
+        WorkloadModel(args.samples_dir),
+        seed=args.seed,
+        mix=args.mix,
+        merchants=args.merchants,
+        merchant_skew=args.merchant_skew,
+        cart_size=CountDistribution(args.cart_size, args.max_items),
+        catalog_size=args.catalog_size,
+    )
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in generator.stream(args.count or None, args.start):
+            out.write(json.dumps(record, separators=(",", ":")))
+            out.write("\n")
+    except BrokenPipeError:
+        # Allow piping into head and friends
+        sys.stderr.close()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -36,17 +36,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Agent URLs - Direct REST endpoints
+# Agent URLs - Direct REST endpoints (override with <AGENT>_URL, e.g. for stubs/)
 AGENT_URLS = {
-    "orca": "http://orca:8080",      # Decision Engine
-    "opal": "http://opal:8084",      # Consumer Wallet
-    "olive": "http://olive:8087",    # Incentives & Policies
-    "okra": "http://okra:8083",      # BNPL & Credit
-    "onyx": "http://onyx:8086",      # KYB & Trust
-    "weave": "http://weave:8082",    # Processor Auction
-    "orion": "http://orion:8081",    # Event Bus & Optimization
+    "orca": os.getenv("ORCA_URL", "http://orca:8080"),      # Decision Engine
+    "opal": os.getenv("OPAL_URL", "http://opal:8084"),      # Consumer Wallet
+    "olive": os.getenv("OLIVE_URL", "http://olive:8087"),    # Incentives & Policies
+    "okra": os.getenv("OKRA_URL", "http://okra:8083"),      # BNPL & Credit
+    "onyx": os.getenv("ONYX_URL", "http://onyx:8086"),      # KYB & Trust
+    "weave": os.getenv("WEAVE_URL", "http://weave:8082"),    # Processor Auction
+    "orion": os.getenv("ORION_URL", "http://orion:8081"),    # Event Bus & Optimization
 }
 
+# Transport for agent calls; None uses the network. Benchmarks swap in an
+# httpx.ASGITransport so the orchestration runs in-process against stubs/.
+AGENT_TRANSPORT: Optional[httpx.AsyncBaseTransport] = None
+
 # Request/Response Models
 class DemoRequest(BaseModel):
     """Request model for demo execution."""
@@ -155,7 +159,7 @@ async def run_demo(request: DemoRequest) -> DemoResponse:
     start_time = datetime.now()
     phases = {}
     
-    async with httpx.AsyncClient(timeout=30.0) as http_client:
+    async with httpx.AsyncClient(timeout=30.0, transport=AGENT_TRANSPORT) as http_client:
         
         # Phase 1: Agent Health Checks
         logger.info("🔍 Phase 1: Agent Health Checks")
@@ -26,17 +26,24 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Agent URLs - using direct REST endpoints
+# Agent URLs - using direct REST endpoints (override with <AGENT>_URL, e.g. for stubs/)
 AGENT_URLS = {
-    "orca": "http://orca:8080",      # Decision Engine
-    "opal": "http://opal:8084",      # Consumer Wallet
-    "olive": "http://olive:8087",    # Incentives & Policies
-    "okra": "http://okra:8083",      # BNPL & Credit
-    "onyx": "http://onyx:8086",      # KYB & Trust
-    "weave": "http://weave:8082",    # Processor Auction
-    "orion": "http://orion:8081",    # Event Bus & Optimization
+    "orca": os.getenv("ORCA_URL", "http://orca:8080"),      # Decision Engine
+    "opal": os.getenv("OPAL_URL", "http://opal:8084"),      # Consumer Wallet
+    "olive": os.getenv("OLIVE_URL", "http://olive:8087"),    # Incentives & Policies
+    "okra": os.getenv("OKRA_URL", "http://okra:8083"),      # BNPL & Credit
+    "onyx": os.getenv("ONYX_URL", "http://onyx:8086"),      # KYB & Trust
+    "weave": os.getenv("WEAVE_URL", "http://weave:8082"),    # Processor Auction
+    "orion": os.getenv("ORION_URL", "http://orion:8081"),    # Event Bus & Optimization
 }
 
+# Transport for agent calls; None uses the network. Benchmarks swap in an
+# httpx.ASGITransport so the orchestration runs in-process against stubs/.
+AGENT_TRANSPORT: Optional[httpx.AsyncBaseTransport] = None
+
+# Sample data root (override with SAMPLES_DIR when running outside the container)
+SAMPLES_DIR = os.getenv("SAMPLES_DIR", "/app/samples")
+
 # Request/Response Models
 class CartRequest(BaseModel):
     """Request model for cart processing."""
@@ -172,7 +179,7 @@ async def run_demo1(request: CartRequest) -> CartResponse:
     logger.info(f"Starting Demo 1 for cart {request.cart_id} with trace {trace_id}")
     
     # Load cart data
-    samples_dir = "/app/samples/demo1_oxfords"
+    samples_dir = f"{SAMPLES_DIR}/demo1_oxfords"
     with open(f"{samples_dir}/cart.json", "r") as f:
         cart_data = json.load(f)
     
@@ -188,7 +195,7 @@ async def run_demo1(request: CartRequest) -> CartResponse:
         "phase4": {}
     }
     
-    async with httpx.AsyncClient(timeout=30.0) as http_client:
+    async with httpx.AsyncClient(timeout=30.0, transport=AGENT_TRANSPORT) as http_client:
         
         # Phase 1: Agent Health Checks and Initial Processing
         
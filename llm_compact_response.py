@@ -0,0 +1,320 @@
+"""
+Memory-Compact Parsed Agent Responses
+
+ParsedAgentResponse used to keep a full raw response, an ISO timestamp string
+and two feature dicts per instance, which dominates memory across long
+sessions and batch jobs. This module stores the same information compactly:
+
+- ML features live in a fixed-layout array('d') per agent schema (the
+  layout comes from the extraction specs), with bitmasks for which slots are
+  present and which hold ints; anything outside the layout goes to a small
+  extras dict
+- extracted feature keys are interned and shared as one key tuple per
+  distinct key set, values are a tuple
+- the timestamp is epoch seconds
+- raw responses are held once per content hash, encoded, in a shared,
+  reference counted RawResponseStore (raw_response decodes a fresh copy)
+
+The attributes of the old dataclass are still available; ml_ready_data and
+extracted_features are read-only Mapping views built on access.
+"""
+
+import hashlib
+import marshal
+import pickle
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from llm_extraction_spec import EXTRACTION_SPECS
+
+# ML features every agent produces, first in every layout
+COMMON_ML_FEATURES = ("response_confidence", "response_completeness")
+
+
+class FeatureLayout:
+    """Fixed slot order of an agent's ML features."""
+
+    __slots__ = ("names", "index")
+
+    def __init__(self, names: Tuple[str, ...]):
+        self.names = tuple(sys.intern(name) for name in names)
+        self.index = {name: slot for slot, name in enumerate(self.names)}
+
+
+def _build_layouts() -> Dict[str, FeatureLayout]:
+    layouts = {}
+    for agent_name, spec in EXTRACTION_SPECS.items():
+        names = list(COMMON_ML_FEATURES)
+        for name in list(spec.get("ml_features", {})) + list(spec.get("fallback", {}).get("ml_features", {})):
+            if name not in names:
+                names.append(name)
+        layouts[agent_name] = FeatureLayout(tuple(names))
+    return layouts
+
+
+_LAYOUTS: Dict[str, FeatureLayout] = _build_layouts()
+_GENERIC_LAYOUT = FeatureLayout(COMMON_ML_FEATURES)
+
+
+def get_feature_layout(agent_name: str) -> FeatureLayout:
+    """ML feature layout for an agent; unknown agents get the common features only."""
+    return _LAYOUTS.get(agent_name, _GENERIC_LAYOUT)
+
+
+# One shared, interned key tuple per distinct extracted-feature key set
+_KEY_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_keys(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    shared = _KEY_TUPLES.get(keys)
+    if shared is None:
+        shared = tuple(sys.intern(key) if isinstance(key, str) else key for key in keys)
+        _KEY_TUPLES[shared] = shared
+    return shared
+
+
+class RawResponseStore:
+    """Deduplicated raw responses keyed by content hash, freed when no response refers to them."""
+
+    def __init__(self):
+        self._entries: Dict[bytes, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, response: Dict[str, Any]) -> bytes:
+        """
+        Store a response (or reuse an identical one) and take a reference.
+
+        Args:
+            response: Raw agent response
+
+        Returns:
+            Content hash to pass to get() and release()
+        """
+        try:
+            # marshal version 2 writes no back-references, so equal documents give equal bytes
+            encoded = marshal.dumps(response, 2)
+            key = hashlib.blake2b(encoded, digest_size=16).digest()
+            decode = marshal.loads
+        except ValueError:
+            # Hash the pickle itself: it records each value's type, so Decimal('10.5') and '10.5' differ
+            encoded = pickle.dumps(response, pickle.HIGHEST_PROTOCOL)
+            key = hashlib.blake2b(encoded, digest_size=16, person=b"pickle").digest()
+            decode = pickle.loads
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Kept encoded, never as the caller's dict, so later changes to it can't leak into the store
+                self._entries[key] = [encoded, decode, 1]
+            else:
+                entry[2] += 1
+        return key
+
+    def get(self, key: bytes) -> Dict[str, Any]:
+        """Fresh copy of the stored response for a content hash."""
+        encoded, decode, _ = self._entries[key]
+        return decode(encoded)
+
+    def release(self, key: bytes):
+        """Drop a reference, removing the response when it was the last one."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[2] -= 1
+                if entry[2] <= 0:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Distinct stored responses and total references."""
+        with self._lock:
+            return {"responses": len(self._entries), "references": sum(entry[2] for entry in self._entries.values())}
+
+
+RAW_RESPONSE_STORE = RawResponseStore()
+
+
+class MLFeatureView(Mapping):
+    """Read-only dict view over an array-backed ML feature row."""
+
+    __slots__ = ("_layout", "_values", "_present", "_ints", "_extras")
+
+    def __init__(self, layout: FeatureLayout, values: array, present: int, ints: int,
+                 extras: Optional[Dict[str, Any]]):
+        self._layout = layout
+        self._values = values
+        self._present = present
+        self._ints = ints
+        self._extras = extras
+
+    def __getitem__(self, key: str) -> Any:
+        slot = self._layout.index.get(key)
+        if slot is not None and self._present >> slot & 1:
+            value = self._values[slot]
+            return int(value) if self._ints >> slot & 1 else value
+        if self._extras is not None and key in self._extras:
+            return self._extras[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        present = self._present
+        for slot, name in enumerate(self._layout.names):
+            if present >> slot & 1:
+                yield name
+        if self._extras is not None:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        return bin(self._present).count("1") + (len(self._extras) if self._extras is not None else 0)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class ExtractedFeatureView(Mapping):
+    """Read-only dict view over shared keys and a values tuple."""
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: Tuple[str, ...], values: Tuple[Any, ...]):
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return repr(dict(zip(self._keys, self._values)))
+
+
+class ParsedAgentResponse:
+    """Structured representation of parsed agent response."""
+
+    __slots__ = ("agent_name", "response_type", "confidence_score", "created_at", "_store", "_raw_key",
+                 "_feature_keys", "_feature_values", "_ml_values", "_ml_present", "_ml_ints", "_ml_extras")
+
+    def __init__(self, agent_name: str, response_type: str, extracted_features: Dict[str, Any],
+                 confidence_score: float, raw_response: Dict[str, Any], timestamp: Any = None,
+                 ml_ready_data: Optional[Dict[str, Any]] = None, store: Optional[RawResponseStore] = None):
+        """
+        Initialize the response.
+
+        Args:
+            agent_name: Agent the response came from
+            response_type: Parsed response type
+            extracted_features: Features extracted from the response
+            confidence_score: Parse confidence
+            raw_response: Raw agent response (stored once per content in the shared store)
+            timestamp: ISO-8601 string, datetime or epoch seconds (defaults to now)
+            ml_ready_data: ML features for the agent
+            store: Raw response store (defaults to RAW_RESPONSE_STORE)
+        """
+        self.agent_name = sys.intern(agent_name)
+        self.response_type = sys.intern(response_type) if isinstance(response_type, str) else response_type
+        self.confidence_score = confidence_score
+        self._store = store or RAW_RESPONSE_STORE
+        self._raw_key = None
+        self.raw_response = raw_response
+        self.timestamp = timestamp
+        self.extracted_features = extracted_features
+        self.ml_ready_data = ml_ready_data or {}
+
+    def __del__(self):
+        if getattr(self, "_raw_key", None) is not None:
+            self._store.release(self._raw_key)
+
+    @property
+    def raw_response(self) -> Dict[str, Any]:
+        return self._store.get(self._raw_key)
+
+    @raw_response.setter
+    def raw_response(self, response: Dict[str, Any]):
+        previous = self._raw_key
+        self._raw_key = self._store.acquire(response)
+        if previous is not None:
+            self._store.release(previous)
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created_at).isoformat()
+
+    @timestamp.setter
+    def timestamp(self, timestamp: Any):
+        if isinstance(timestamp, (int, float)):
+            self.created_at = float(timestamp)
+        elif isinstance(timestamp, str):
+            self.created_at = datetime.fromisoformat(timestamp).timestamp()
+        elif isinstance(timestamp, datetime):
+            self.created_at = timestamp.timestamp()
+        else:
+            self.created_at = time.time()
+
+    @property
+    def extracted_features(self) -> ExtractedFeatureView:
+        return ExtractedFeatureView(self._feature_keys, self._feature_values)
+
+    @extracted_features.setter
+    def extracted_features(self, features: Dict[str, Any]):
+        self._feature_keys = _intern_keys(tuple(features))
+        self._feature_values = tuple(features.values())
+
+    @property
+    def ml_ready_data(self) -> MLFeatureView:
+        return MLFeatureView(get_feature_layout(self.agent_name), self._ml_values, self._ml_present,
+                             self._ml_ints, self._ml_extras)
+
+    @ml_ready_data.setter
+    def ml_ready_data(self, features: Dict[str, Any]):
+        layout = get_feature_layout(self.agent_name)
+        values = array("d", bytes(8 * len(layout.names)))
+        present = ints = 0
+        extras = None
+        for name, value in features.items():
+            slot = layout.index.get(name)
+            value_type = value.__class__
+            if slot is not None and (value_type is float or value_type is int):
+                values[slot] = value
+                present |= 1 << slot
+                if value_type is int:
+                    ints |= 1 << slot
+            else:
+                if extras is None:
+                    extras = {}
+                extras[sys.intern(name)] = value
+        self._ml_values = values
+        self._ml_present = present
+        self._ml_ints = ints
+        self._ml_extras = extras
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ParsedAgentResponse):
+            return NotImplemented
+        return (self.agent_name == other.agent_name and self.response_type == other.response_type
+                and self.confidence_score == other.confidence_score and self.created_at == other.created_at
+                and self._raw_key == other._raw_key and self.extracted_features == other.extracted_features
+                and self.ml_ready_data == other.ml_ready_data)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (ParsedAgentResponse, (self.agent_name, self.response_type, dict(self.extracted_features),
+                                      self.confidence_score, self.raw_response, self.created_at,
+                                      dict(self.ml_ready_data)))
+
+    def __repr__(self) -> str:
+        return (f"ParsedAgentResponse(agent_name={self.agent_name!r}, response_type={self.response_type!r}, "
+                f"extracted_features={self.extracted_features!r}, confidence_score={self.confidence_score!r}, "
+                f"raw_response={self.raw_response!r}, timestamp={self.timestamp!r}, "
+                f"ml_ready_data={self.ml_ready_data!r})")
@@ -0,0 +1,340 @@
+"""
+Declarative Extraction Specs for Agent Responses
+
+Describes, per agent, which response fields feed the ML features and how,
+and compiles each description into plain Python functions once at import.
+LLMResponseParser uses the compiled specs to:
+
+- extract fields straight from a raw response; if every required field is
+  present with the right type the LLM is skipped entirely, otherwise it is
+  asked only for the missing fields
+- derive ml_ready_data from parsed features (_extract_ml_features)
+- build the rule-based fallback parse (_fallback_parsing)
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from spec_compiler import compile_function
+
+# Confidence reported for responses extracted without the LLM
+SPEC_CONFIDENCE = 0.9
+
+# Field specs: feature name -> raw keys to read (first match wins), expected
+# type, and whether the field is needed for the fast path.
+# ML feature specs: feature name -> parsed feature it reads (or raw keys, for
+# signals read straight from the response), default and transform.
+EXTRACTION_SPECS: Dict[str, Dict[str, Any]] = {
+    "okra": {
+        "fields": {
+            "approved": {"from": ["approved"], "type": "bool"},
+            "credit_limit": {"from": ["credit_limit"], "type": "number"},
+            "risk_score": {"from": ["risk_score"], "type": "risk"},
+        },
+        "ml_features": {
+            "approval_probability": {"field": "approved", "transform": "flag"},
+            "credit_risk_score": {"field": "risk_score", "default": 0.5, "transform": "risk"},
+            "credit_limit_ratio": {"field": "credit_limit", "default": 0, "transform": "ratio_capped", "scale": 10000.0},
+        },
+        "fallback": {
+            "fields": {
+                "approved": {"from": ["approved"], "default": False},
+                "credit_limit": {"from": ["credit_limit"], "default": 0},
+            },
+            "ml_features": {
+                "approval_probability": {"field": "approved", "transform": "flag"},
+            },
+        },
+    },
+    "onyx": {
+        "fields": {
+            "trust_score": {"from": ["trust_score"], "type": "number"},
+            "compliance_status": {"from": ["compliance_status"], "type": "status"},
+        },
+        "ml_features": {
+            "trust_score": {"field": "trust_score", "default": 0.5},
+            "compliance_risk": {"field": "compliance_status", "default": 0.5, "transform": "compliance_risk"},
+            "sanctions_risk": {"transform": "sanctions", "raw": ["sanctions_check", "sanctions_flags", "sanctions_flag"]},
+        },
+        "fallback": {
+            "fields": {
+                "trust_score": {"from": ["trust_score"], "default": 0.5},
+            },
+            "ml_features": {
+                "trust_score": {"field": "trust_score"},
+            },
+        },
+    },
+    "opal": {
+        "fields": {
+            "payment_methods": {"from": ["payment_methods"], "type": "list"},
+            "avg_fee": {"from": ["avg_fee"], "type": "number"},
+            "security_score": {"from": ["security_score"], "type": "number"},
+        },
+        "ml_features": {
+            "payment_method_count": {"field": "payment_methods", "default": [], "transform": "count"},
+            "avg_processing_fee": {"field": "avg_fee", "default": 0.03},
+            "security_score": {"field": "security_score", "default": 0.8},
+        },
+        "fallback": {
+            "fields": {
+                "payment_methods": {"from": ["payment_methods"], "default": []},
+            },
+            "ml_features": {
+                "payment_method_count": {"field": "payment_methods", "transform": "count"},
+            },
+        },
+    },
+    "orca": {
+        "fields": {
+            "optimal_rail": {"from": ["optimal_rail", "chosen_rail"], "type": "str", "required": False},
+            "confidence": {"from": ["confidence"], "type": "number"},
+            "cost_score": {"from": ["cost_score"], "type": "number"},
+            "efficiency_score": {"from": ["efficiency_score"], "type": "number"},
+        },
+        "ml_features": {
+            "decision_confidence": {"field": "confidence", "default": 0.5},
+            "cost_optimization": {"field": "cost_score", "default": 0.5, "transform": "complement_capped"},
+            "rail_efficiency": {"field": "efficiency_score", "default": 0.7},
+        },
+        "fallback": {
+            "fields": {
+                "optimal_rail": {"from": ["chosen_rail"], "default": "Card"},
+                "confidence": {"from": ["confidence"], "default": 0.5},
+            },
+            "ml_features": {
+                "decision_confidence": {"field": "confidence"},
+            },
+        },
+    },
+    "olive": {
+        "fields": {
+            "loyalty_tier": {"from": ["loyalty_tier"], "type": "str"},
+            "total_discount": {"from": ["total_discount"], "type": "number"},
+            "retention_score": {"from": ["retention_score"], "type": "number"},
+        },
+        "ml_features": {
+            "loyalty_tier_score": {"field": "loyalty_tier", "default": "bronze", "transform": "tier"},
+            "incentive_value": {"field": "total_discount", "default": 0, "transform": "divide", "scale": 100.0},
+            "retention_probability": {"field": "retention_score", "default": 0.6},
+        },
+        "fallback": {
+            "fields": {
+                "incentives": {"from": ["incentives"], "default": []},
+            },
+            "ml_features": {
+                "incentive_value": {"field": "incentives", "transform": "count_scaled", "scale": 0.1},
+            },
+        },
+    },
+    "weave": {
+        "fields": {
+            "auction_success": {"from": ["auction_success"], "type": "number"},
+            "cost_savings": {"from": ["cost_savings"], "type": "number"},
+            "performance_score": {"from": ["performance_score"], "type": "number"},
+        },
+        "ml_features": {
+            "auction_efficiency": {"field": "auction_success", "default": 0.8},
+            "cost_savings": {"field": "cost_savings", "default": 0.05},
+            "processor_performance": {"field": "performance_score", "default": 0.7},
+        },
+        "fallback": {
+            "fields": {
+                "auction_results": {"from": ["candidate_scores"], "default": []},
+            },
+            "ml_features": {
+                "auction_efficiency": {"field": "auction_results", "transform": "nonempty", "then": 0.8, "else": 0.3},
+            },
+        },
+    },
+}
+
+
+def normalize_risk_score(risk_score: Any) -> float:
+    """Normalize risk score to 0-1 range."""
+    if isinstance(risk_score, (int, float)):
+        return min(max(risk_score, 0.0), 1.0)
+    elif isinstance(risk_score, str):
+        risk_lower = risk_score.lower()
+        if "low" in risk_lower:
+            return 0.2
+        elif "medium" in risk_lower:
+            return 0.5
+        elif "high" in risk_lower:
+            return 0.8
+    return 0.5
+
+
+def normalize_compliance_status(status: Any) -> float:
+    """Map a compliance status (score or label) to 0-1, 1 being fully compliant."""
+    if isinstance(status, (int, float)):
+        return min(max(status, 0.0), 1.0)
+    elif isinstance(status, str):
+        status_lower = status.lower()
+        if status_lower in ("verified", "compliant", "approved", "passed", "clear"):
+            return 1.0
+        elif status_lower in ("rejected", "failed", "non_compliant", "blocked", "denied"):
+            return 0.0
+    return 0.5
+
+
+def sanctions_risk(response: Dict[str, Any], keys: Tuple[str, ...]) -> float:
+    """1.0 if any sanctions key in the raw response reports a hit, else 0.0."""
+    for key in keys:
+        value = response.get(key)
+        if isinstance(value, str):
+            if value.lower() not in ("", "clear", "cleared", "passed", "pass", "none", "no_match", "ok"):
+                return 1.0
+        elif value:
+            return 1.0
+    return 0.0
+
+
+def map_loyalty_tier(tier: str) -> float:
+    """Map loyalty tier to numerical score."""
+    tier_mapping = {
+        "bronze": 0.3,
+        "silver": 0.5,
+        "gold": 0.7,
+        "platinum": 0.9,
+        "diamond": 1.0
+    }
+    return tier_mapping.get(tier.lower(), 0.3)
+
+
+# Expression templates for ML feature transforms; {v} is the feature value
+_TRANSFORMS = {
+    "identity": "{v}",
+    "flag": "(1.0 if {v} else 0.0)",
+    "risk": "_normalize_risk_score({v})",
+    "tier": "_map_loyalty_tier({v})",
+    "compliance_risk": "1.0 - _normalize_compliance_status({v})",
+    "complement_capped": "1.0 - min({v}, 1.0)",
+    "divide": "{v} / {scale!r}",
+    "ratio_capped": "min({v} / {scale!r}, 1.0)",
+    "count": "len({v})",
+    "count_scaled": "len({v}) * {scale!r}",
+    "nonempty": "({then!r} if {v} else {else_!r})",
+    "sanctions": "_sanctions_risk(r, {raw!r})",
+}
+
+# Type checks a raw value must pass to count as present; {v} is the value
+_TYPE_CHECKS = {
+    "bool": "{v}.__class__ is bool",
+    "number": "({v}.__class__ is int or {v}.__class__ is float)",
+    "risk": "({v}.__class__ is int or {v}.__class__ is float or {v}.__class__ is str)",
+    "status": "({v}.__class__ is int or {v}.__class__ is float or {v}.__class__ is str)",
+    "str": "{v}.__class__ is str",
+    "list": "{v}.__class__ is list",
+}
+
+_MISSING = object()
+
+_GLOBALS = {
+    "_normalize_risk_score": normalize_risk_score,
+    "_map_loyalty_tier": map_loyalty_tier,
+    "_normalize_compliance_status": normalize_compliance_status,
+    "_sanctions_risk": sanctions_risk,
+    "_MISSING": _MISSING,
+}
+
+
+def _ml_expression(spec: Dict[str, Any]) -> str:
+    field = spec.get("field")
+    if field is None:
+        value = "None"
+    elif "default" in spec:
+        value = f"f.get({field!r}, {spec['default']!r})"
+    else:
+        value = f"f.get({field!r})"
+    return _TRANSFORMS[spec.get("transform", "identity")].format(
+        v=value, scale=spec.get("scale"), then=spec.get("then"), else_=spec.get("else"),
+        raw=tuple(spec.get("raw", ())),
+    )
+
+
+class CompiledExtractionSpec:
+    """
+    Generated accessor functions for one agent's spec.
+
+    Attributes:
+        extract: raw response -> (features present, names of missing required fields)
+        ml_features: (parsed features, confidence, raw response) -> ml_ready_data
+        fallback: raw response -> (features, ml_ready_data) for rule-based parsing
+    """
+
+    def __init__(self, agent_name: str, spec: Dict[str, Any]):
+        self.agent_name = agent_name
+        self.fields: Dict[str, Dict[str, Any]] = spec.get("fields", {})
+        self.required_fields = [name for name, field in self.fields.items() if field.get("required", True)]
+        self.extract: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], List[str]]] = self._compile_extract()
+        self.ml_features: Callable[[Dict[str, Any], Any, Dict[str, Any]], Dict[str, Any]] = self._compile_ml_features(
+            spec.get("ml_features", {}))
+        self.fallback: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], Dict[str, Any]]] = self._compile_fallback(
+            spec.get("fallback", {}))
+
+    def _compile_extract(self) -> Callable:
+        lines = ["def extract(r):", "    features = {}", "    missing = []"]
+        for name, field in self.fields.items():
+            check = _TYPE_CHECKS[field.get("type", "number")].format(v="v")
+            sources = field["from"]
+            lines.append(f"    v = r.get({sources[0]!r}, _MISSING)")
+            for source in sources[1:]:
+                lines.append(f"    if not ({check}):")
+                lines.append(f"        v = r.get({source!r}, _MISSING)")
+            lines.append(f"    if {check}:")
+            lines.append(f"        features[{name!r}] = v")
+            if field.get("required", True):
+                lines.append("    else:")
+                lines.append(f"        missing.append({name!r})")
+        lines.append("    return features, missing")
+        return compile_function("extract", lines, _GLOBALS, "extraction spec")
+
+    def _compile_ml_features(self, ml_specs: Dict[str, Dict[str, Any]]) -> Callable:
+        lines = [
+            "def ml_features(f, confidence, r):",
+            "    return {",
+            "        'response_confidence': confidence,",
+            "        'response_completeness': len(f) / 5.0,",
+        ]
+        for name, spec in ml_specs.items():
+            lines.append(f"        {name!r}: {_ml_expression(spec)},")
+        lines.append("    }")
+        return compile_function("ml_features", lines, _GLOBALS, "extraction spec")
+
+    def _compile_fallback(self, fallback: Dict[str, Any]) -> Callable:
+        lines = ["def fallback(r):", "    f = {"]
+        for name, field in fallback.get("fields", {}).items():
+            lines.append(f"        {name!r}: r.get({field['from'][0]!r}, {field.get('default')!r}),")
+        lines.append("    }")
+        lines.append("    ml = {'response_confidence': 0.3, 'response_completeness': 0.5}")
+        for name, spec in fallback.get("ml_features", {}).items():
+            lines.append(f"    ml[{name!r}] = {_ml_expression(spec)}")
+        lines.append("    return f, ml")
+        return compile_function("fallback", lines, _GLOBALS, "extraction spec")
+
+    def parsed_data(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM-shaped parse result for a response the spec fully covers."""
+        return {
+            "response_type": "spec_extracted",
+            "features": features,
+            "confidence_score": SPEC_CONFIDENCE,
+            "ml_features": {},
+            "insights": [],
+            "risk_indicators": [],
+        }
+
+
+_compiled_specs: Dict[str, CompiledExtractionSpec] = {
+    agent_name: CompiledExtractionSpec(agent_name, spec) for agent_name, spec in EXTRACTION_SPECS.items()
+}
+_generic_spec = CompiledExtractionSpec("generic", {})
+
+
+def get_extraction_spec(agent_name: str) -> Optional[CompiledExtractionSpec]:
+    """Compiled spec for an agent, or None if the agent has no spec."""
+    return _compiled_specs.get(agent_name)
+
+
+def get_ml_feature_spec(agent_name: str) -> CompiledExtractionSpec:
+    """Compiled spec for ML feature derivation; unknown agents get common features only."""
+    return _compiled_specs.get(agent_name, _generic_spec)
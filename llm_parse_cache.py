@@ -0,0 +1,63 @@
+"""
+Content-Addressed Cache for LLM Parse Results
+
+Caches the LLM's structured output for an agent response, keyed by a hash of
+the agent name, the model, the prompt version and the canonical JSON of the
+response. Identical responses seen again (same cart replayed, same KYB
+record, retries) skip the LLM round trip entirely.
+
+Two tiers (see two_tier_cache):
+- an in-memory LRU bounded by entry count
+- an optional SQLite file bounded by total stored bytes, evicting the least
+  recently used rows first, so hits survive restarts and are shared between
+  processes on the same host
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from two_tier_cache import TwoTierCache, canonical_json
+
+
+def make_cache_key(agent_name: str, model: str, response: Dict[str, Any], prompt_version: str = "") -> str:
+    """
+    Content address of an agent response.
+
+    Args:
+        agent_name: Name of the agent the response came from
+        model: LLM model used for parsing
+        response: Raw agent response
+        prompt_version: Identifies the prompt and extraction spec the parse was
+            produced with, so results from an older prompt are not reused
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(agent_name.encode())
+    digest.update(b"\0")
+    digest.update(model.encode())
+    digest.update(b"\0")
+    digest.update(prompt_version.encode())
+    digest.update(b"\0")
+    digest.update(canonical_json(response).encode())
+    return digest.hexdigest()
+
+
+class ParseCache(TwoTierCache):
+    """Two-tier (memory LRU + SQLite) cache of LLM parse results."""
+
+    table = "parse_cache"
+    tier = "disk"
+
+    def __init__(self, max_memory_entries: int = 1024, db_path: Optional[str] = None,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_memory_entries: Entries kept in the in-memory LRU
+            db_path: SQLite file for the persistent tier (None for memory only)
+            max_disk_bytes: Total size of stored values before LRU eviction
+        """
+        super().__init__(max_memory_entries, db_path, max_disk_bytes=max_disk_bytes)
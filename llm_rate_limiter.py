@@ -0,0 +1,364 @@
+"""
+Client-Side Rate Limiting and Retry Scheduling for LLM Calls
+
+Keeps LLM parsing under the provider's limits instead of discovering them
+through 429s:
+
+- two token buckets, requests per minute and tokens per minute, shared by
+  every parser (and thread, and event loop) that uses the same limiter
+- a priority queue in front of the buckets, so interactive parses are
+  admitted ahead of batch backfills; equal priorities are served in order
+- a global pause when the provider answers 429, honoring Retry-After
+- retry delays with exponential backoff and jitter, never shorter than
+  Retry-After
+
+Blocking callers use acquire(); coroutines use acquire_async(). Both wait in
+the same queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# Lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Status codes worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds to wait from Retry-After (seconds or HTTP date) or retry-after-ms.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Seconds to wait, or None if the response gave no hint
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per period."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        """
+        Initialize the bucket full.
+
+        Args:
+            capacity: Tokens available per period (and the burst size)
+            period: Refill period in seconds
+        """
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount (capped at capacity) is available; 0 if it is now."""
+        needed = min(amount, self.capacity) - self.tokens
+        return needed / self.rate if needed > 0 else 0.0
+
+    def consume(self, amount: float):
+        # May go negative for requests larger than the bucket; later callers wait it off
+        self.tokens -= amount
+
+
+class _Waiter:
+    """Queue entry for one acquire call."""
+
+    __slots__ = ("priority", "sequence", "tokens", "event", "loop", "future")
+
+    def __init__(self, priority: int, sequence: int, tokens: float):
+        self.priority = priority
+        self.sequence = sequence
+        self.tokens = tokens
+        self.event: Optional[threading.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class LLMRateLimiter:
+    """Shared requests/tokens per minute limiter with priorities and retry scheduling."""
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200_000,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request budget per minute
+            tokens_per_minute: Token budget per minute (prompt plus completion)
+            max_retries: Retries after the first attempt of a call
+            base_delay: First backoff delay in seconds
+            max_delay: Largest backoff delay in seconds (Retry-After may exceed it)
+            rng: Random source for jitter
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._stats = {"admitted": 0, "waited": 0, "wait_seconds": 0.0, "throttled": 0, "retries": 0}
+
+    # Admission
+
+    def acquire(self, tokens: float = 0, priority: int = PRIORITY_INTERACTIVE,
+                timeout: Optional[float] = None) -> bool:
+        """
+        Block until one request using the given tokens may be sent.
+
+        Args:
+            tokens: Estimated tokens for the request
+            priority: PRIORITY_INTERACTIVE, PRIORITY_BATCH or any int (lower first)
+            timeout: Give up after this many seconds
+
+        Returns:
+            True if admitted, False on timeout
+        """
+        waiter = self._enqueue(tokens, priority)
+        waiter.event = threading.Event()
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        admitted = False
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_admit(waiter)
+                    if delay is None:
+                        admitted = True
+                        self._record_wait(time.monotonic() - start)
+                        return True
+                    waiter.event.clear()
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    delay = remaining if delay is None else min(delay, remaining)
+                waiter.event.wait(delay)
+        finally:
+            if not admitted:
+                self._dequeue(waiter)
+
+    async def acquire_async(self, tokens: float = 0, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """
+        Wait without blocking the event loop until a request may be sent.
+
+        Args:
+            tokens: Estimated tokens for the request
+            priority: PRIORITY_INTERACTIVE, PRIORITY_BATCH or any int (lower first)
+
+        Returns:
+            True once admitted (cancel the awaiting task to give up)
+        """
+        waiter = self._enqueue(tokens, priority)
+        waiter.loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        admitted = False
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_admit(waiter)
+                    if delay is None:
+                        admitted = True
+                        self._record_wait(time.monotonic() - start)
+                        return True
+                    waiter.future = waiter.loop.create_future()
+                try:
+                    await asyncio.wait_for(waiter.future, delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if not admitted:
+                self._dequeue(waiter)
+
+    def _enqueue(self, tokens: float, priority: int) -> _Waiter:
+        waiter = _Waiter(priority, next(self._sequence), tokens)
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter):
+        """Remove a waiter that gave up and let the next one in line re-check."""
+        with self._lock:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            self._wake_head()
+
+    def _try_admit(self, waiter: _Waiter) -> Optional[float]:
+        """
+        Admit the waiter if it is first in line and the buckets allow it.
+
+        Returns:
+            None when admitted, otherwise seconds to wait before re-checking;
+            waiters behind the head are woken when it leaves, and re-check
+            at least every second regardless
+        """
+        if self._queue[0] is not waiter:
+            return 1.0
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        delay = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+        if delay > 0:
+            return delay
+        self.requests.consume(1)
+        self.tokens.consume(waiter.tokens)
+        heapq.heappop(self._queue)
+        self._wake_head()
+        return None
+
+    def _wake_head(self):
+        if self._queue:
+            self._queue[0].wake()
+
+    def _record_wait(self, waited: float):
+        self._stats["admitted"] += 1
+        if waited > 0.001:
+            self._stats["waited"] += 1
+            self._stats["wait_seconds"] += waited
+
+    # Feedback from responses
+
+    def record_usage(self, reserved_tokens: float, actual_tokens: Optional[float]):
+        """
+        Correct the token bucket once the real usage is known.
+
+        Args:
+            reserved_tokens: Tokens passed to acquire
+            actual_tokens: usage.total_tokens from the response (None to keep the estimate)
+        """
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + reserved_tokens - actual_tokens)
+            self._wake_head()
+
+    def throttled(self, retry_after: Optional[float], attempt: int) -> float:
+        """
+        Pause all admissions after a 429.
+
+        Args:
+            retry_after: Seconds from the response's Retry-After, if any
+            attempt: Zero-based attempt number of the throttled call
+
+        Returns:
+            Seconds admissions are paused for
+        """
+        delay = self.retry_delay(attempt, retry_after)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._stats["throttled"] += 1
+        return delay
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Backoff before retry number attempt + 1.
+
+        Exponential in the attempt with jitter over the upper half of the
+        window, capped at max_delay, and never shorter than Retry-After.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = self._rng.uniform(ceiling / 2, ceiling)
+        with self._lock:
+            self._stats["retries"] += 1
+        return max(delay, retry_after or 0.0)
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether attempt (zero-based) may be followed by another."""
+        return attempt < self.max_retries
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Admission and retry counters.
+
+        Returns:
+            Dictionary with admitted, waited, wait_seconds, throttled, retries and queued
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+            return stats
+
+
+_shared_limiters: Dict[str, LLMRateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(endpoint: str,
+                            factory: Optional[Callable[[], LLMRateLimiter]] = None) -> LLMRateLimiter:
+    """
+    Process-wide limiter for an LLM endpoint.
+
+    Limits default to LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE.
+
+    Args:
+        endpoint: Endpoint URL the limits apply to
+        factory: Builds the limiter on first use (overrides the environment)
+
+    Returns:
+        The limiter every parser for this endpoint shares
+    """
+    with _shared_lock:
+        limiter = _shared_limiters.get(endpoint)
+        if limiter is None:
+            if factory is not None:
+                limiter = factory()
+            else:
+                limiter = LLMRateLimiter(
+                    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")),
+                    tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000")),
+                )
+            _shared_limiters[endpoint] = limiter
+        return limiter
@@ -5,119 +5,90 @@ This module uses LLM to parse agent responses and extract structured data
 that can be fed into ML models for enhanced decision making.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
-from datetime import datetime
+import os
+import time
+from collections import deque
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, Callable, Deque, Iterable, List, Optional, Tuple, Union
+import httpx
 import requests
 
+from llm_compact_response import ParsedAgentResponse
+from llm_extraction_spec import EXTRACTION_SPECS, get_extraction_spec, get_ml_feature_spec, map_loyalty_tier, normalize_risk_score
+from llm_parse_cache import ParseCache, canonical_json, make_cache_key
+from llm_rate_limiter import (
+    PRIORITY_INTERACTIVE, RETRYABLE_STATUS_CODES, LLMRateLimiter, get_shared_rate_limiter, parse_retry_after,
+)
+from llm_stream_parser import SSE_DONE, IncrementalJSONParser, iter_sse_content, parse_sse_line
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
-class ParsedAgentResponse:
-    """Structured representation of parsed agent response."""
-    agent_name: str
-    response_type: str
-    extracted_features: Dict[str, Any]
-    confidence_score: float
-    raw_response: Dict[str, Any]
-    timestamp: str
-    ml_ready_data: Dict[str, Any]
+# Per-agent parsing schemas. context_fields are extra raw keys the ML feature
+# extraction reads; they are kept when the response is pruned for the prompt.
+AGENT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "okra": {
+        "description": "Credit assessment agent",
+        "key_fields": ["approved", "credit_limit", "apr", "risk_score", "reasons"],
+        "ml_features": ["approval_probability", "risk_level", "credit_worthiness"],
+        "context_fields": ["decision", "limit", "score"],
+    },
+    "onyx": {
+        "description": "Trust and compliance agent", 
+        "key_fields": ["trust_score", "compliance_status", "risk_factors", "sanctions_check"],
+        "ml_features": ["trust_level", "compliance_risk", "sanctions_risk"],
+        "context_fields": ["status", "verification_status", "sanctions_flags", "checks"],
+    },
+    "opal": {
+        "description": "Wallet and payment method agent",
+        "key_fields": ["payment_methods", "fees", "processing_time", "security_features"],
+        "ml_features": ["method_preference", "cost_efficiency", "security_score"],
+        "context_fields": ["methods", "avg_fee", "security_score", "selected_method"],
+    },
+    "orca": {
+        "description": "Checkout and decision agent",
+        "key_fields": ["optimal_rail", "confidence", "cost_analysis", "risk_assessment"],
+        "ml_features": ["rail_preference", "decision_confidence", "cost_optimization"],
+        "context_fields": ["chosen_rail", "decision", "cost_score", "efficiency_score", "risk_score", "reasons"],
+    },
+    "olive": {
+        "description": "Loyalty and incentives agent",
+        "key_fields": ["incentives", "loyalty_tier", "discounts", "rewards"],
+        "ml_features": ["loyalty_value", "incentive_attractiveness", "retention_probability"],
+        "context_fields": ["total_discount", "retention_score", "summary"],
+    },
+    "weave": {
+        "description": "Processor and auction agent",
+        "key_fields": ["auction_results", "processor_rankings", "cost_analysis", "performance_metrics"],
+        "ml_features": ["processor_efficiency", "cost_optimization", "performance_score"],
+        "context_fields": ["candidate_scores", "winning_processor", "winning_bid", "auction_success",
+                           "cost_savings", "performance_score"],
+        "max_response_tokens": 1000,
+    },
+}
 
-class LLMResponseParser:
-    """LLM-based parser for agent responses."""
-    
-    def __init__(self, openai_api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
-        self.openai_api_key = openai_api_key
-        self.model = model
-        self.base_url = "https://api.openai.com/v1/chat/completions"
-        
-    def parse_agent_response(self, agent_name: str, response: Dict[str, Any]) -> ParsedAgentResponse:
-        """
-        Parse agent response using LLM to extract structured data.
-        
-        Args:
-            agent_name: Name of the agent (okra, onyx, opal, etc.)
-            response: Raw response from the agent
-            
-        Returns:
-            ParsedAgentResponse with structured data
-        """
-        try:
-            # Create LLM prompt for parsing
-            prompt = self._create_parsing_prompt(agent_name, response)
-            
-            # Call LLM for parsing
-            parsed_data = self._call_llm_for_parsing(prompt)
-            
-            # Extract ML-ready features
-            ml_ready_data = self._extract_ml_features(agent_name, parsed_data, response)
-            
-            return ParsedAgentResponse(
-                agent_name=agent_name,
-                response_type=parsed_data.get("response_type", "unknown"),
-                extracted_features=parsed_data.get("features", {}),
-                confidence_score=parsed_data.get("confidence_score", 0.5),
-                raw_response=response,
-                timestamp=datetime.now().isoformat(),
-                ml_ready_data=ml_ready_data
-            )
-            
-        except Exception as e:
-            logger.error(f"Error parsing {agent_name} response: {e}")
-            # Return fallback parsing
-            return self._fallback_parsing(agent_name, response)
-    
-    def _create_parsing_prompt(self, agent_name: str, response: Dict[str, Any]) -> str:
-        """Create LLM prompt for parsing agent response."""
-        
-        agent_schemas = {
-            "okra": {
-                "description": "Credit assessment agent",
-                "key_fields": ["approved", "credit_limit", "apr", "risk_score", "reasons"],
-                "ml_features": ["approval_probability", "risk_level", "credit_worthiness"]
-            },
-            "onyx": {
-                "description": "Trust and compliance agent", 
-                "key_fields": ["trust_score", "compliance_status", "risk_factors", "sanctions_check"],
-                "ml_features": ["trust_level", "compliance_risk", "sanctions_risk"]
-            },
-            "opal": {
-                "description": "Wallet and payment method agent",
-                "key_fields": ["payment_methods", "fees", "processing_time", "security_features"],
-                "ml_features": ["method_preference", "cost_efficiency", "security_score"]
-            },
-            "orca": {
-                "description": "Checkout and decision agent",
-                "key_fields": ["optimal_rail", "confidence", "cost_analysis", "risk_assessment"],
-                "ml_features": ["rail_preference", "decision_confidence", "cost_optimization"]
-            },
-            "olive": {
-                "description": "Loyalty and incentives agent",
-                "key_fields": ["incentives", "loyalty_tier", "discounts", "rewards"],
-                "ml_features": ["loyalty_value", "incentive_attractiveness", "retention_probability"]
-            },
-            "weave": {
-                "description": "Processor and auction agent",
-                "key_fields": ["auction_results", "processor_rankings", "cost_analysis", "performance_metrics"],
-                "ml_features": ["processor_efficiency", "cost_optimization", "performance_score"]
-            }
-        }
-        
-        schema = agent_schemas.get(agent_name, agent_schemas["orca"])
-        
-        prompt = f"""
+# Tokens of raw response allowed in a prompt unless the schema sets max_response_tokens
+DEFAULT_RESPONSE_TOKEN_BUDGET = 600
+
+# Elements kept from long lists before the response is cut outright
+MIN_LIST_ITEMS = 2
+
+# Scalar keys kept next to matched fields so pruned list entries stay identifiable
+IDENTITY_FIELDS = frozenset(["rail_type", "processor", "processor_id", "method_id", "instrument_id", "id", "name", "type"])
+
+PROMPT_TEMPLATE = """
 You are an expert at parsing payment processing agent responses. Your task is to extract structured data from the {agent_name} agent response.
 
-Agent Description: {schema['description']}
-Key Fields to Extract: {', '.join(schema['key_fields'])}
-ML Features to Generate: {', '.join(schema['ml_features'])}
+Agent Description: {description}
+Key Fields to Extract: {key_fields}
+ML Features to Generate: {ml_features}
 
-Raw Response:
-{json.dumps(response, indent=2)}
+Raw Response (compact JSON, pruned to relevant fields):
+{response}
 
 Please parse this response and return a JSON object with the following structure:
 {{
@@ -145,149 +116,607 @@ Please parse this response and return a JSON object with the following structure
 
 Focus on extracting numerical values that can be used by ML models for decision making.
 """
-        return prompt
+
+# Bump when the prompt encoding or the way results are merged changes in code;
+# changes to the template, schemas or extraction specs are picked up on their own
+PARSE_FORMAT_VERSION = 1
+
+_RESPONSE_MARKER = "\0response\0"
+_compiled_prompts: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[str, str]] = {}
+_prompt_field_sets: Dict[str, frozenset] = {}
+_prompt_versions: Dict[str, str] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for JSON/English)."""
+    return (len(text) + 3) // 4
+
+
+def get_agent_schema(agent_name: str) -> Dict[str, Any]:
+    """Parsing schema for an agent, defaulting to Orca's."""
+    return AGENT_SCHEMAS.get(agent_name, AGENT_SCHEMAS["orca"])
+
+
+def compile_parsing_prompt(agent_name: str, key_fields: Optional[Tuple[str, ...]] = None) -> Tuple[str, str]:
+    """
+    Render the fixed parts of an agent's parsing prompt once.
+
+    Args:
+        agent_name: Agent whose schema to use
+        key_fields: Fields to ask for instead of the schema's key_fields
+
+    Returns:
+        (prefix, suffix) to place around the encoded response
+    """
+    compiled = _compiled_prompts.get((agent_name, key_fields))
+    if compiled is None:
+        schema = get_agent_schema(agent_name)
+        rendered = PROMPT_TEMPLATE.format(
+            agent_name=agent_name,
+            description=schema["description"],
+            key_fields=", ".join(key_fields or schema["key_fields"]),
+            ml_features=", ".join(schema["ml_features"]),
+            response=_RESPONSE_MARKER,
+        )
+        prefix, suffix = rendered.split(_RESPONSE_MARKER)
+        compiled = _compiled_prompts[(agent_name, key_fields)] = (prefix, suffix)
+    return compiled
+
+
+def get_prompt_version(agent_name: str) -> str:
+    """
+    Hash of everything that shapes an agent's parse besides the response itself.
+
+    Covers the prompt template, the agent's schema and extraction spec, the
+    response budgets and PARSE_FORMAT_VERSION; part of the parse cache key.
+    """
+    version = _prompt_versions.get(agent_name)
+    if version is None:
+        inputs = [PARSE_FORMAT_VERSION, PROMPT_TEMPLATE, get_agent_schema(agent_name),
+                  EXTRACTION_SPECS.get(agent_name), DEFAULT_RESPONSE_TOKEN_BUDGET, MIN_LIST_ITEMS,
+                  sorted(IDENTITY_FIELDS)]
+        version = _prompt_versions[agent_name] = hashlib.sha256(canonical_json(inputs).encode()).hexdigest()[:16]
+    return version
+
+
+def prune_response(response: Any, fields: frozenset) -> Any:
+    """
+    Keep only the parts of a response under one of the given keys.
+
+    Matching keys keep their whole subtree; containers with no matches are
+    dropped. Returns None if nothing matched.
+    """
+    if isinstance(response, dict):
+        pruned = {}
+        for key, value in response.items():
+            if key in fields:
+                pruned[key] = value
+            else:
+                child = prune_response(value, fields)
+                if child is not None:
+                    pruned[key] = child
+        if not pruned:
+            return None
+        for key in IDENTITY_FIELDS.intersection(response):
+            if key not in pruned and not isinstance(response[key], (dict, list)):
+                pruned[key] = response[key]
+        return pruned
+    if isinstance(response, list):
+        children = [prune_response(item, fields) for item in response]
+        children = [child for child in children if child is not None]
+        return children or None
+    return None
+
+
+def _shorten_lists(value: Any, max_items: int) -> Any:
+    """Cap every list at max_items, noting how many elements were dropped."""
+    if isinstance(value, dict):
+        return {key: _shorten_lists(child, max_items) for key, child in value.items()}
+    if isinstance(value, list):
+        shortened = [_shorten_lists(child, max_items) for child in value[:max_items]]
+        if len(value) > max_items:
+            shortened.append(f"... {len(value) - max_items} more")
+        return shortened
+    return value
+
+
+def encode_response_for_prompt(agent_name: str, response: Dict[str, Any]) -> str:
+    """
+    Compact, pruned and budgeted JSON encoding of an agent response.
+
+    The response is pruned to the schema's key and context fields (falling
+    back to the full response if none are present), encoded without
+    whitespace, and then, if still over the agent's token budget, long lists
+    are shortened and finally the text is cut.
+    """
+    schema = get_agent_schema(agent_name)
+    fields = _prompt_field_sets.get(agent_name)
+    if fields is None:
+        fields = frozenset(schema["key_fields"]) | frozenset(schema.get("context_fields", []))
+        _prompt_field_sets[agent_name] = fields
+    budget = schema.get("max_response_tokens", DEFAULT_RESPONSE_TOKEN_BUDGET)
+
+    pruned = prune_response(response, fields)
+    value = response if pruned is None else pruned
+    encoded = json.dumps(value, separators=(",", ":"), default=str)
+    if estimate_tokens(encoded) <= budget:
+        return encoded
+
+    max_items = 32
+    while max_items >= MIN_LIST_ITEMS:
+        encoded = json.dumps(_shorten_lists(value, max_items), separators=(",", ":"), default=str)
+        if estimate_tokens(encoded) <= budget:
+            return encoded
+        max_items //= 2
+
+    return encoded[:budget * 4] + "...[truncated]"
+
+
+async def _async_client_lifetime(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    """
+    Hold an async client open until closed or until its event loop shuts down.
+
+    Started on the client's loop, the generator is registered with that loop,
+    so asyncio.run() closes the client (while the loop can still release its
+    sockets) even if the parser is never closed explicitly.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+AgentResponses = Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]]
+
+class LLMResponseParser:
+    """LLM-based parser for agent responses."""
     
-    def _call_llm_for_parsing(self, prompt: str) -> Dict[str, Any]:
-        """Call LLM to parse the response."""
+    def __init__(self, openai_api_key: Optional[str] = None, model: str = "gpt-4o-mini",
+                 max_concurrency: int = 6, timeout: float = 10.0, cache: Optional[ParseCache] = None,
+                 base_url: Optional[str] = None, rate_limiter: Optional[LLMRateLimiter] = None,
+                 stream: bool = False, on_stream_field: Optional[Callable[[str, Any], None]] = None):
+        self.openai_api_key = openai_api_key
+        self.model = model
+        self.base_url = base_url or os.getenv("LLM_PARSER_BASE_URL", "https://api.openai.com/v1/chat/completions")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = cache
+        # Shared by every parser calling the same endpoint unless one is passed in
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter(self.base_url)
+        # Streaming returns as soon as features and confidence_score close;
+        # on_stream_field(key, value) sees every top-level field and keeps the stream open to the end
+        self.stream = stream
+        self.on_stream_field = on_stream_field
+        
+        # Async client and concurrency cap, bound to the event loop that created them
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_guard: Optional[AsyncGenerator[None, None]] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+    def parse_agent_response(self, agent_name: str, response: Dict[str, Any],
+                             priority: int = PRIORITY_INTERACTIVE) -> ParsedAgentResponse:
+        """
+        Parse agent response using LLM to extract structured data.
+        
+        Args:
+            agent_name: Name of the agent (okra, onyx, opal, etc.)
+            response: Raw response from the agent
+            priority: Rate limiter priority (PRIORITY_BATCH for backfills)
+            
+        Returns:
+            ParsedAgentResponse with structured data
+        """
+        try:
+            # Fast path: the extraction spec covers every field the ML features need
+            extracted, missing = self._extract_with_spec(agent_name, response)
+            if missing is not None and not missing:
+                return self._build_parsed_response(agent_name, response, get_extraction_spec(agent_name).parsed_data(extracted))
+            
+            cache_key = self._cache_key(agent_name, response)
+            parsed_data = self.cache.get(cache_key) if cache_key else None
+            
+            if parsed_data is None:
+                # Create LLM prompt for parsing, asking only for what the spec couldn't extract
+                prompt = self._create_parsing_prompt(agent_name, response, missing)
+                
+                # Call LLM for parsing
+                parsed_data = self._merge_extracted(self._call_llm_for_parsing(prompt, priority), extracted)
+                self._cache_store(cache_key, parsed_data)
+            
+            return self._build_parsed_response(agent_name, response, parsed_data)
+            
+        except Exception as e:
+            logger.error(f"Error parsing {agent_name} response: {e}")
+            # Return fallback parsing
+            return self._fallback_parsing(agent_name, response)
+    
+    async def parse_agent_response_async(self, agent_name: str, response: Dict[str, Any],
+                                         priority: int = PRIORITY_INTERACTIVE) -> ParsedAgentResponse:
+        """
+        Parse agent response without blocking the event loop.
+        
+        Uses the parser's pooled async client and counts against its
+        concurrency cap.
+        
+        Args:
+            agent_name: Name of the agent (okra, onyx, opal, etc.)
+            response: Raw response from the agent
+            priority: Rate limiter priority (PRIORITY_BATCH for backfills)
+            
+        Returns:
+            ParsedAgentResponse with structured data
+        """
+        try:
+            extracted, missing = self._extract_with_spec(agent_name, response)
+            if missing is not None and not missing:
+                return self._build_parsed_response(agent_name, response, get_extraction_spec(agent_name).parsed_data(extracted))
+            
+            cache_key = self._cache_key(agent_name, response)
+            parsed_data = self.cache.get(cache_key) if cache_key else None
+            
+            if parsed_data is None:
+                prompt = self._create_parsing_prompt(agent_name, response, missing)
+                
+                await self._bind_async_loop()
+                async with self._async_semaphore:
+                    parsed_data = await self._call_llm_for_parsing_async(prompt, priority)
+                parsed_data = self._merge_extracted(parsed_data, extracted)
+                self._cache_store(cache_key, parsed_data)
+            
+            return self._build_parsed_response(agent_name, response, parsed_data)
+            
+        except Exception as e:
+            logger.error(f"Error parsing {agent_name} response: {e}")
+            return self._fallback_parsing(agent_name, response)
+    
+    async def parse_agent_responses_async(self, responses: AgentResponses,
+                                          priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[ParsedAgentResponse]:
+        """
+        Parse several agent responses concurrently, yielding each as it completes.
+        
+        At most max_concurrency LLM calls are in flight at once (shared across
+        all concurrent callers of this parser).
+        
+        Args:
+            responses: Mapping of agent name to raw response, or (agent_name, response) pairs
+            priority: Rate limiter priority (PRIORITY_BATCH for backfills)
+            
+        Yields:
+            ParsedAgentResponse in completion order
+        """
+        items = responses.items() if isinstance(responses, dict) else responses
+        tasks = [asyncio.ensure_future(self.parse_agent_response_async(agent_name, response, priority))
+                 for agent_name, response in items]
+        try:
+            for next_completed in asyncio.as_completed(tasks):
+                yield await next_completed
+        finally:
+            # Caller stopped early; don't leave LLM calls running
+            for task in tasks:
+                task.cancel()
+    
+    async def aclose(self):
+        """Close the pooled async HTTP client."""
+        guard, loop = self._async_client_guard, self._async_loop
+        self._async_client = None
+        self._async_client_guard = None
+        self._async_semaphore = None
+        self._async_loop = None
+        if guard is not None:
+            await self._close_async_client(guard, loop)
+    
+    async def _bind_async_loop(self):
+        """(Re)create the async client and semaphore for the running event loop, closing the previous client."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is loop:
+            return
+        previous_guard, previous_loop = self._async_client_guard, self._async_loop
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        self._async_client_guard = _async_client_lifetime(self._async_client)
+        await self._async_client_guard.asend(None)
+        self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._async_loop = loop
+        if previous_guard is not None:
+            await self._close_async_client(previous_guard, previous_loop)
+    
+    @staticmethod
+    async def _close_async_client(guard: AsyncGenerator[None, None], loop: asyncio.AbstractEventLoop):
+        """Close a client on the event loop its connections belong to."""
+        if loop.is_closed():
+            # asyncio.run already closed it while shutting the loop down
+            return
+        if loop is not asyncio.get_running_loop() and loop.is_running():
+            # Still serving another thread; close it there
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(guard.aclose(), loop))
+        else:
+            await guard.aclose()
+    
+    def _extract_with_spec(self, agent_name: str, response: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[List[str]]]:
+        """
+        Pull spec fields straight from the raw response.
+        
+        Returns:
+            (fields found, required fields still missing); missing is None
+            for agents without a spec, meaning the LLM parses everything
+        """
+        spec = get_extraction_spec(agent_name)
+        if spec is None or not isinstance(response, dict):
+            return {}, None
+        features, missing = spec.extract(response)
+        # The LLM returns the agent's other key fields as well; take the ones the
+        # response has, so both paths report the same response_completeness
+        for name in get_agent_schema(agent_name)["key_fields"]:
+            if name not in spec.fields and name in response:
+                features[name] = response[name]
+        return features, missing
+    
+    def _merge_extracted(self, parsed_data: Dict[str, Any], extracted: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay fields read directly from the response onto the LLM's features."""
+        if extracted:
+            parsed_data = dict(parsed_data)
+            parsed_data["features"] = {**parsed_data.get("features", {}), **extracted}
+        return parsed_data
+    
+    def _cache_key(self, agent_name: str, response: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a response, or None when caching doesn't apply."""
+        if self.cache is None or not self.openai_api_key:
+            return None
+        return make_cache_key(agent_name, self.model, response, get_prompt_version(agent_name))
+    
+    def _cache_store(self, cache_key: Optional[str], parsed_data: Dict[str, Any]):
+        """Cache a real LLM result; fallback results are not worth keeping."""
+        if cache_key and parsed_data.get("response_type") != "fallback":
+            self.cache.put(cache_key, parsed_data)
+    
+    def _build_parsed_response(self, agent_name: str, response: Dict[str, Any], parsed_data: Dict[str, Any]) -> ParsedAgentResponse:
+        """Combine LLM output and ML features into a ParsedAgentResponse."""
+        ml_ready_data = self._extract_ml_features(agent_name, parsed_data, response)
+        
+        return ParsedAgentResponse(
+            agent_name=agent_name,
+            response_type=parsed_data.get("response_type", "unknown"),
+            extracted_features=parsed_data.get("features", {}),
+            confidence_score=parsed_data.get("confidence_score", 0.5),
+            raw_response=response,
+            ml_ready_data=ml_ready_data
+        )
+    
+    def _create_parsing_prompt(self, agent_name: str, response: Dict[str, Any],
+                               fields: Optional[List[str]] = None) -> str:
+        """Create LLM prompt for parsing agent response, optionally limited to some fields."""
+        prefix, suffix = compile_parsing_prompt(agent_name, tuple(fields) if fields else None)
+        return prefix + encode_response_for_prompt(agent_name, response) + suffix
+    
+    def _call_llm_for_parsing(self, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """Call LLM to parse the response, rate limited and retried on 429/5xx."""
         
         if not self.openai_api_key:
             logger.warning("No OpenAI API key provided, using fallback parsing")
             return self._fallback_llm_response()
         
         try:
-            headers = {
-                "Authorization": f"Bearer {self.openai_api_key}",
-                "Content-Type": "application/json"
-            }
+            headers, payload = self._build_llm_request(prompt)
+            reserved = self._estimate_request_tokens(prompt, payload)
+            response = self._post_with_retries(headers, payload, reserved, priority)
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "You are an expert at parsing payment processing data. Always return valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 1000
-            }
-            
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
+            if self.stream:
+                return self._read_llm_stream(response, reserved)
             
             result = response.json()
-            content = result["choices"][0]["message"]["content"]
-            
-            # Parse JSON response
-            return json.loads(content)
+            self.rate_limiter.record_usage(reserved, result.get("usage", {}).get("total_tokens"))
+            return self._parse_llm_result(result)
             
         except Exception as e:
             logger.error(f"LLM parsing failed: {e}")
             return self._fallback_llm_response()
     
-    def _extract_ml_features(self, agent_name: str, parsed_data: Dict[str, Any], raw_response: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract ML-ready features from parsed data."""
-        
-        ml_features = {}
+    async def _call_llm_for_parsing_async(self, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """Call LLM to parse the response over the pooled async client, rate limited and retried."""
         
-        # Common ML features across all agents
-        ml_features["response_confidence"] = parsed_data.get("confidence_score", 0.5)
-        ml_features["response_completeness"] = len(parsed_data.get("features", {})) / 5.0  # Normalize to 0-1
+        if not self.openai_api_key:
+            logger.warning("No OpenAI API key provided, using fallback parsing")
+            return self._fallback_llm_response()
         
-        # Agent-specific ML feature extraction
-        if agent_name == "okra":
-            features = parsed_data.get("features", {})
-            ml_features["approval_probability"] = 1.0 if features.get("approved") else 0.0
-            ml_features["credit_risk_score"] = self._normalize_risk_score(features.get("risk_score", 0.5))
-            ml_features["credit_limit_ratio"] = min(features.get("credit_limit", 0) / 10000.0, 1.0)
+        try:
+            headers, payload = self._build_llm_request(prompt)
+            reserved = self._estimate_request_tokens(prompt, payload)
+            response = await self._post_with_retries_async(headers, payload, reserved, priority)
             
-        elif agent_name == "onyx":
-            features = parsed_data.get("features", {})
-            ml_features["trust_score"] = features.get("trust_score", 0.5)
-            ml_features["compliance_risk"] = 1.0 - features.get("compliance_status", 0.5)
-            ml_features["sanctions_risk"] = 1.0 if "sanctions" in str(features).lower() else 0.0
+            if self.stream:
+                return await self._read_llm_stream_async(response, reserved)
             
-        elif agent_name == "opal":
-            features = parsed_data.get("features", {})
-            ml_features["payment_method_count"] = len(features.get("payment_methods", []))
-            ml_features["avg_processing_fee"] = features.get("avg_fee", 0.03)
-            ml_features["security_score"] = features.get("security_score", 0.8)
+            result = response.json()
+            self.rate_limiter.record_usage(reserved, result.get("usage", {}).get("total_tokens"))
+            return self._parse_llm_result(result)
             
-        elif agent_name == "orca":
-            features = parsed_data.get("features", {})
-            ml_features["decision_confidence"] = features.get("confidence", 0.5)
-            ml_features["cost_optimization"] = 1.0 - min(features.get("cost_score", 0.5), 1.0)
-            ml_features["rail_efficiency"] = features.get("efficiency_score", 0.7)
+        except Exception as e:
+            logger.error(f"LLM parsing failed: {e}")
+            return self._fallback_llm_response()
+    
+    def _post_with_retries(self, headers: Dict[str, str], payload: Dict[str, Any], reserved: int,
+                           priority: int) -> requests.Response:
+        """POST the completion request through the rate limiter, retrying 429/5xx and connection errors."""
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            limiter.acquire(reserved, priority)
+            try:
+                response = requests.post(self.base_url, headers=headers, json=payload, timeout=self.timeout,
+                                         stream=self.stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not limiter.should_retry(attempt):
+                    raise
+                delay = limiter.retry_delay(attempt)
+                logger.warning(f"LLM request failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            
+            if response.status_code in RETRYABLE_STATUS_CODES and limiter.should_retry(attempt):
+                response.close()
+                delay = self._schedule_retry(response.status_code, response.headers, attempt)
+                if response.status_code != 429:
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            
+            response.raise_for_status()
+            return response
+    
+    async def _post_with_retries_async(self, headers: Dict[str, str], payload: Dict[str, Any], reserved: int,
+                                       priority: int) -> httpx.Response:
+        """Async counterpart of _post_with_retries over the pooled client."""
+        limiter = self.rate_limiter
+        await self._bind_async_loop()
+        attempt = 0
+        while True:
+            await limiter.acquire_async(reserved, priority)
+            try:
+                request = self._async_client.build_request("POST", self.base_url, headers=headers, json=payload)
+                response = await self._async_client.send(request, stream=self.stream)
+            except (httpx.ConnectError, httpx.TimeoutException) as e:
+                if not limiter.should_retry(attempt):
+                    raise
+                delay = limiter.retry_delay(attempt)
+                logger.warning(f"LLM request failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
             
-        elif agent_name == "olive":
-            features = parsed_data.get("features", {})
-            ml_features["loyalty_tier_score"] = self._map_loyalty_tier(features.get("loyalty_tier", "bronze"))
-            ml_features["incentive_value"] = features.get("total_discount", 0) / 100.0
-            ml_features["retention_probability"] = features.get("retention_score", 0.6)
+            if response.status_code in RETRYABLE_STATUS_CODES and limiter.should_retry(attempt):
+                await response.aclose()
+                delay = self._schedule_retry(response.status_code, response.headers, attempt)
+                if response.status_code != 429:
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
             
-        elif agent_name == "weave":
-            features = parsed_data.get("features", {})
-            ml_features["auction_efficiency"] = features.get("auction_success", 0.8)
-            ml_features["cost_savings"] = features.get("cost_savings", 0.05)
-            ml_features["processor_performance"] = features.get("performance_score", 0.7)
+            if response.is_error:
+                await response.aclose()
+            response.raise_for_status()
+            return response
+    
+    def _read_llm_stream(self, response: requests.Response, reserved: int) -> Dict[str, Any]:
+        """
+        Read a streamed completion until features and confidence_score have closed.
+        
+        The connection is closed at that point (stopping generation of the
+        insights text) unless on_stream_field wants every field.
+        """
+        parser = IncrementalJSONParser()
+        usage = None
+        with response:
+            for content, event_usage in iter_sse_content(response.iter_lines()):
+                usage = event_usage or usage
+                if self._feed_stream(parser, content):
+                    break
+        self.rate_limiter.record_usage(reserved, usage.get("total_tokens") if usage else None)
+        return self._stream_result(parser)
+    
+    async def _read_llm_stream_async(self, response: httpx.Response, reserved: int) -> Dict[str, Any]:
+        """Async counterpart of _read_llm_stream."""
+        parser = IncrementalJSONParser()
+        usage = None
+        try:
+            async for line in response.aiter_lines():
+                event = parse_sse_line(line)
+                if event is SSE_DONE:
+                    break
+                if event is None:
+                    continue
+                content, event_usage = event
+                usage = event_usage or usage
+                if self._feed_stream(parser, content):
+                    break
+        finally:
+            await response.aclose()
+        self.rate_limiter.record_usage(reserved, usage.get("total_tokens") if usage else None)
+        return self._stream_result(parser)
+    
+    def _feed_stream(self, parser: IncrementalJSONParser, content: str) -> bool:
+        """Feed streamed content; True once reading can stop."""
+        for key, value in parser.feed(content):
+            if self.on_stream_field is not None:
+                self.on_stream_field(key, value)
+        if parser.done:
+            return True
+        return self.on_stream_field is None and parser.is_ready()
+    
+    def _stream_result(self, parser: IncrementalJSONParser) -> Dict[str, Any]:
+        if not parser.is_ready():
+            raise ValueError("Streamed completion ended before features and confidence_score")
+        return dict(parser.result)
+    
+    def _estimate_request_tokens(self, prompt: str, payload: Dict[str, Any]) -> int:
+        """Tokens to reserve: the prompt plus the completion allowance, as providers count it."""
+        return estimate_tokens(prompt) + payload.get("max_tokens", 0)
+    
+    def _schedule_retry(self, status_code: int, headers: Any, attempt: int) -> float:
+        """
+        Work out the delay before retrying a failed status.
+        
+        A 429 pauses the shared limiter for everyone, so the next acquire
+        waits it out; other statuses back off only this call.
+        
+        Returns:
+            Seconds until the retry
+        """
+        retry_after = parse_retry_after(headers)
+        if status_code == 429:
+            delay = self.rate_limiter.throttled(retry_after, attempt)
+        else:
+            delay = self.rate_limiter.retry_delay(attempt, retry_after)
+        logger.warning(f"LLM returned {status_code}, retrying in {delay:.2f}s (attempt {attempt + 1})")
+        return delay
+    
+    def _build_llm_request(self, prompt: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Build headers and chat completion payload for a parsing prompt."""
+        headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
         
-        return ml_features
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are an expert at parsing payment processing data. Always return valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "max_tokens": 1000
+        }
+        if self.stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return headers, payload
+    
+    def _parse_llm_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the JSON document from a chat completion result."""
+        content = result["choices"][0]["message"]["content"]
+        return json.loads(content)
+    
+    def _extract_ml_features(self, agent_name: str, parsed_data: Dict[str, Any], raw_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract ML-ready features from parsed data."""
+        spec = get_ml_feature_spec(agent_name)
+        return spec.ml_features(parsed_data.get("features", {}), parsed_data.get("confidence_score", 0.5),
+                                raw_response if isinstance(raw_response, dict) else {})
     
     def _normalize_risk_score(self, risk_score: Any) -> float:
         """Normalize risk score to 0-1 range."""
-        if isinstance(risk_score, (int, float)):
-            return min(max(risk_score, 0.0), 1.0)
-        elif isinstance(risk_score, str):
-            risk_lower = risk_score.lower()
-            if "low" in risk_lower:
-                return 0.2
-            elif "medium" in risk_lower:
-                return 0.5
-            elif "high" in risk_lower:
-                return 0.8
-        return 0.5
+        return normalize_risk_score(risk_score)
     
     def _map_loyalty_tier(self, tier: str) -> float:
         """Map loyalty tier to numerical score."""
-        tier_mapping = {
-            "bronze": 0.3,
-            "silver": 0.5,
-            "gold": 0.7,
-            "platinum": 0.9,
-            "diamond": 1.0
-        }
-        return tier_mapping.get(tier.lower(), 0.3)
+        return map_loyalty_tier(tier)
     
     def _fallback_parsing(self, agent_name: str, response: Dict[str, Any]) -> ParsedAgentResponse:
         """Fallback parsing when LLM is not available."""
         
         # Simple rule-based parsing
-        features = {}
-        ml_features = {"response_confidence": 0.3, "response_completeness": 0.5}
-        
-        if agent_name == "okra":
-            features["approved"] = response.get("approved", False)
-            features["credit_limit"] = response.get("credit_limit", 0)
-            ml_features["approval_probability"] = 1.0 if features["approved"] else 0.0
-            
-        elif agent_name == "onyx":
-            features["trust_score"] = response.get("trust_score", 0.5)
-            ml_features["trust_score"] = features["trust_score"]
-            
-        elif agent_name == "opal":
-            features["payment_methods"] = response.get("payment_methods", [])
-            ml_features["payment_method_count"] = len(features["payment_methods"])
-            
-        elif agent_name == "orca":
-            features["optimal_rail"] = response.get("chosen_rail", "Card")
-            features["confidence"] = response.get("confidence", 0.5)
-            ml_features["decision_confidence"] = features["confidence"]
-            
-        elif agent_name == "olive":
-            features["incentives"] = response.get("incentives", [])
-            ml_features["incentive_value"] = len(features["incentives"]) * 0.1
-            
-        elif agent_name == "weave":
-            features["auction_results"] = response.get("candidate_scores", [])
-            ml_features["auction_efficiency"] = 0.8 if features["auction_results"] else 0.3
+        features, ml_features = get_ml_feature_spec(agent_name).fallback(response)
         
         return ParsedAgentResponse(
             agent_name=agent_name,
@@ -295,7 +724,6 @@ Focus on extracting numerical values that can be used by ML models for decision
             extracted_features=features,
             confidence_score=0.3,
             raw_response=response,
-            timestamp=datetime.now().isoformat(),
             ml_ready_data=ml_features
         )
     
@@ -311,37 +739,128 @@ Focus on extracting numerical values that can be used by ML models for decision
         }
 
 class MLModelEnhancer:
-    """Enhances ML models with LLM-parsed data."""
+    """
+    Enhances ML models with LLM-parsed data.
+    
+    Aggregates (confidence and completeness sums, latest value per feature,
+    risk-feature sum, high-risk and approving agents) are updated as each
+    response is added, so reading features or a recommendation does not
+    rescan every response. With max_responses set, only the most recent
+    responses are kept and the oldest are evicted from the aggregates.
+    """
     
-    def __init__(self, parser: LLMResponseParser):
+    def __init__(self, parser: LLMResponseParser, max_responses: Optional[int] = None):
+        if max_responses is not None and max_responses < 1:
+            raise ValueError(f"max_responses must be at least 1, got {max_responses}")
         self.parser = parser
-        self.parsed_responses: List[ParsedAgentResponse] = []
+        self.max_responses = max_responses
+        self.reset()
+    
+    def reset(self):
+        """Forget all responses, e.g. when a new trace starts."""
+        self.parsed_responses: Deque[ParsedAgentResponse] = deque(maxlen=self.max_responses)
+        self._sequence = 0
+        self._first_sequence = 0
+        self._confidence_sum = 0.0
+        self._completeness_sum = 0.0
+        # Latest value per "<agent>_<feature>" and the response sequence that set it
+        self._latest: Dict[str, Any] = {}
+        self._latest_sequence: Dict[str, int] = {}
+        self._risk_sum = 0.0
+        self._risk_count = 0
+        # (sequence, agent_name) in arrival order, for the recommendation rules
+        self._high_risk: Deque[Tuple[int, str]] = deque()
+        self._approving: Deque[Tuple[int, str]] = deque()
     
     def add_agent_response(self, agent_name: str, response: Dict[str, Any]) -> ParsedAgentResponse:
         """Add and parse agent response."""
         parsed = self.parser.parse_agent_response(agent_name, response)
-        self.parsed_responses.append(parsed)
+        self.add_parsed_response(parsed)
         return parsed
     
+    async def add_agent_responses_async(self, responses: AgentResponses) -> List[ParsedAgentResponse]:
+        """
+        Parse a trace's agent responses concurrently and add them.
+        
+        Args:
+            responses: Mapping of agent name to raw response, or (agent_name, response) pairs
+            
+        Returns:
+            Parsed responses in completion order
+        """
+        added = []
+        async for parsed in self.parser.parse_agent_responses_async(responses):
+            self.add_parsed_response(parsed)
+            added.append(parsed)
+        return added
+    
+    def add_parsed_response(self, parsed: ParsedAgentResponse):
+        """Add an already-parsed response and update the running aggregates."""
+        if self.max_responses is not None and len(self.parsed_responses) == self.max_responses:
+            self._evict_oldest()
+        
+        sequence = self._sequence
+        self._sequence += 1
+        self.parsed_responses.append(parsed)
+        
+        ml_ready_data = parsed.ml_ready_data
+        self._confidence_sum += parsed.confidence_score
+        self._completeness_sum += ml_ready_data.get("response_completeness", 0)
+        
+        for key, value in ml_ready_data.items():
+            feature = f"{parsed.agent_name}_{key}"
+            if "risk" in feature.lower():
+                if feature in self._latest:
+                    self._risk_sum -= self._latest[feature]
+                else:
+                    self._risk_count += 1
+                self._risk_sum += value
+            self._latest[feature] = value
+            self._latest_sequence[feature] = sequence
+        
+        if ml_ready_data.get("risk_score", 0) > 0.7:
+            self._high_risk.append((sequence, parsed.agent_name))
+        if ml_ready_data.get("approval_probability", 0) > 0.5:
+            self._approving.append((sequence, parsed.agent_name))
+    
+    def _evict_oldest(self):
+        """Remove the oldest response's contribution from the aggregates."""
+        oldest = self.parsed_responses.popleft()
+        sequence = self._first_sequence
+        self._first_sequence += 1
+        
+        self._confidence_sum -= oldest.confidence_score
+        self._completeness_sum -= oldest.ml_ready_data.get("response_completeness", 0)
+        
+        for key in oldest.ml_ready_data:
+            feature = f"{oldest.agent_name}_{key}"
+            # Only drop features no newer response has overwritten
+            if self._latest_sequence.get(feature) == sequence:
+                value = self._latest.pop(feature)
+                del self._latest_sequence[feature]
+                if "risk" in feature.lower():
+                    self._risk_sum -= value
+                    self._risk_count -= 1
+        
+        if self._high_risk and self._high_risk[0][0] == sequence:
+            self._high_risk.popleft()
+        if self._approving and self._approving[0][0] == sequence:
+            self._approving.popleft()
+    
     def get_enhanced_features(self) -> Dict[str, Any]:
         """Get enhanced features for ML model input."""
         
-        enhanced_features = {}
-        
-        # Aggregate features from all parsed responses
-        for parsed in self.parsed_responses:
-            agent_features = parsed.ml_ready_data
-            for key, value in agent_features.items():
-                enhanced_features[f"{parsed.agent_name}_{key}"] = value
+        # Latest value of every agent feature
+        enhanced_features = dict(self._latest)
         
         # Add cross-agent insights
-        enhanced_features["total_confidence"] = sum(p.confidence_score for p in self.parsed_responses) / len(self.parsed_responses)
-        enhanced_features["response_completeness"] = sum(p.ml_ready_data.get("response_completeness", 0) for p in self.parsed_responses) / len(self.parsed_responses)
+        count = len(self.parsed_responses)
+        enhanced_features["total_confidence"] = self._confidence_sum / count
+        enhanced_features["response_completeness"] = self._completeness_sum / count
         
         # Add risk aggregation
-        risk_features = [f for f in enhanced_features.keys() if "risk" in f.lower()]
-        if risk_features:
-            enhanced_features["aggregate_risk"] = sum(enhanced_features[f] for f in risk_features) / len(risk_features)
+        if self._risk_count:
+            enhanced_features["aggregate_risk"] = self._risk_sum / self._risk_count
         
         return enhanced_features
     
@@ -352,28 +871,25 @@ class MLModelEnhancer:
             return {"recommendation": "insufficient_data", "confidence": 0.0}
         
         # Simple rule-based decision logic (can be enhanced with actual ML model)
-        total_confidence = sum(p.confidence_score for p in self.parsed_responses) / len(self.parsed_responses)
+        total_confidence = self._confidence_sum / len(self.parsed_responses)
         
         # Check for critical risk factors
-        high_risk_agents = [p for p in self.parsed_responses if p.ml_ready_data.get("risk_score", 0) > 0.7]
-        
-        if high_risk_agents:
+        if self._high_risk:
+            high_risk_agents = [agent_name for _, agent_name in self._high_risk]
             return {
                 "recommendation": "decline",
                 "confidence": total_confidence,
-                "reason": f"High risk detected from {[a.agent_name for a in high_risk_agents]}",
-                "risk_factors": [a.agent_name for a in high_risk_agents]
+                "reason": f"High risk detected from {high_risk_agents}",
+                "risk_factors": high_risk_agents
             }
         
         # Check approval status
-        approval_agents = [p for p in self.parsed_responses if p.ml_ready_data.get("approval_probability", 0) > 0.5]
-        
-        if len(approval_agents) >= len(self.parsed_responses) * 0.7:  # 70% approval threshold
+        if len(self._approving) >= len(self.parsed_responses) * 0.7:  # 70% approval threshold
             return {
                 "recommendation": "approve",
                 "confidence": total_confidence,
                 "reason": "Majority of agents recommend approval",
-                "supporting_agents": [a.agent_name for a in approval_agents]
+                "supporting_agents": [agent_name for _, agent_name in self._approving]
             }
         
         return {
@@ -0,0 +1,187 @@
+"""
+Incremental JSON Parsing for Streamed LLM Completions
+
+The parsing prompt asks for one JSON object (response_type, features,
+confidence_score, ml_features, insights, risk_indicators). When the
+completion is streamed, IncrementalJSONParser reports each top-level member
+the moment its value closes, so the parser can build the ML features from
+features and confidence_score without waiting for the insights text.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Top-level members the parse result needs; once these have closed the rest
+# of the completion (ml_features, insights, risk_indicators) is not needed
+STREAM_READY_KEYS = frozenset(["features", "confidence_score"])
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Emits (key, value) for each member of a top-level JSON object as it closes.
+
+    Text before the opening brace (e.g. a ```json fence) is skipped. Values
+    are decoded with json.loads once complete, so nested objects are emitted
+    whole.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._phase = "start"
+        self._key_start = 0
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.result: Dict[str, Any] = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume more completion text.
+
+        Args:
+            chunk: Next piece of the streamed content
+
+        Returns:
+            (key, value) pairs for members that closed within this chunk
+        """
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        text = self._text
+        events = []
+        pos = self._pos
+        length = len(text)
+
+        while pos < length:
+            char = text[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._phase == "key":
+                            self._key = json.loads(text[self._key_start:pos + 1])
+                            self._phase = "colon"
+                        elif self._phase == "value":
+                            events.append(self._emit(text, pos + 1))
+                pos += 1
+                continue
+
+            if self._phase == "start":
+                if char == "{":
+                    self._depth = 1
+                    self._phase = "key"
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._phase == "key":
+                        self._key_start = pos
+                    elif self._phase == "value" and self._value_start is None:
+                        self._value_start = pos
+            elif char in "{[":
+                if self._depth == 1 and self._value_start is None:
+                    self._value_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._phase == "value":
+                    events.append(self._emit(text, pos + 1))
+                elif self._depth == 0:
+                    if self._phase == "value" and self._value_start is not None:
+                        events.append(self._emit(text, pos))
+                    self.done = True
+                    pos += 1
+                    break
+            elif self._depth == 1:
+                if char == ":" and self._phase == "colon":
+                    self._phase = "value"
+                    self._value_start = None
+                elif char == ",":
+                    if self._phase == "value" and self._value_start is not None:
+                        events.append(self._emit(text, pos))
+                    self._phase = "key"
+                elif char not in _WHITESPACE and self._phase == "value" and self._value_start is None:
+                    self._value_start = pos
+            pos += 1
+
+        self._pos = pos
+        return [event for event in events if event is not None]
+
+    def _emit(self, text: str, end: int) -> Optional[Tuple[str, Any]]:
+        """Decode the value that just closed and record it."""
+        key, start = self._key, self._value_start
+        self._phase = "comma"
+        self._value_start = None
+        self._key = None
+        try:
+            value = json.loads(text[start:end])
+        except (TypeError, ValueError):
+            return None
+        self.result[key] = value
+        return key, value
+
+    def is_ready(self, keys: Iterable[str] = STREAM_READY_KEYS) -> bool:
+        """Whether every given member has closed."""
+        return all(key in self.result for key in keys)
+
+
+# Returned by parse_sse_line for the terminating "data: [DONE]" event
+SSE_DONE = ("", None)
+
+
+def parse_sse_line(line: Any) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Content delta from one line of an OpenAI-style server-sent event stream.
+
+    Args:
+        line: Decoded or raw line of the event stream
+
+    Returns:
+        (content delta, usage) for a data event (usage is set on the final
+        usage event), SSE_DONE for the end of the stream, None for other lines
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    line = line.strip()
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return SSE_DONE
+    event = json.loads(data)
+    choices = event.get("choices") or []
+    content = ""
+    if choices:
+        content = (choices[0].get("delta") or {}).get("content") or ""
+    return content, event.get("usage")
+
+
+def iter_sse_content(lines: Iterable[Any]) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Content deltas from an event stream, up to the [DONE] event.
+
+    Args:
+        lines: Decoded or raw lines of the event stream
+
+    Yields:
+        (content delta, usage) per data event
+    """
+    for line in lines:
+        event = parse_sse_line(line)
+        if event is SSE_DONE:
+            return
+        if event is not None:
+            yield event
@@ -0,0 +1,181 @@
+"""
+Batch Feature Matrix for Parsed Agent Responses
+
+Turns many traces' parsed agent responses into a NumPy feature matrix with a
+fixed column schema (okra_approval_probability, onyx_trust_score, ...) and
+computes MLModelEnhancer.get_decision_recommendation-equivalent labels for
+every trace at once. Intended for offline scoring of historical traces.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from llm_extraction_spec import EXTRACTION_SPECS
+
+# Per-response keys every agent can carry, plus the keys the recommendation rules read
+COMMON_FEATURES = ["response_confidence", "response_completeness", "risk_score", "approval_probability"]
+
+INSUFFICIENT_DATA, APPROVE, DECLINE, REVIEW = "insufficient_data", "approve", "decline", "review"
+
+
+def _build_feature_columns() -> List[str]:
+    columns: List[str] = []
+    for agent_name, spec in EXTRACTION_SPECS.items():
+        names = COMMON_FEATURES + list(spec.get("ml_features", {})) + list(spec.get("fallback", {}).get("ml_features", {}))
+        for name in names:
+            column = f"{agent_name}_{name}"
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+# Fixed column schema: "<agent>_<ml feature>" for every agent in the extraction specs
+FEATURE_COLUMNS: List[str] = _build_feature_columns()
+
+
+def _response_fields(response: Any) -> Tuple[str, Dict[str, Any], float]:
+    """(agent_name, ml_ready_data, confidence_score) from a ParsedAgentResponse or equivalent dict."""
+    if isinstance(response, dict):
+        return response["agent_name"], response.get("ml_ready_data", {}), response.get("confidence_score", 0.5)
+    return response.agent_name, response.ml_ready_data, response.confidence_score
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Feature matrix for a batch of traces.
+
+    values holds the latest value of each column per trace (NaN when no
+    response supplied it), matching MLModelEnhancer.get_enhanced_features.
+    The per-trace counters carry what the recommendation rules need.
+    """
+    trace_ids: List[str]
+    columns: List[str]
+    values: np.ndarray
+    response_counts: np.ndarray
+    confidence_sums: np.ndarray
+    completeness_sums: np.ndarray
+    high_risk_counts: np.ndarray
+    approving_counts: np.ndarray
+    ignored_features: int = 0
+    _column_index: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._column_index = {name: index for index, name in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.trace_ids)
+
+    def column(self, name: str) -> np.ndarray:
+        """One column as a 1-D array view."""
+        return self.values[:, self._column_index[name]]
+
+    def project(self, names: Sequence[str]) -> np.ndarray:
+        """Selected columns as a 2-D array (copy)."""
+        return self.values[:, [self._column_index[name] for name in names]]
+
+    def total_confidence(self) -> np.ndarray:
+        """Mean confidence per trace (NaN for traces without responses)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.confidence_sums / self.response_counts
+
+    def response_completeness(self) -> np.ndarray:
+        """Mean response completeness per trace."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.completeness_sums / self.response_counts
+
+    def aggregate_risk(self) -> np.ndarray:
+        """Mean of the present risk columns per trace (NaN when none)."""
+        risk_columns = [index for name, index in self._column_index.items() if "risk" in name.lower()]
+        risk = self.values[:, risk_columns]
+        present = ~np.isnan(risk)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(present, risk, 0.0).sum(axis=1) / present.sum(axis=1)
+
+    def recommendations(self) -> np.ndarray:
+        """
+        Decision labels for every trace.
+
+        Same rules as MLModelEnhancer.get_decision_recommendation: decline if
+        any response has risk_score > 0.7, approve if at least 70% of
+        responses have approval_probability > 0.5, otherwise review.
+
+        Returns:
+            Array of "approve", "decline", "review" or "insufficient_data"
+        """
+        labels = np.where(
+            self.high_risk_counts > 0, DECLINE,
+            np.where(self.approving_counts >= self.response_counts * 0.7, APPROVE, REVIEW),
+        )
+        return np.where(self.response_counts == 0, INSUFFICIENT_DATA, labels)
+
+
+def build_feature_matrix(traces: Iterable[Tuple[str, Iterable[Any]]],
+                         columns: Optional[List[str]] = None) -> FeatureMatrix:
+    """
+    Build a feature matrix from many traces.
+
+    Args:
+        traces: (trace_id, responses) pairs; responses are ParsedAgentResponse
+            objects or dicts with agent_name, ml_ready_data and confidence_score
+        columns: Column schema (defaults to FEATURE_COLUMNS); other features are ignored
+
+    Returns:
+        FeatureMatrix with one row per trace
+    """
+    columns = list(columns or FEATURE_COLUMNS)
+    column_index = {name: index for index, name in enumerate(columns)}
+
+    capacity = 1024
+    values = np.full((capacity, len(columns)), np.nan)
+    trace_ids: List[str] = []
+    # Per-response arrays, reduced per trace with bincount at the end
+    response_rows: List[int] = []
+    confidences: List[float] = []
+    completeness: List[float] = []
+    risk_scores: List[float] = []
+    approval_probabilities: List[float] = []
+    ignored = 0
+
+    for row, (trace_id, responses) in enumerate(traces):
+        if row == capacity:
+            capacity *= 2
+            grown = np.full((capacity, len(columns)), np.nan)
+            grown[:row] = values
+            values = grown
+        trace_ids.append(trace_id)
+        row_values = values[row]
+
+        for response in responses:
+            agent_name, ml_ready_data, confidence = _response_fields(response)
+            for key, value in ml_ready_data.items():
+                index = column_index.get(f"{agent_name}_{key}")
+                if index is None:
+                    ignored += 1
+                else:
+                    row_values[index] = value
+            response_rows.append(row)
+            confidences.append(confidence)
+            completeness.append(ml_ready_data.get("response_completeness", 0))
+            risk_scores.append(ml_ready_data.get("risk_score", 0))
+            approval_probabilities.append(ml_ready_data.get("approval_probability", 0))
+
+    rows = len(trace_ids)
+    response_rows_array = np.asarray(response_rows, dtype=np.int64)
+
+    def per_trace(weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(response_rows_array, weights=weights, minlength=rows)[:rows]
+
+    return FeatureMatrix(
+        trace_ids=trace_ids,
+        columns=columns,
+        values=values[:rows],
+        response_counts=per_trace().astype(np.int64),
+        confidence_sums=per_trace(np.asarray(confidences, dtype=np.float64)),
+        completeness_sums=per_trace(np.asarray(completeness, dtype=np.float64)),
+        high_risk_counts=per_trace((np.asarray(risk_scores, dtype=np.float64) > 0.7).astype(np.float64)).astype(np.int64),
+        approving_counts=per_trace((np.asarray(approval_probabilities, dtype=np.float64) > 0.5).astype(np.float64)).astype(np.int64),
+        ignored_features=ignored,
+    )
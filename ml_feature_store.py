@@ -0,0 +1,392 @@
+"""
+Columnar On-Disk Feature Store for Parsed Agent Features
+
+Append-only store for ParsedAgentResponse.ml_ready_data so training and
+analysis jobs can scan millions of rows without loading JSON. Rows are
+buffered in memory and written as immutable chunks of .npy column files,
+partitioned by date and agent:
+
+    <root>/date=2025-01-31/agent=okra/chunk-<ns>-<id>/
+        meta.json                column names and row count
+        trace_id.npy             fixed-width bytes, row order
+        timestamp.npy            epoch seconds
+        confidence_score.npy
+        <feature>.npy            float64, NaN where a row lacks the feature
+        trace_index.npy          row positions sorted by trace_id
+        trace_sorted.npy         trace ids in sorted order (binary search)
+
+Reads memory-map the column files, load only the projected columns and use
+the sorted trace index for trace_id lookups. Chunks are written to a
+temporary directory and renamed into place, so readers never see partial
+chunks and several processes can append to the same store.
+
+Compaction writes a merged chunk whose meta.json lists the chunks it
+replaces; readers skip replaced chunks from the moment the merged one is
+renamed in, so a row is never seen twice. Replaced chunks stay on disk for a
+grace period (readers that listed the partition earlier may still open
+them) and are removed by a later compaction. Compactors hold a per-partition
+lock file, so concurrent compactions of a partition never merge the same
+chunks twice.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+BASE_COLUMNS = ["trace_id", "timestamp", "confidence_score"]
+TRACE_INDEX_FILES = ["trace_index", "trace_sorted"]
+
+COMPACT_LOCK_FILE = ".compact.lock"
+
+# How long replaced chunks are kept for readers that listed the partition before they were replaced
+REPLACED_CHUNK_GRACE_SECONDS = 300.0
+
+
+def _epoch_seconds(timestamp: Any) -> float:
+    """ISO-8601 string, datetime or number to epoch seconds."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return time.time()
+
+
+def _partition_date(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _chunk_created(name: str) -> float:
+    """Epoch seconds a chunk was written, from its chunk-<ns>-<id> name."""
+    return int(name.split("-")[1]) / 1e9
+
+
+class FeatureStore:
+    """Append-only, date/agent partitioned columnar store of ML features."""
+
+    def __init__(self, root: str, chunk_rows: int = 65536):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the partitions (created if missing)
+            chunk_rows: Buffered rows per partition before a chunk is written
+        """
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self._buffers: Dict[Tuple[str, str], List[Tuple[str, float, float, Dict[str, Any]]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # Writing
+
+    def append(self, trace_id: str, parsed_response: Any):
+        """
+        Buffer one parsed agent response.
+
+        Args:
+            trace_id: Trace the response belongs to
+            parsed_response: ParsedAgentResponse (or a dict with agent_name,
+                ml_ready_data, confidence_score and timestamp)
+        """
+        if isinstance(parsed_response, dict):
+            agent_name = parsed_response["agent_name"]
+            ml_ready_data = parsed_response.get("ml_ready_data", {})
+            confidence = parsed_response.get("confidence_score", 0.5)
+            timestamp = parsed_response.get("timestamp")
+        else:
+            agent_name = parsed_response.agent_name
+            ml_ready_data = parsed_response.ml_ready_data
+            confidence = parsed_response.confidence_score
+            timestamp = parsed_response.timestamp
+        self.append_row(trace_id, agent_name, ml_ready_data, confidence, timestamp)
+
+    def append_row(self, trace_id: str, agent_name: str, features: Dict[str, Any],
+                   confidence: float = 0.5, timestamp: Any = None):
+        """Buffer one row of features; non-numeric features are not stored."""
+        epoch = _epoch_seconds(timestamp)
+        key = (_partition_date(epoch), agent_name)
+        with self._lock:
+            buffer = self._buffers[key]
+            buffer.append((trace_id, epoch, float(confidence), features))
+            if len(buffer) >= self.chunk_rows:
+                self._write_chunk(key, self._buffers.pop(key))
+
+    def append_many(self, rows: Iterable[Tuple[str, Any]]):
+        """Buffer (trace_id, parsed_response) pairs."""
+        for trace_id, parsed_response in rows:
+            self.append(trace_id, parsed_response)
+
+    def flush(self):
+        """Write every buffered row to disk."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, defaultdict(list)
+            for key, rows in buffers.items():
+                if rows:
+                    self._write_chunk(key, rows)
+
+    def _write_chunk(self, key: Tuple[str, str], rows: List[Tuple[str, float, float, Dict[str, Any]]],
+                     replaces: Optional[List[str]] = None):
+        date, agent_name = key
+        feature_names: List[str] = []
+        seen = set()
+        for _, _, _, features in rows:
+            for name, value in features.items():
+                if name not in seen and isinstance(value, (int, float)):
+                    seen.add(name)
+                    feature_names.append(name)
+
+        columns: Dict[str, np.ndarray] = {
+            "trace_id": np.array([row[0].encode() for row in rows], dtype=np.bytes_),
+            "timestamp": np.array([row[1] for row in rows], dtype=np.float64),
+            "confidence_score": np.array([row[2] for row in rows], dtype=np.float64),
+        }
+        for name in feature_names:
+            column = np.full(len(rows), np.nan)
+            for position, (_, _, _, features) in enumerate(rows):
+                value = features.get(name)
+                if isinstance(value, (int, float)):
+                    column[position] = value
+            columns[name] = column
+        order = np.argsort(columns["trace_id"], kind="stable")
+        columns["trace_index"] = order.astype(np.int64)
+        columns["trace_sorted"] = columns["trace_id"][order]
+
+        partition = self._partition_dir(date, agent_name)
+        os.makedirs(partition, exist_ok=True)
+        name = f"chunk-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(partition, f".{name}.tmp")
+        os.makedirs(staging)
+        for column_name, values in columns.items():
+            np.save(os.path.join(staging, f"{column_name}.npy"), values)
+        meta = {"rows": len(rows), "columns": BASE_COLUMNS + feature_names, "date": date, "agent": agent_name}
+        if replaces:
+            meta["replaces"] = replaces
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.rename(staging, os.path.join(partition, name))
+        logger.debug("Wrote %d rows to %s/%s", len(rows), partition, name)
+
+    def compact(self, date: Optional[str] = None, agent: Optional[str] = None,
+                grace_seconds: float = REPLACED_CHUNK_GRACE_SECONDS):
+        """
+        Merge each partition's chunks into one.
+
+        Partitions another process is compacting are skipped.
+
+        Args:
+            date: Only compact this date partition (YYYY-MM-DD)
+            agent: Only compact this agent's partitions
+            grace_seconds: Keep replaced chunks this long after the merged chunk was written
+        """
+        self.flush()
+        for partition_date, agent_name, partition in self._partition_dirs(date, date, agent):
+            with self._compact_lock(partition) as locked:
+                if not locked:
+                    logger.debug("Skipping %s: another compaction holds its lock", partition)
+                    continue
+                metas = self._chunk_metas(partition)
+                self._remove_replaced(partition, metas, grace_seconds)
+                chunks = self._live_chunks(metas)
+                if len(chunks) < 2:
+                    continue
+                rows = []
+                for chunk in chunks:
+                    data = self._read_chunk(os.path.join(partition, chunk), None)
+                    features = [name for name in data if name not in BASE_COLUMNS]
+                    for position in range(len(data["trace_id"])):
+                        row_features = {name: float(data[name][position]) for name in features
+                                        if not np.isnan(data[name][position])}
+                        rows.append((data["trace_id"][position].decode(), float(data["timestamp"][position]),
+                                     float(data["confidence_score"][position]), row_features))
+                # Carry over what the merged chunks replaced, so those stay hidden until they are removed
+                replaces = set(chunks)
+                for chunk in chunks:
+                    replaces.update(name for name in metas[chunk].get("replaces", []) if name in metas)
+                self._write_chunk((partition_date, agent_name), rows, sorted(replaces))
+
+    @contextmanager
+    def _compact_lock(self, partition: str) -> Iterator[bool]:
+        """Non-blocking exclusive lock on a partition's compaction, released when the holder exits or dies."""
+        with open(os.path.join(partition, COMPACT_LOCK_FILE), "a+") as f:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                yield False
+                return
+            yield True
+
+    def _remove_replaced(self, partition: str, metas: Dict[str, Dict[str, Any]], grace_seconds: float):
+        """Delete chunks replaced by a merged chunk written more than grace_seconds ago."""
+        cutoff = time.time() - grace_seconds
+        for name, meta in metas.items():
+            if _chunk_created(name) > cutoff:
+                continue
+            for replaced in meta.get("replaces", []):
+                shutil.rmtree(os.path.join(partition, replaced), ignore_errors=True)
+
+    # Reading
+
+    def _partition_dir(self, date: str, agent_name: str) -> str:
+        return os.path.join(self.root, f"date={date}", f"agent={agent_name}")
+
+    def _partition_dirs(self, start_date: Optional[str], end_date: Optional[str],
+                        agent: Optional[str]) -> Iterator[Tuple[str, str, str]]:
+        """(date, agent, partition directory) for matching partitions, oldest first."""
+        for date_dir in sorted(os.listdir(self.root)):
+            if not date_dir.startswith("date="):
+                continue
+            date = date_dir[len("date="):]
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+            for agent_dir in sorted(os.listdir(os.path.join(self.root, date_dir))):
+                agent_name = agent_dir[len("agent="):]
+                if agent and agent_name != agent:
+                    continue
+                yield date, agent_name, os.path.join(self.root, date_dir, agent_dir)
+
+    def _chunk_metas(self, partition: str) -> Dict[str, Dict[str, Any]]:
+        """meta.json of every chunk in a partition by chunk name, oldest first."""
+        metas = {}
+        for name in sorted(os.listdir(partition)):
+            if not name.startswith("chunk-"):
+                continue
+            try:
+                with open(os.path.join(partition, name, "meta.json")) as f:
+                    metas[name] = json.load(f)
+            except FileNotFoundError:
+                # Replaced and removed since the listing
+                continue
+        return metas
+
+    @staticmethod
+    def _live_chunks(metas: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Names of the chunks no merged chunk replaces."""
+        replaced = {name for meta in metas.values() for name in meta.get("replaces", [])}
+        return [name for name in metas if name not in replaced]
+
+    def _partitions(self, start_date: Optional[str], end_date: Optional[str],
+                    agent: Optional[str]) -> Iterator[Tuple[str, str, List[str]]]:
+        """(date, agent, live chunk directories) for matching partitions, oldest first."""
+        for date, agent_name, partition in self._partition_dirs(start_date, end_date, agent):
+            chunks = self._live_chunks(self._chunk_metas(partition))
+            yield date, agent_name, [os.path.join(partition, name) for name in chunks]
+
+    def _read_chunk(self, chunk: str, columns: Optional[List[str]]) -> Dict[str, np.ndarray]:
+        with open(os.path.join(chunk, "meta.json")) as f:
+            meta = json.load(f)
+        rows = meta["rows"]
+        names = meta["columns"] if columns is None else columns
+        data = {}
+        for name in names:
+            if name in meta["columns"] or name in TRACE_INDEX_FILES:
+                data[name] = np.load(os.path.join(chunk, f"{name}.npy"), mmap_mode="r")
+            else:
+                data[name] = np.full(rows, np.nan)
+        return data
+
+    def scan(self, columns: Optional[List[str]] = None, agent: Optional[str] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None
+             ) -> Iterator[Tuple[str, str, Dict[str, np.ndarray]]]:
+        """
+        Iterate over chunks as memory-mapped column arrays.
+
+        Args:
+            columns: Columns to load (None for every column in each chunk);
+                columns a chunk lacks come back as NaN
+            agent: Only this agent's partitions
+            start_date: First date partition to include (YYYY-MM-DD)
+            end_date: Last date partition to include (YYYY-MM-DD)
+
+        Yields:
+            (date, agent, {column: array}) per chunk
+        """
+        for date, agent_name, chunks in self._partitions(start_date, end_date, agent):
+            for chunk in chunks:
+                yield date, agent_name, self._read_chunk(chunk, columns)
+
+    def read(self, columns: List[str], agent: Optional[str] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Read projected columns from all matching chunks into contiguous arrays.
+
+        Args:
+            columns: Columns to load
+            agent: Only this agent's partitions
+            start_date: First date partition to include (YYYY-MM-DD)
+            end_date: Last date partition to include (YYYY-MM-DD)
+
+        Returns:
+            Dictionary of column name to concatenated array
+        """
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+        for _, _, data in self.scan(columns, agent, start_date, end_date):
+            for name in columns:
+                parts[name].append(data[name])
+        result = {}
+        for name, arrays in parts.items():
+            if arrays:
+                result[name] = np.concatenate(arrays)
+            else:
+                result[name] = np.array([], dtype=np.bytes_ if name == "trace_id" else np.float64)
+        return result
+
+    def lookup(self, trace_id: str, agent: Optional[str] = None,
+               start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find every stored row for a trace.
+
+        Args:
+            trace_id: Trace to look up
+            agent: Only this agent's partitions
+            start_date: First date partition to search (YYYY-MM-DD)
+            end_date: Last date partition to search (YYYY-MM-DD)
+
+        Returns:
+            Rows as dictionaries with agent_name, timestamp, confidence_score and features
+        """
+        needle = np.bytes_(trace_id.encode())
+        matches = []
+        for _, agent_name, chunks in self._partitions(start_date, end_date, agent):
+            for chunk in chunks:
+                index = self._read_chunk(chunk, TRACE_INDEX_FILES)
+                left = np.searchsorted(index["trace_sorted"], needle, side="left")
+                right = np.searchsorted(index["trace_sorted"], needle, side="right")
+                if left == right:
+                    continue
+                data = self._read_chunk(chunk, None)
+                features = [name for name in data if name not in BASE_COLUMNS]
+                for position in sorted(index["trace_index"][left:right]):
+                    matches.append({
+                        "trace_id": trace_id,
+                        "agent_name": agent_name,
+                        "timestamp": float(data["timestamp"][position]),
+                        "confidence_score": float(data["confidence_score"][position]),
+                        "features": {name: float(data[name][position]) for name in features
+                                     if not np.isnan(data[name][position])},
+                    })
+        matches.sort(key=lambda row: row["timestamp"])
+        return matches
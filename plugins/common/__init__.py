@@ -6,12 +6,26 @@ that integrate with e-commerce platforms like WooCommerce, Shopify, and BigComme
 """
 
 from .base_adapter import BasePluginAdapter
-from .orca_client import OrcaMCPClient
+from .async_adapter import AsyncPluginAdapter
+from .cart_mapping import CART_MAPPINGS, get_cart_mapping
+from .negotiation_cache import NegotiationCache
+from .orca_client import OrcaMCPClient, get_orca_client, close_orca_clients
+from .platforms import PLATFORM_ADAPTERS, resolve_adapter_class
+from .webhook_outbox import WebhookOutbox
 from .webhook_simulator import WebhookSimulator
 
 __all__ = [
     'BasePluginAdapter',
+    'AsyncPluginAdapter',
+    'CART_MAPPINGS',
+    'get_cart_mapping',
+    'NegotiationCache',
     'OrcaMCPClient', 
+    'get_orca_client',
+    'close_orca_clients',
+    'PLATFORM_ADAPTERS',
+    'resolve_adapter_class',
+    'WebhookOutbox',
     'WebhookSimulator'
 ]
 
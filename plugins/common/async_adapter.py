@@ -0,0 +1,281 @@
+"""
+Async Plugin Adapter
+
+Asyncio variant of BasePluginAdapter. The Orca negotiation and the webhook
+POST are awaited on a pooled aiohttp session instead of blocking, so a burst
+of checkouts (e.g. a flash sale) runs concurrently rather than one after the
+other. process_checkouts() runs many carts with a bounded number in flight
+and yields each result as soon as it completes.
+
+aiohttp is optional: without it the synchronous API keeps working and only
+the async methods raise.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from .base_adapter import BasePluginAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# Checkouts in flight at once in process_checkouts
+DEFAULT_MAX_CONCURRENCY = 20
+
+
+async def _session_lifetime(session: "aiohttp.ClientSession") -> AsyncGenerator[None, None]:
+    """
+    Hold a session open until closed or until its event loop shuts down.
+    
+    Started on the session's loop, the generator is registered with that loop,
+    so asyncio.run() closes the session (while the loop can still release its
+    sockets) even if the adapter is never closed explicitly.
+    """
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+async def _close_session(guard: AsyncGenerator[None, None], loop: asyncio.AbstractEventLoop):
+    """Close a session on the event loop its connections belong to."""
+    if loop.is_closed():
+        # asyncio.run already closed it while shutting the loop down
+        return
+    if loop is not asyncio.get_running_loop() and loop.is_running():
+        # Still serving another thread; close it there
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(guard.aclose(), loop))
+    else:
+        await guard.aclose()
+
+
+class AsyncPluginAdapter(BasePluginAdapter):
+    """
+    Plugin adapter with an asyncio checkout pipeline.
+    
+    Subclasses implement the same cart/response transforms as for
+    BasePluginAdapter; both the sync and async pipelines use them.
+    """
+    
+    def __init__(self, platform_name: str, orca_endpoint: str = "http://localhost:8080",
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize the plugin adapter.
+        
+        Args:
+            platform_name: Name of the e-commerce platform
+            orca_endpoint: Orca MCP endpoint URL
+            max_concurrency: Checkouts in flight at once (also the connection pool size)
+        """
+        super().__init__(platform_name, orca_endpoint)
+        self.max_concurrency = max_concurrency
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._session_guard: Optional[AsyncGenerator[None, None]] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Pooled session for the running event loop, created on first use; a previous loop's session is closed."""
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async adapter pipeline: pip install aiohttp")
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # Sessions are bound to the loop they were created on
+            previous_guard, previous_loop = self._session_guard, self._session_loop
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': f'OCN-{self.platform_name}-Plugin/1.0'}
+            )
+            self._session_guard = _session_lifetime(self._session)
+            await self._session_guard.asend(None)
+            self._session_loop = loop
+            if previous_guard is not None:
+                await _close_session(previous_guard, previous_loop)
+        return self._session
+    
+    async def aclose(self):
+        """Close the pooled session."""
+        guard, loop = self._session_guard, self._session_loop
+        self._session = None
+        self._session_guard = None
+        self._session_loop = None
+        if guard is not None:
+            await _close_session(guard, loop)
+    
+    async def __aenter__(self) -> "AsyncPluginAdapter":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def call_orca_negotiate_checkout_async(self, cart_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call Orca MCP negotiateCheckout without blocking the event loop.
+        
+        Args:
+            cart_data: Cart data in Orca MCP format
+        
+        Returns:
+            Orca MCP response dictionary
+        """
+        key, cached = self._cached_negotiation(cart_data)
+        if cached is not None:
+            self.logger.info(f"Orca negotiation served from cache for {self.platform_name}")
+            return cached
+        
+        session = await self._get_session()
+        mcp_request = {
+            "verb": "negotiateCheckout",
+            "args": cart_data
+        }
+        try:
+            async with session.post(
+                f"{self.orca_endpoint.rstrip('/')}/mcp/invoke",
+                json=mcp_request,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise Exception(f"Orca MCP failed with status {response.status}: {text}")
+                result = await response.json()
+        except aiohttp.ClientError as e:
+            self.logger.error(f"Orca negotiation failed: Orca MCP request failed: {e}")
+            raise Exception(f"Orca MCP request failed: {e}")
+        except asyncio.TimeoutError:
+            self.logger.error("Orca negotiation failed: Orca MCP request timed out")
+            raise Exception("Orca MCP request timed out")
+        except Exception as e:
+            self.logger.error(f"Orca negotiation failed: {e}")
+            raise
+        
+        self.logger.info(f"Orca negotiation completed for {self.platform_name}")
+        self._cache_negotiation(key, result)
+        return result
+    
+    async def publish_to_webhook_async(self, webhook_url: str, data: Dict[str, Any]) -> bool:
+        """
+        Publish data to a webhook endpoint without blocking the event loop.
+        
+        Args:
+            webhook_url: Webhook endpoint URL
+            data: Data to publish
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        session = await self._get_session()
+        try:
+            async with session.post(
+                webhook_url,
+                json=data,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    self.logger.info(f"Webhook published successfully to {webhook_url}")
+                    return True
+                self.logger.error(f"Webhook failed with status {response.status}")
+                return False
+        except Exception as e:
+            self.logger.error(f"Webhook publishing failed: {e}")
+            return False
+    
+    async def process_checkout_async(self, platform_cart: Dict[str, Any],
+                                     webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a checkout request through Orca negotiation, asynchronously.
+        
+        Args:
+            platform_cart: Platform-specific cart data
+            webhook_url: Optional webhook URL to publish results
+        
+        Returns:
+            Processing result dictionary (same shape as process_checkout)
+        """
+        try:
+            orca_request = self.transform_cart_to_orca_request(platform_cart)
+            orca_response = await self.call_orca_negotiate_checkout_async(orca_request)
+            platform_response = self.transform_orca_response_to_platform(orca_response)
+            
+            webhook_published = False
+            if webhook_url:
+                webhook_data = {
+                    'platform': self.platform_name,
+                    'timestamp': datetime.now().isoformat(),
+                    'orca_response': orca_response,
+                    'platform_response': platform_response
+                }
+                if self.webhook_outbox is not None:
+                    # Queued for background delivery; the checkout does not wait on the merchant.
+                    # The outbox write is a SQLite commit, so it runs off the event loop
+                    webhook_published = await asyncio.to_thread(self.send_webhook, webhook_url, webhook_data)
+                else:
+                    webhook_published = await self.publish_to_webhook_async(webhook_url, webhook_data)
+            
+            return {
+                'success': True,
+                'platform': self.platform_name,
+                'orca_response': orca_response,
+                'platform_response': platform_response,
+                'webhook_published': webhook_published
+            }
+        
+        except Exception as e:
+            self.logger.error(f"Checkout processing failed: {e}")
+            return {
+                'success': False,
+                'platform': self.platform_name,
+                'error': str(e),
+                'webhook_published': False
+            }
+    
+    async def process_checkouts(self, platform_carts: Iterable[Dict[str, Any]],
+                                webhook_url: Optional[str] = None,
+                                max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Process many checkouts concurrently, yielding results as they complete.
+        
+        At most max_concurrency checkouts are in flight; the next cart is
+        started as soon as one finishes, and carts are read from the iterable
+        only as slots free up.
+        
+        Args:
+            platform_carts: Platform-specific cart data
+            webhook_url: Optional webhook URL to publish each result
+            max_concurrency: Checkouts in flight at once (defaults to the adapter's)
+        
+        Yields:
+            (index of the cart in platform_carts, processing result dictionary),
+            in completion order
+        """
+        limit = max(1, max_concurrency or self.max_concurrency)
+        carts = iter(enumerate(platform_carts))
+        in_flight: Dict[asyncio.Task, int] = {}
+        
+        def start_next() -> bool:
+            try:
+                index, cart = next(carts)
+            except StopIteration:
+                return False
+            in_flight[asyncio.ensure_future(self.process_checkout_async(cart, webhook_url))] = index
+            return True
+        
+        try:
+            while len(in_flight) < limit and start_next():
+                pass
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = in_flight.pop(task)
+                    while len(in_flight) < limit and start_next():
+                        pass
+                    yield index, task.result()
+        finally:
+            # The consumer stopped early or was cancelled
+            for task in in_flight:
+                task.cancel()
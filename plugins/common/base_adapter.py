@@ -5,11 +5,13 @@ Abstract base class for OCN plugin adapters that integrate with e-commerce platf
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 import json
 import logging
 from datetime import datetime
 
+from .negotiation_cache import make_fingerprint
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +34,10 @@ class BasePluginAdapter(ABC):
         self.platform_name = platform_name
         self.orca_endpoint = orca_endpoint
         self.logger = logging.getLogger(f"ocn.plugin.{platform_name.lower()}")
+        # When set (a WebhookOutbox), checkout webhooks are queued for background delivery
+        self.webhook_outbox = None
+        # When set (a NegotiationCache), repeated negotiations of the same cart are served from it
+        self.negotiation_cache = None
     
     @abstractmethod
     def transform_cart_to_orca_request(self, platform_cart: Dict[str, Any]) -> Dict[str, Any]:
@@ -59,6 +65,36 @@ class BasePluginAdapter(ABC):
         """
         pass
     
+    def _cached_negotiation(self, cart_data: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Look up a negotiation in the negotiation cache.
+        
+        Args:
+            cart_data: Cart data in Orca MCP format
+            
+        Returns:
+            (fingerprint, cached Orca response or None); the fingerprint is None
+            when there is no cache or it could not be read
+        """
+        if self.negotiation_cache is None:
+            return None, None
+        try:
+            key = make_fingerprint(self.orca_endpoint, cart_data)
+            return key, self.negotiation_cache.get(key)
+        except Exception as e:
+            # A broken cache must not fail the checkout
+            self.logger.warning(f"Negotiation cache lookup failed: {e}")
+            return None, None
+    
+    def _cache_negotiation(self, key: Optional[str], response: Dict[str, Any]):
+        """Store a successful negotiation under its fingerprint."""
+        if key is None or self.negotiation_cache is None:
+            return
+        try:
+            self.negotiation_cache.put(key, response)
+        except Exception as e:
+            self.logger.warning(f"Negotiation cache store failed: {e}")
+    
     def call_orca_negotiate_checkout(self, cart_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Call Orca MCP negotiateCheckout with the provided cart data.
@@ -69,19 +105,61 @@ class BasePluginAdapter(ABC):
         Returns:
             Orca MCP response dictionary
         """
+        key, cached = self._cached_negotiation(cart_data)
+        if cached is not None:
+            self.logger.info(f"Orca negotiation served from cache for {self.platform_name}")
+            return cached
+        
         try:
             # Import here to avoid circular imports
-            from .orca_client import OrcaMCPClient
+            from .orca_client import get_orca_client
             
-            client = OrcaMCPClient(self.orca_endpoint)
+            # Shared per endpoint, so connections are reused across checkouts and adapters
+            client = get_orca_client(self.orca_endpoint)
             response = client.negotiate_checkout(cart_data)
             
             self.logger.info(f"Orca negotiation completed for {self.platform_name}")
-            return response
             
         except Exception as e:
             self.logger.error(f"Orca negotiation failed: {e}")
             raise
+        
+        self._cache_negotiation(key, response)
+        return response
+    
+    def call_orca_negotiate_checkout_batch(self, carts: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Call Orca MCP negotiateCheckout for many carts in one round trip.
+        
+        Args:
+            carts: Cart data in Orca MCP format
+            
+        Returns:
+            One entry per cart, in order: the Orca MCP response dictionary, or
+            the Exception describing why that cart failed
+        """
+        from .orca_client import get_orca_client
+        
+        results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(carts)
+        keys: List[Optional[str]] = [None] * len(carts)
+        misses: List[int] = []
+        for index, cart in enumerate(carts):
+            keys[index], results[index] = self._cached_negotiation(cart)
+            if results[index] is None:
+                misses.append(index)
+        
+        if misses:
+            fetched = get_orca_client(self.orca_endpoint).negotiate_checkout_batch([carts[i] for i in misses])
+            for index, result in zip(misses, fetched):
+                results[index] = result
+                if not isinstance(result, Exception):
+                    self._cache_negotiation(keys[index], result)
+        
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        self.logger.info(f"Orca batch negotiation completed for {self.platform_name}: "
+                         f"{len(results) - failed} succeeded, {failed} failed, "
+                         f"{len(carts) - len(misses)} from cache")
+        return results
     
     def publish_to_webhook(self, webhook_url: str, data: Dict[str, Any]) -> bool:
         """
@@ -120,6 +198,27 @@ class BasePluginAdapter(ABC):
             self.logger.error(f"Webhook publishing failed: {e}")
             return False
     
+    def send_webhook(self, webhook_url: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue data on the webhook outbox, or publish it directly if there is none.
+        
+        Args:
+            webhook_url: Webhook endpoint URL
+            data: Data to publish
+            
+        Returns:
+            True if queued or published, False otherwise
+        """
+        if self.webhook_outbox is None:
+            return self.publish_to_webhook(webhook_url, data)
+        try:
+            self.webhook_outbox.enqueue(webhook_url, data,
+                                        headers={'User-Agent': f'OCN-{self.platform_name}-Plugin/1.0'})
+            return True
+        except Exception as e:
+            self.logger.error(f"Webhook queueing failed: {e}")
+            return False
+    
     def process_checkout(self, platform_cart: Dict[str, Any], webhook_url: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a checkout request through Orca negotiation.
@@ -149,7 +248,7 @@ class BasePluginAdapter(ABC):
                     'orca_response': orca_response,
                     'platform_response': platform_response
                 }
-                self.publish_to_webhook(webhook_url, webhook_data)
+                self.send_webhook(webhook_url, webhook_data)
             
             return {
                 'success': True,
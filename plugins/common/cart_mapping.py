@@ -0,0 +1,257 @@
+"""
+Declarative Cart Mappings for Platform Adapters
+
+Describes, per platform, how a platform cart maps onto the Orca MCP
+negotiateCheckout request and how the Orca response maps back, and compiles
+each description into plain Python functions once at import (the same
+approach as llm_extraction_spec). The adapters call the compiled functions
+instead of hand-written .get() chains:
+
+- transform_cart: platform cart -> Orca request, with shared sub-objects
+  (e.g. customer) read once and constants such as the rail candidates
+  emitted as literals
+- transform_response: Orca response -> platform response, with the
+  platform's rail -> payment method mapping bound in
+
+Adding a platform means adding an entry to CART_MAPPINGS.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from spec_compiler import compile_function
+
+# Rails offered to Orca for every platform checkout
+DEFAULT_RAIL_CANDIDATES = [
+    {"rail_type": "credit", "base_cost_bps": 150.0, "settlement_days": 1, "risk_score": 0.3},
+    {"rail_type": "debit", "base_cost_bps": 100.0, "settlement_days": 2, "risk_score": 0.2},
+    {"rail_type": "ACH", "base_cost_bps": 50.0, "settlement_days": 1, "risk_score": 0.1},
+]
+
+# Request specs: output key -> field spec ({"value": constant} or {"from": cart
+# path, "default": ..., "transform": ...}) or a nested section of the same form.
+# Paths are dotted keys; "key[0]" indexes a list (defaulting to [{}]).
+# Response specs: key naming the platform payment method, and the rail mapping.
+CART_MAPPINGS: Dict[str, Dict[str, Any]] = {
+    "shopify": {
+        "request": {
+            "cart_summary": {
+                "total_amount": {"from": "total_price", "default": 0, "transform": "cents"},
+                "currency": {"from": "currency", "default": "USD"},
+                "item_count": {"from": "line_items", "default": [], "transform": "quantity_sum"},
+                "merchant_id": {"from": "shop_domain", "default": "shopify-store"},
+                "merchant_category": {"from": "category", "default": "general"},
+                "channel": {"value": "online"},
+            },
+            "rail_candidates": {"value": DEFAULT_RAIL_CANDIDATES},
+            "customer_context": {
+                "customer_id": {"from": "customer.id", "default": "guest"},
+                "email": {"from": "customer.email", "default": ""},
+                "shipping_country": {"from": "shipping_address.country_code", "default": "US"},
+                "platform": {"value": "shopify"},
+                "shop_domain": {"from": "shop_domain", "default": "shopify-store"},
+            },
+            "deterministic_seed": {"value": 42},
+        },
+        "response": {
+            "method_key": "gateway",
+            "rail_methods": {"credit": "stripe", "debit": "stripe", "ACH": "shopify_payments", "wire": "manual"},
+            "default_method": "stripe",
+        },
+    },
+    "woocommerce": {
+        "request": {
+            "cart_summary": {
+                "total_amount": {"from": "total", "default": 0, "transform": "float"},
+                "currency": {"from": "currency", "default": "USD"},
+                "item_count": {"from": "items", "default": [], "transform": "quantity_sum"},
+                "merchant_id": {"from": "store_id", "default": "woocommerce_store"},
+                "merchant_category": {"from": "category", "default": "general"},
+                "channel": {"value": "online"},
+            },
+            "rail_candidates": {"value": DEFAULT_RAIL_CANDIDATES},
+            "customer_context": {
+                "customer_id": {"from": "customer.id", "default": "guest"},
+                "email": {"from": "customer.email", "default": ""},
+                "shipping_country": {"from": "shipping.country", "default": "US"},
+                "shipping_method": {"from": "shipping.method", "default": "standard"},
+                "payment_method": {"from": "payment_method", "default": "card"},
+                "platform": {"value": "woocommerce"},
+            },
+            "deterministic_seed": {"value": 42},
+        },
+        "response": {
+            "method_key": "payment_method",
+            "rail_methods": {"credit": "credit_card", "debit": "debit_card", "ACH": "bank_transfer",
+                             "wire": "wire_transfer"},
+            "default_method": "credit_card",
+        },
+    },
+    "bigcommerce": {
+        "request": {
+            "cart_summary": {
+                "total_amount": {"from": "base_total", "default": 0, "transform": "float"},
+                "currency": {"from": "currency", "default": "USD"},
+                "item_count": {"from": "line_items.physical_items", "default": [], "transform": "quantity_sum"},
+                "merchant_id": {"from": "store_hash", "default": "bigcommerce-store"},
+                "merchant_category": {"from": "category", "default": "general"},
+                "channel": {"value": "online"},
+            },
+            "rail_candidates": {"value": DEFAULT_RAIL_CANDIDATES},
+            "customer_context": {
+                "customer_id": {"from": "customer.id", "default": "guest"},
+                "email": {"from": "customer.email", "default": ""},
+                "shipping_country": {"from": "shipping_addresses[0].country_iso2", "default": "US"},
+                "platform": {"value": "bigcommerce"},
+                "store_hash": {"from": "store_hash", "default": "bigcommerce-store"},
+            },
+            "deterministic_seed": {"value": 42},
+        },
+        "response": {
+            "method_key": "payment_provider",
+            "rail_methods": {"credit": "stripe", "debit": "stripe", "ACH": "square", "wire": "manual"},
+            "default_method": "stripe",
+        },
+    },
+}
+
+# Expression templates for field transforms; {v} is the value read from the cart
+_TRANSFORMS = {
+    "identity": "{v}",
+    "float": "float({v})",
+    "cents": "float({v}) / 100",
+    "quantity_sum": "sum([item.get('quantity', 1) for item in {v}])",
+}
+
+_SEGMENT = re.compile(r"^(\w+)(?:\[(\d+)\])?$")
+
+# Scores copied into rail_details (for the chosen rail) and into all_rails, in output order
+_CHOSEN_RAIL_SCORES = ("cost_score", "speed_score", "risk_score", "final_score")
+_ALL_RAILS_SCORES = ("final_score", "cost_score", "speed_score", "risk_score")
+
+
+def _parse_path(path: str) -> List[Tuple[str, Any]]:
+    """Segments of a cart path as (key, list index or None)."""
+    segments = []
+    for part in path.split("."):
+        match = _SEGMENT.match(part)
+        if match is None:
+            raise ValueError(f"Invalid cart path: {path}")
+        segments.append((match.group(1), int(match.group(2)) if match.group(2) is not None else None))
+    return segments
+
+
+class CompiledCartMapping:
+    """
+    Generated transform functions for one platform's mapping.
+    
+    Attributes:
+        transform_cart: platform cart -> Orca MCP request
+        transform_response: Orca MCP response -> platform response
+    """
+    
+    def __init__(self, platform: str, spec: Dict[str, Any]):
+        self.platform = platform
+        response = spec["response"]
+        self.method_key: str = response["method_key"]
+        self.rail_methods: Dict[str, str] = dict(response["rail_methods"])
+        self.default_method: str = response["default_method"]
+        self.transform_cart: Callable[[Dict[str, Any]], Dict[str, Any]] = self._compile_cart(spec["request"])
+        self.transform_response: Callable[[Dict[str, Any]], Dict[str, Any]] = self._compile_response()
+    
+    def rail_method(self, rail_type: str) -> str:
+        """Platform payment method for an Orca rail type."""
+        return self.rail_methods.get(rail_type, self.default_method)
+    
+    def _compile_cart(self, request: Dict[str, Any]) -> Callable:
+        prefixes: Dict[Tuple[Tuple[str, Any], ...], str] = {}
+        hoisted: List[str] = []
+        
+        def read(path: str, default: Any) -> str:
+            """Expression reading path from the cart; shared parents are read once into locals."""
+            segments = _parse_path(path)
+            target = "c"
+            for depth, (key, index) in enumerate(segments[:-1]):
+                prefix = tuple(segments[:depth + 1])
+                local = prefixes.get(prefix)
+                if local is None:
+                    local = f"_p{len(prefixes)}"
+                    if index is None:
+                        hoisted.append(f"    {local} = {target}.get({key!r}, {{}})")
+                    else:
+                        hoisted.append(f"    {local} = {target}.get({key!r}, [{{}}])[{index}]")
+                    prefixes[prefix] = local
+                target = local
+            key, index = segments[-1]
+            if index is not None:
+                return f"{target}.get({key!r}, [{{}}])[{index}]"
+            return f"{target}.get({key!r}, {default!r})"
+        
+        def build(section: Dict[str, Any], indent: str) -> List[str]:
+            lines = []
+            for name, field in section.items():
+                if "value" in field:
+                    lines.append(f"{indent}{name!r}: {field['value']!r},")
+                elif "from" in field:
+                    value = read(field["from"], field.get("default"))
+                    expression = _TRANSFORMS[field.get("transform", "identity")].format(v=value)
+                    lines.append(f"{indent}{name!r}: {expression},")
+                else:
+                    lines.append(f"{indent}{name!r}: {{")
+                    lines.extend(build(field, indent + "    "))
+                    lines.append(f"{indent}}},")
+            return lines
+        
+        body = build(request, "        ")
+        lines = ["def transform_cart(c):"] + hoisted + ["    return {"] + body + ["    }"]
+        return compile_function("transform_cart", lines, {}, "cart mapping")
+    
+    def _compile_response(self) -> Callable:
+        rail_entries = ", ".join(f"{score!r}: rail.get({score!r}, 0.0)" for score in _ALL_RAILS_SCORES)
+        chosen_entries = ", ".join(
+            f"{score!r}: chosen.get({score!r}, 0.0) if chosen else 0.0" for score in _CHOSEN_RAIL_SCORES)
+        lines = [
+            "def transform_response(o):",
+            "    chosen_rail = o.get('chosen_rail', 'credit')",
+            "    explanation = o.get('explanation', {})",
+            "    evaluations = o.get('rail_evaluations', [])",
+            "    chosen = None",
+            "    for rail in evaluations:",
+            "        if rail.get('rail_type') == chosen_rail:",
+            "            chosen = rail",
+            "            break",
+            "    return {",
+            "        'success': True,",
+            f"        {self.method_key!r}: _rail_methods.get(chosen_rail, {self.default_method!r}),",
+            "        'chosen_rail': chosen_rail,",
+            "        'explanation': {",
+            "            'summary': explanation.get('summary', ''),",
+            "            'reasoning': explanation.get('reasoning', ''),",
+            "            'confidence': explanation.get('confidence', 0.0),",
+            "            'key_signals': explanation.get('key_signals', []),",
+            "        },",
+            f"        'rail_details': {{{chosen_entries}}},",
+            f"        'all_rails': [{{'rail_type': rail.get('rail_type'), {rail_entries}}} for rail in evaluations],",
+            "        'timestamp': o.get('timestamp', ''),",
+            "        'trace_id': o.get('trace_id', ''),",
+            "    }",
+        ]
+        return compile_function("transform_response", lines, {"_rail_methods": self.rail_methods}, "cart mapping")
+
+
+_compiled_mappings: Dict[str, CompiledCartMapping] = {
+    platform: CompiledCartMapping(platform, spec) for platform, spec in CART_MAPPINGS.items()
+}
+
+
+def get_cart_mapping(platform: str) -> CompiledCartMapping:
+    """
+    Compiled mapping for a platform.
+    
+    Args:
+        platform: Platform key in CART_MAPPINGS (e.g. 'shopify')
+    
+    Returns:
+        The platform's compiled transforms
+    """
+    return _compiled_mappings[platform]
@@ -0,0 +1,66 @@
+"""
+Negotiation Cache
+
+Caches Orca negotiateCheckout responses keyed by a fingerprint of the
+transformed Orca request, so a shopper refreshing the checkout page (same
+cart_summary, rail_candidates and deterministic_seed) does not trigger a new
+negotiation each time.
+
+Built on the repository's two-tier cache (two_tier_cache, shared with the
+LLM parse cache):
+- an in-memory LRU bounded by entry count
+- an optional SQLite file shared by every plugin worker on the host, bounded
+  by entry count and evicting the least recently used rows
+
+Entries expire after a TTL in both tiers. Only successful responses are cached.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from two_tier_cache import TwoTierCache, canonical_json
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_SHARED_ENTRIES = 100000
+
+
+def make_fingerprint(orca_endpoint: str, orca_request: Dict[str, Any]) -> str:
+    """
+    Fingerprint of a negotiateCheckout call.
+    
+    Args:
+        orca_endpoint: Orca MCP endpoint the request goes to
+        orca_request: Transformed Orca MCP request
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(orca_endpoint.rstrip('/').encode())
+    digest.update(b"\0")
+    digest.update(canonical_json(orca_request).encode())
+    return digest.hexdigest()
+
+
+class NegotiationCache(TwoTierCache):
+    """Two-tier (memory LRU + shared SQLite) cache of Orca negotiation responses."""
+    
+    table = "negotiation_cache"
+    tier = "shared"
+    
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 shared_path: Optional[str] = None, max_shared_entries: int = DEFAULT_MAX_SHARED_ENTRIES):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl: Seconds a cached negotiation stays valid
+            max_entries: Entries kept in the in-memory LRU
+            shared_path: SQLite file shared between plugin workers (None for memory only)
+            max_shared_entries: Entries kept in the shared tier before LRU eviction
+        """
+        super().__init__(max_entries, shared_path, max_disk_entries=max_shared_entries, ttl=ttl)
+        self.max_entries = max_entries
+        self.shared_path = shared_path
+        self.max_shared_entries = max_shared_entries
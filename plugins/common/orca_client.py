@@ -2,30 +2,100 @@
 Orca MCP Client
 
 Client for communicating with Orca MCP negotiateCheckout endpoint.
+
+Clients keep a keep-alive connection pool, so repeated checkouts reuse
+connections instead of opening one per call. get_orca_client() returns one
+shared client per endpoint for every adapter in the process, and
+negotiate_checkout_batch() sends many carts in a single /mcp/invoke round trip.
 """
 
 import requests
 import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Calls per batch request; larger batches are split
+DEFAULT_MAX_BATCH_SIZE = 50
+
+# Statuses an endpoint without the batch verb may answer a batch request with
+BATCH_UNSUPPORTED_STATUS_CODES = frozenset({400, 404, 405, 422, 501})
+
 
 class OrcaMCPClient:
     """
     Client for Orca MCP negotiateCheckout functionality.
+    
+    Safe to share between threads: each thread gets its own requests.Session,
+    and all of them draw connections from one shared pool.
     """
     
-    def __init__(self, orca_endpoint: str = "http://localhost:8080"):
+    def __init__(self, orca_endpoint: str = "http://localhost:8080", pool_maxsize: int = 10,
+                 timeout: float = 30, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
         """
         Initialize the Orca MCP client.
         
         Args:
             orca_endpoint: Orca MCP endpoint URL
+            pool_maxsize: Keep-alive connections kept open to the endpoint
+            timeout: Timeout in seconds for negotiateCheckout calls
+            max_batch_size: Calls per batch request
         """
         self.orca_endpoint = orca_endpoint.rstrip('/')
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
         self.logger = logging.getLogger("ocn.orca.client")
+        # One adapter (and so one urllib3 pool) behind every thread's session
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+        # None until the endpoint has accepted or rejected a batch request
+        self._batch_supported: Optional[bool] = None
+    
+    @property
+    def session(self) -> requests.Session:
+        """Session for the calling thread, sharing the client's connection pool."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            session.headers.update({'Content-Type': 'application/json'})
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+    
+    def _invoke(self, mcp_request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST one MCP request to /mcp/invoke.
+        
+        Args:
+            mcp_request: MCP request with verb and args
+        
+        Returns:
+            Decoded response body
+        """
+        try:
+            response = self.session.post(
+                f"{self.orca_endpoint}/mcp/invoke",
+                json=mcp_request,
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Orca MCP request failed: {e}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+        
+        if response.status_code != 200:
+            error_msg = f"Orca MCP failed with status {response.status_code}: {response.text}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+        return response.json()
     
     def negotiate_checkout(self, cart_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -33,7 +103,7 @@ class OrcaMCPClient:
         
         Args:
             cart_data: Cart data in Orca MCP format
-            
+        
         Returns:
             Orca MCP response dictionary
         """
@@ -44,32 +114,97 @@ class OrcaMCPClient:
                 "args": cart_data
             }
             
-            # Call Orca MCP endpoint
-            response = requests.post(
-                f"{self.orca_endpoint}/mcp/invoke",
-                json=mcp_request,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                self.logger.info("Orca MCP negotiation successful")
-                return result
-            else:
-                error_msg = f"Orca MCP failed with status {response.status_code}: {response.text}"
-                self.logger.error(error_msg)
-                raise Exception(error_msg)
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Orca MCP request failed: {e}"
-            self.logger.error(error_msg)
-            raise Exception(error_msg)
+            result = self._invoke(mcp_request)
+            self.logger.info("Orca MCP negotiation successful")
+            return result
+        
         except Exception as e:
             error_msg = f"Orca MCP negotiation failed: {e}"
             self.logger.error(error_msg)
             raise
     
+    def negotiate_checkout_batch(self, carts: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Call negotiateCheckout for many carts in as few round trips as possible.
+        
+        Carts are sent as one MCP batch request per max_batch_size carts and the
+        results are matched back to their carts by call id. If the endpoint
+        does not support the batch verb, the carts are negotiated one by one.
+        
+        Args:
+            carts: Cart data in Orca MCP format
+        
+        Returns:
+            One entry per cart, in order: the Orca MCP response dictionary, or
+            the Exception describing why that cart failed
+        """
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for start in range(0, len(carts), self.max_batch_size):
+            chunk = carts[start:start + self.max_batch_size]
+            if self._batch_supported is not False:
+                batch_results = self._invoke_batch(chunk)
+                if batch_results is not None:
+                    results.extend(batch_results)
+                    continue
+            results.extend(self._negotiate_each(chunk))
+        return results
+    
+    def _invoke_batch(self, carts: List[Dict[str, Any]]) -> Optional[List[Union[Dict[str, Any], Exception]]]:
+        """
+        Send one batch request and demultiplex its results.
+        
+        Returns:
+            Results in cart order, or None if the endpoint rejected the batch verb
+        """
+        calls = [
+            {"id": str(index), "verb": "negotiateCheckout", "args": cart}
+            for index, cart in enumerate(carts)
+        ]
+        try:
+            response = self.session.post(
+                f"{self.orca_endpoint}/mcp/invoke",
+                json={"verb": "batch", "args": {"calls": calls}},
+                timeout=self.timeout
+            )
+            if response.status_code in BATCH_UNSUPPORTED_STATUS_CODES and self._batch_supported is None:
+                body = {"error": f"status {response.status_code}"}
+            elif response.status_code != 200:
+                raise Exception(f"Orca MCP failed with status {response.status_code}: {response.text}")
+            else:
+                body = response.json()
+        except Exception as e:
+            # The whole round trip failed, so every cart in it did
+            self.logger.error(f"Orca MCP batch request failed: {e}")
+            return [Exception(f"Orca MCP negotiation failed: {e}") for _ in carts]
+        
+        if not isinstance(body.get("results"), list):
+            self.logger.info(f"Orca MCP batch not supported, negotiating individually: {body.get('error')}")
+            self._batch_supported = False
+            return None
+        self._batch_supported = True
+        
+        by_id = {str(entry.get("id")): entry for entry in body["results"] if isinstance(entry, dict)}
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for call in calls:
+            entry = by_id.get(call["id"])
+            if entry is None:
+                results.append(Exception(f"Orca MCP batch returned no result for call {call['id']}"))
+            elif entry.get("ok", True) and "result" in entry:
+                results.append(entry["result"])
+            else:
+                results.append(Exception(f"Orca MCP negotiation failed: {entry.get('error', 'unknown error')}"))
+        self.logger.info(f"Orca MCP batch negotiation completed for {len(carts)} carts")
+        return results
+    
+    def _negotiate_each(self, carts: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for cart in carts:
+            try:
+                results.append(self.negotiate_checkout(cart))
+            except Exception as e:
+                results.append(e)
+        return results
+    
     def health_check(self) -> bool:
         """
         Check if Orca MCP endpoint is healthy.
@@ -78,7 +213,7 @@ class OrcaMCPClient:
             True if healthy, False otherwise
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.orca_endpoint}/health",
                 timeout=5
             )
@@ -94,7 +229,7 @@ class OrcaMCPClient:
             Capabilities dictionary
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.orca_endpoint}/mcp/capabilities",
                 timeout=10
             )
@@ -103,7 +238,47 @@ class OrcaMCPClient:
                 return response.json()
             else:
                 return {"error": f"Failed to get capabilities: {response.status_code}"}
-                
+        
         except Exception as e:
             return {"error": f"Capabilities request failed: {e}"}
+    
+    def close(self):
+        """Close every session and the pooled connections."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+        self._local = threading.local()
+
+
+_shared_clients: Dict[str, OrcaMCPClient] = {}
+_shared_lock = threading.Lock()
+
+
+def get_orca_client(orca_endpoint: str = "http://localhost:8080") -> OrcaMCPClient:
+    """
+    Process-wide Orca MCP client for an endpoint.
+    
+    Args:
+        orca_endpoint: Orca MCP endpoint URL
+    
+    Returns:
+        The client (and connection pool) every adapter for this endpoint shares
+    """
+    key = orca_endpoint.rstrip('/')
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = OrcaMCPClient(key)
+            _shared_clients[key] = client
+        return client
+
 
+def close_orca_clients():
+    """Close and forget every shared client."""
+    with _shared_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,312 @@
+"""
+Order Replay Engine
+
+Backtests Orca rail choices against historical order exports.
+
+Orders are read lazily from JSONL or CSV exports, transformed to Orca
+requests across a process pool, negotiated with Orca in batches
+(negotiateCheckout batch verb) and transformed back to the platform format,
+one JSON line per order in the output file. Work proceeds in fixed-size
+windows, so memory stays constant however long the export is. After each
+window the output is flushed and a checkpoint is written next to it; a
+replay that is interrupted resumes from the last checkpoint.
+
+Usage:
+    python -m plugins.common.order_replay shopify orders.jsonl results.jsonl --orca-endpoint http://localhost:8080
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from .base_adapter import BasePluginAdapter
+from .orca_client import get_orca_client
+from .platforms import PLATFORM_ADAPTERS, resolve_adapter_class
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+
+def _csv_value(value: str) -> Any:
+    """Decode CSV cells holding JSON objects or arrays (e.g. line items)."""
+    stripped = value.strip()
+    if stripped[:1] in ('{', '['):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+    return value
+
+
+def _csv_row_to_order(row: Dict[str, str]) -> Dict[str, Any]:
+    """Nest dotted column names (customer.id -> {'customer': {'id': ...}})."""
+    order: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or value == '':
+            continue
+        target = order
+        parts = column.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = _csv_value(value)
+    return order
+
+
+def iter_orders(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read orders from a JSONL (.jsonl/.ndjson) or CSV (.csv) export.
+    
+    Blank JSONL lines are skipped; every other line or CSV row yields one order,
+    so record numbers stay stable between runs.
+    
+    Args:
+        path: Export file
+    
+    Yields:
+        Platform cart/order dictionaries
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield _csv_row_to_order(row)
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+# Adapter instance of a pool worker, built once per process by _init_worker
+_worker_adapter: Optional[BasePluginAdapter] = None
+
+
+def _init_worker(adapter_class: Type[BasePluginAdapter], orca_endpoint: str):
+    global _worker_adapter
+    _worker_adapter = adapter_class(orca_endpoint=orca_endpoint)
+
+
+def _transform_chunk(orders: List[Dict[str, Any]]) -> List[Tuple[bool, Any]]:
+    """Transform orders to Orca requests in a pool worker: (True, request) or (False, error)."""
+    results = []
+    for order in orders:
+        try:
+            results.append((True, _worker_adapter.transform_cart_to_orca_request(order)))
+        except Exception as e:
+            results.append((False, f"Cart transformation failed: {e}"))
+    return results
+
+
+def _order_id(order: Dict[str, Any]) -> Any:
+    for key in ('id', 'order_id', 'cart_id', 'checkout_id', 'token'):
+        if key in order:
+            return order[key]
+    return None
+
+
+class OrderReplayEngine:
+    """
+    Streams an order export through an adapter and Orca, with checkpoint/resume.
+    """
+    
+    def __init__(self, platform: Union[str, Type[BasePluginAdapter]], orca_endpoint: str = "http://localhost:8080",
+                 workers: Optional[int] = None, batch_size: int = 50, window_batches: int = 8,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None, progress_interval: float = 5.0):
+        """
+        Initialize the replay engine.
+        
+        Args:
+            platform: Platform name or adapter class
+            orca_endpoint: Orca MCP endpoint URL
+            workers: Transform processes (defaults to the CPU count; 0 transforms in-process)
+            batch_size: Orders per Orca batch request
+            window_batches: Orca batches per window; a checkpoint is written after each window
+            progress: Called with the running stats after each window
+            progress_interval: Seconds between progress log lines
+        """
+        self.adapter_class = resolve_adapter_class(platform)
+        self.orca_endpoint = orca_endpoint
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.window_size = batch_size * window_batches
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.adapter = self.adapter_class(orca_endpoint=orca_endpoint)
+        self.logger = logging.getLogger("ocn.plugin.replay")
+    
+    # Checkpoints
+    
+    @staticmethod
+    def checkpoint_path(output_path: str) -> str:
+        return output_path + CHECKPOINT_SUFFIX
+    
+    def _load_checkpoint(self, input_path: str, output_path: str) -> Dict[str, Any]:
+        path = self.checkpoint_path(output_path)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('input') != os.path.abspath(input_path):
+            raise ValueError(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+        return checkpoint
+    
+    def _save_checkpoint(self, output_path: str, checkpoint: Dict[str, Any]):
+        path = self.checkpoint_path(output_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    # Replay
+    
+    def replay(self, input_path: str, output_path: str, resume: bool = True,
+               limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Replay an order export.
+        
+        Args:
+            input_path: JSONL or CSV order export
+            output_path: JSONL results file (one line per order)
+            resume: Continue from the checkpoint next to output_path if there is one
+            limit: Stop after this many orders in total (including resumed ones)
+        
+        Returns:
+            Stats: processed, succeeded, failed, rail_counts, elapsed_seconds, orders_per_second
+        """
+        checkpoint = self._load_checkpoint(input_path, output_path) if resume else {}
+        done = checkpoint.get('records_done', 0)
+        stats = checkpoint.get('stats') or {'processed': 0, 'succeeded': 0, 'failed': 0, 'rail_counts': {}}
+        
+        output = open(output_path, 'a+b' if checkpoint else 'wb')
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            output.truncate(checkpoint['output_bytes'])
+            output.seek(0, os.SEEK_END)
+            self.logger.info(f"Resuming replay of {input_path} after {done} orders")
+        
+        orders = itertools.islice(iter_orders(input_path), done, limit)
+        pool = None
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.adapter_class, self.orca_endpoint))
+        start = time.monotonic()
+        session_processed = 0
+        last_log = start
+        try:
+            while True:
+                window = list(itertools.islice(orders, self.window_size))
+                if not window:
+                    break
+                orca_requests = self._transform_window(window, pool)
+                lines = self._negotiate_window(done, window, orca_requests, stats)
+                output.write(b''.join(lines))
+                output.flush()
+                os.fsync(output.fileno())
+                
+                done += len(window)
+                session_processed += len(window)
+                elapsed = time.monotonic() - start
+                stats['elapsed_seconds'] = round(elapsed, 3)
+                stats['orders_per_second'] = round(session_processed / elapsed, 1) if elapsed > 0 else 0.0
+                self._save_checkpoint(output_path, {
+                    'input': os.path.abspath(input_path),
+                    'records_done': done,
+                    'output_bytes': output.tell(),
+                    'stats': stats,
+                })
+                if self.progress is not None:
+                    self.progress(dict(stats))
+                if time.monotonic() - last_log >= self.progress_interval:
+                    last_log = time.monotonic()
+                    self.logger.info(f"Replayed {stats['processed']} orders "
+                                     f"({stats['failed']} failed, {stats['orders_per_second']}/s)")
+        finally:
+            output.close()
+            if pool is not None:
+                pool.shutdown()
+        
+        self.logger.info(f"Replay finished: {stats['processed']} orders, {stats['failed']} failed")
+        return stats
+    
+    def _transform_window(self, window: List[Dict[str, Any]],
+                          pool: Optional[ProcessPoolExecutor]) -> List[Tuple[bool, Any]]:
+        """Orca requests for a window of orders, transformed in the pool if there is one."""
+        if pool is None:
+            global _worker_adapter
+            _worker_adapter = self.adapter
+            return _transform_chunk(window)
+        chunk = max(1, -(-len(window) // self.workers))
+        chunks = [window[i:i + chunk] for i in range(0, len(window), chunk)]
+        return [result for chunk_results in pool.map(_transform_chunk, chunks) for result in chunk_results]
+    
+    def _negotiate_window(self, first_record: int, window: List[Dict[str, Any]],
+                          orca_requests: List[Tuple[bool, Any]], stats: Dict[str, Any]) -> List[bytes]:
+        """Negotiate a window's valid requests with Orca and render one output line per order."""
+        client = get_orca_client(self.orca_endpoint)
+        valid = [index for index, (ok, _) in enumerate(orca_requests) if ok]
+        responses: Dict[int, Any] = {}
+        for start in range(0, len(valid), self.batch_size):
+            indexes = valid[start:start + self.batch_size]
+            results = client.negotiate_checkout_batch([orca_requests[index][1] for index in indexes])
+            responses.update(zip(indexes, results))
+        
+        lines = []
+        for index, order in enumerate(window):
+            record: Dict[str, Any] = {'record': first_record + index, 'order_id': _order_id(order)}
+            ok, value = orca_requests[index]
+            response = responses.get(index)
+            if not ok:
+                record.update(success=False, error=value)
+            elif isinstance(response, Exception):
+                record.update(success=False, error=str(response))
+            else:
+                try:
+                    platform_response = self.adapter.transform_orca_response_to_platform(response)
+                    record.update(success=True, chosen_rail=response.get('chosen_rail'),
+                                  trace_id=response.get('trace_id'), platform_response=platform_response)
+                except Exception as e:
+                    record.update(success=False, error=f"Response transformation failed: {e}")
+            
+            stats['processed'] += 1
+            if record['success']:
+                stats['succeeded'] += 1
+                rail = record.get('chosen_rail') or 'unknown'
+                stats['rail_counts'][rail] = stats['rail_counts'].get(rail, 0) + 1
+            else:
+                stats['failed'] += 1
+            lines.append((json.dumps(record, default=str) + '\n').encode('utf-8'))
+        return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay historical orders through an OCN plugin adapter and Orca")
+    parser.add_argument("platform", choices=sorted(PLATFORM_ADAPTERS), help="Platform the export comes from")
+    parser.add_argument("input", help="Order export (.jsonl/.ndjson or .csv)")
+    parser.add_argument("output", help="Results file (JSONL)")
+    parser.add_argument("--orca-endpoint", default=os.getenv("ORCA_ENDPOINT", "http://localhost:8080"))
+    parser.add_argument("--workers", type=int, default=None, help="Transform processes (0 = in-process)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Orders per Orca batch request")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many orders")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    engine = OrderReplayEngine(args.platform, args.orca_endpoint, workers=args.workers, batch_size=args.batch_size)
+    print(f"🔁 Replaying {args.input} through {args.platform} -> {args.output}")
+    stats = engine.replay(args.input, args.output, resume=not args.no_resume, limit=args.limit)
+    print(f"✅ {stats['processed']} orders replayed ({stats['failed']} failed) "
+          f"at {stats.get('orders_per_second', 0)} orders/s")
+    for rail, count in sorted(stats['rail_counts'].items(), key=lambda item: -item[1]):
+        print(f"   {rail}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Platform Adapter Registry
+
+Maps platform names to their adapter classes for the tools that pick an
+adapter by name (order replay, webhook ingest). Adapter modules are imported
+on first use, so importing the registry does not pull in every platform.
+"""
+
+import importlib
+from typing import Type, Union
+
+from .base_adapter import BasePluginAdapter
+
+# Platform name -> (adapter module relative to the plugins package, class name)
+PLATFORM_ADAPTERS = {
+    'shopify': ('..shopify.shopify_adapter', 'ShopifyAdapter'),
+    'woocommerce': ('..woocommerce.woocommerce_adapter', 'WooCommerceAdapter'),
+    'bigcommerce': ('..bigcommerce.bigcommerce_adapter', 'BigCommerceAdapter'),
+}
+
+
+def resolve_adapter_class(platform: Union[str, Type[BasePluginAdapter]]) -> Type[BasePluginAdapter]:
+    """
+    Adapter class for a platform name (or the class itself).
+    
+    Args:
+        platform: 'shopify', 'woocommerce', 'bigcommerce' or a BasePluginAdapter subclass
+    
+    Returns:
+        Adapter class
+    """
+    if isinstance(platform, type):
+        return platform
+    try:
+        module_name, class_name = PLATFORM_ADAPTERS[platform.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown platform: {platform} (expected one of {sorted(PLATFORM_ADAPTERS)})")
+    return getattr(importlib.import_module(module_name, __package__), class_name)
@@ -0,0 +1,395 @@
+"""
+Webhook Ingestion Server
+
+Receiving side for platform cart/checkout webhooks. Platforms push webhooks
+in bursts and re-deliver ones they consider unacknowledged, so the server:
+
+- acknowledges quickly: POST /webhooks/{platform} only validates, dedupes and
+  queues, returning 202
+- dedupes by platform event ID (delivery headers, falling back to a hash of
+  the body) in a bounded, time-windowed set
+- runs checkouts on a pool of worker tasks, each cart going to its
+  platform's adapter
+- applies backpressure: a shop with too many events pending gets 429, and a
+  full queue gets 503, both with Retry-After so the platform re-delivers later
+- reports queue depth, per-shop pending counts and counters on GET /metrics
+
+Requires aiohttp (the same optional dependency as AsyncPluginAdapter).
+
+Usage:
+    python -m plugins.common.webhook_ingest --port 8095 --workers 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from two_tier_cache import canonical_json
+
+from .async_adapter import AsyncPluginAdapter
+from .base_adapter import BasePluginAdapter
+from .platforms import PLATFORM_ADAPTERS, resolve_adapter_class
+
+try:
+    from aiohttp import web
+except ImportError:  # pragma: no cover - optional dependency
+    web = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_PER_SHOP_LIMIT = 100
+DEFAULT_DEDUPE_WINDOW_SECONDS = 3600
+DEFAULT_DEDUPE_MAX_ENTRIES = 100000
+
+# Seconds platforms are asked to wait before re-delivering a rejected webhook
+RETRY_AFTER_SECONDS = 5
+
+# Per platform: headers carrying the delivery's event ID, and the header naming the shop
+PLATFORM_HEADERS = {
+    'shopify': {'event_id': ('X-Shopify-Webhook-Id', 'X-Shopify-Event-Id'), 'shop': 'X-Shopify-Shop-Domain'},
+    'woocommerce': {'event_id': ('X-WC-Webhook-Delivery-ID',), 'shop': 'X-WC-Webhook-Source'},
+    'bigcommerce': {'event_id': ('X-BC-Webhook-Id',), 'shop': 'X-BC-Store-Hash'},
+}
+
+# Body fields identifying the shop when the header is absent
+SHOP_FIELDS = {
+    'shopify': 'shop_domain',
+    'woocommerce': 'store_id',
+    'bigcommerce': 'store_hash',
+}
+
+
+class DedupeWindow:
+    """
+    Event IDs seen within the last window_seconds, bounded by max_entries.
+    
+    IDs are kept in arrival order, so expiry and eviction both pop from the front.
+    """
+    
+    def __init__(self, window_seconds: float = DEFAULT_DEDUPE_WINDOW_SECONDS,
+                 max_entries: int = DEFAULT_DEDUPE_MAX_ENTRIES):
+        """
+        Initialize the window.
+        
+        Args:
+            window_seconds: How long an event ID is remembered
+            max_entries: IDs remembered at most; the oldest are forgotten first
+        """
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return len(self._seen)
+    
+    def _expire(self, now: float):
+        seen = self._seen
+        cutoff = now - self.window_seconds
+        while seen and next(iter(seen.values())) <= cutoff:
+            seen.popitem(last=False)
+    
+    def check_and_add(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Record an event ID.
+        
+        Args:
+            key: Event ID
+            now: Current time (defaults to time.monotonic())
+        
+        Returns:
+            True if the ID was already seen within the window (a duplicate)
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if key in self._seen:
+            return True
+        self._seen[key] = now
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return False
+    
+    def discard(self, key: str):
+        """Forget an event ID so a re-delivery is processed again."""
+        self._seen.pop(key, None)
+
+
+class WebhookIngestServer:
+    """
+    Async server accepting platform cart webhooks and processing them through the adapters.
+    """
+    
+    def __init__(self, orca_endpoint: str = "http://localhost:8080", host: str = "0.0.0.0", port: int = 8095,
+                 workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 per_shop_limit: int = DEFAULT_PER_SHOP_LIMIT,
+                 dedupe_window: float = DEFAULT_DEDUPE_WINDOW_SECONDS,
+                 dedupe_max_entries: int = DEFAULT_DEDUPE_MAX_ENTRIES,
+                 result_webhook_url: Optional[str] = None,
+                 adapters: Optional[Dict[str, BasePluginAdapter]] = None):
+        """
+        Initialize the ingestion server.
+        
+        Args:
+            orca_endpoint: Orca MCP endpoint URL for the default adapters
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            workers: Checkouts processed concurrently
+            queue_size: Events queued at most before new ones get 503
+            per_shop_limit: Events pending (queued or processing) per shop before new ones get 429
+            dedupe_window: Seconds an event ID is remembered for deduplication
+            dedupe_max_entries: Event IDs remembered at most
+            result_webhook_url: Optional webhook URL each checkout result is published to
+            adapters: Adapter per platform name (defaults to one of each built-in adapter)
+        """
+        if web is None:
+            raise ImportError("aiohttp is required for the webhook ingestion server: pip install aiohttp")
+        self.orca_endpoint = orca_endpoint
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.per_shop_limit = per_shop_limit
+        self.result_webhook_url = result_webhook_url
+        self.adapters: Dict[str, BasePluginAdapter] = adapters if adapters is not None else {
+            platform: resolve_adapter_class(platform)(orca_endpoint) for platform in PLATFORM_ADAPTERS
+        }
+        self.dedupe = DedupeWindow(dedupe_window, dedupe_max_entries)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+        self._runner: Optional["web.AppRunner"] = None
+        # (platform, shop) -> events queued or processing
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._processing = 0
+        self._processing_seconds = 0.0
+        self._started_at = time.time()
+        self._counters = {'received': 0, 'accepted': 0, 'duplicates': 0, 'invalid': 0,
+                          'rejected_shop_limit': 0, 'rejected_queue_full': 0,
+                          'processed': 0, 'succeeded': 0, 'failed': 0}
+    
+    def create_app(self) -> "web.Application":
+        """aiohttp application with the ingestion routes."""
+        app = web.Application()
+        app.router.add_post('/webhooks/{platform}', self.handle_webhook)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/health', self.handle_health)
+        return app
+    
+    async def start(self):
+        """Start the worker pool and the HTTP listener."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # Port 0 picks a free port
+        self.port = self._runner.addresses[0][1]
+        self._started_at = time.time()
+        logger.info(f"Webhook ingestion listening on http://{self.host}:{self.port} with {self.workers} workers")
+    
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Stop accepting webhooks, let queued ones finish, then stop the workers.
+        
+        Args:
+            drain_timeout: Seconds to wait for the queue to drain
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping with {self._queue.qsize()} webhooks still queued")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        for adapter in self.adapters.values():
+            if isinstance(adapter, AsyncPluginAdapter):
+                await adapter.aclose()
+        logger.info("Webhook ingestion stopped")
+    
+    def _identify(self, platform: str, request: "web.Request", payload: Dict[str, Any],
+                  cart: Dict[str, Any]) -> Tuple[str, str]:
+        """(event ID, shop) for a delivery; the event ID falls back to a hash of the canonical body."""
+        headers = PLATFORM_HEADERS.get(platform, {})
+        event_id = next((request.headers[name] for name in headers.get('event_id', ()) if name in request.headers),
+                        None)
+        if event_id is None:
+            event_id = (payload.get('hash') or payload.get('event_id')
+                        or hashlib.sha256(canonical_json(payload).encode()).hexdigest())
+        shop = request.headers.get(headers.get('shop', ''), '')
+        if not shop:
+            field = SHOP_FIELDS.get(platform, '')
+            shop = str(cart.get(field) or payload.get(field) or payload.get('producer') or 'unknown')
+        return str(event_id), shop
+    
+    def _reject(self, status: int, status_text: str, message: str) -> "web.Response":
+        return web.json_response({'status': status_text, 'message': message}, status=status,
+                                 headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+    
+    async def handle_webhook(self, request: "web.Request") -> "web.Response":
+        """POST /webhooks/{platform}: dedupe and queue one webhook."""
+        self._counters['received'] += 1
+        platform = request.match_info['platform'].lower()
+        if platform not in self.adapters:
+            self._counters['invalid'] += 1
+            return web.json_response({'status': 'error', 'message': f"Unknown platform: {platform}"}, status=404)
+        
+        body = await request.read()
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict):
+                raise ValueError("webhook body must be a JSON object")
+        except ValueError as e:
+            self._counters['invalid'] += 1
+            return web.json_response({'status': 'error', 'message': f"Invalid JSON: {e}"}, status=400)
+        
+        # The cart is either the body itself (Shopify checkout, WooCommerce order) or under 'cart'
+        cart = payload.get('cart', payload)
+        if not isinstance(cart, dict):
+            self._counters['invalid'] += 1
+            return web.json_response({'status': 'error', 'message': "Webhook cart must be a JSON object"}, status=400)
+        event_id, shop = self._identify(platform, request, payload, cart)
+        dedupe_key = f"{platform}:{event_id}"
+        if self.dedupe.check_and_add(dedupe_key):
+            self._counters['duplicates'] += 1
+            return web.json_response({'status': 'duplicate', 'event_id': event_id})
+        
+        shop_key = (platform, shop)
+        if self._pending.get(shop_key, 0) >= self.per_shop_limit:
+            # Not processed, so a re-delivery must not count as a duplicate
+            self.dedupe.discard(dedupe_key)
+            self._counters['rejected_shop_limit'] += 1
+            return self._reject(429, 'throttled', f"Too many pending webhooks for {shop}")
+        
+        try:
+            self._queue.put_nowait((platform, shop_key, dedupe_key, event_id, cart, time.monotonic()))
+        except asyncio.QueueFull:
+            self.dedupe.discard(dedupe_key)
+            self._counters['rejected_queue_full'] += 1
+            return self._reject(503, 'busy', "Ingestion queue is full")
+        
+        self._pending[shop_key] = self._pending.get(shop_key, 0) + 1
+        self._counters['accepted'] += 1
+        return web.json_response({'status': 'queued', 'event_id': event_id}, status=202)
+    
+    async def _worker(self, number: int):
+        """Process queued webhooks until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            platform, shop_key, dedupe_key, event_id, cart, queued_at = await self._queue.get()
+            self._processing += 1
+            started = time.monotonic()
+            try:
+                adapter = self.adapters[platform]
+                if isinstance(adapter, AsyncPluginAdapter):
+                    result = await adapter.process_checkout_async(cart, self.result_webhook_url)
+                else:
+                    result = await loop.run_in_executor(None, adapter.process_checkout, cart,
+                                                        self.result_webhook_url)
+                succeeded = result.get('success', False)
+            except Exception as e:
+                logger.error(f"Worker {number} failed on {platform} event {event_id}: {e}")
+                succeeded = False
+            finally:
+                self._processing -= 1
+                self._processing_seconds += time.monotonic() - started
+                remaining = self._pending.get(shop_key, 1) - 1
+                if remaining > 0:
+                    self._pending[shop_key] = remaining
+                else:
+                    self._pending.pop(shop_key, None)
+                self._queue.task_done()
+            
+            self._counters['processed'] += 1
+            if succeeded:
+                self._counters['succeeded'] += 1
+            else:
+                # Let the platform's re-delivery retry the checkout
+                self.dedupe.discard(dedupe_key)
+                self._counters['failed'] += 1
+            logger.debug(f"{platform} event {event_id} processed in {time.monotonic() - queued_at:.3f}s "
+                         f"(success={succeeded})")
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Queue depth, per-shop pending counts and counters.
+        
+        Returns:
+            Metrics dictionary
+        """
+        queue_depth = self._queue.qsize() if self._queue is not None else 0
+        busiest = sorted(self._pending.items(), key=lambda item: -item[1])[:20]
+        processed = self._counters['processed']
+        return {
+            'queue_depth': queue_depth,
+            'queue_capacity': self.queue_size,
+            'queue_utilization': round(queue_depth / self.queue_size, 4) if self.queue_size else 0.0,
+            'processing': self._processing,
+            'workers': self.workers,
+            'shops_pending': len(self._pending),
+            'per_shop_limit': self.per_shop_limit,
+            'busiest_shops': [{'platform': platform, 'shop': shop, 'pending': pending}
+                              for (platform, shop), pending in busiest],
+            'dedupe_entries': len(self.dedupe),
+            'dedupe_evicted': self.dedupe.evicted,
+            'counters': dict(self._counters),
+            'avg_processing_ms': round(self._processing_seconds / processed * 1000, 2) if processed else 0.0,
+            'uptime_seconds': round(time.time() - self._started_at, 3)
+        }
+    
+    async def handle_metrics(self, request: "web.Request") -> "web.Response":
+        """GET /metrics."""
+        return web.json_response(self.get_metrics())
+    
+    async def handle_health(self, request: "web.Request") -> "web.Response":
+        """GET /health."""
+        return web.json_response({'status': 'healthy', 'platforms': sorted(self.adapters)})
+
+
+async def _serve(server: WebhookIngestServer):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive platform cart webhooks and process them through Orca")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8095)
+    parser.add_argument("--orca-endpoint", default=os.getenv("ORCA_ENDPOINT", "http://localhost:8080"))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Checkouts processed concurrently")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--per-shop-limit", type=int, default=DEFAULT_PER_SHOP_LIMIT)
+    parser.add_argument("--dedupe-window", type=float, default=DEFAULT_DEDUPE_WINDOW_SECONDS,
+                        help="Seconds an event ID is remembered")
+    parser.add_argument("--result-webhook-url", default=None, help="Publish each checkout result here")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = WebhookIngestServer(args.orca_endpoint, host=args.host, port=args.port, workers=args.workers,
+                                 queue_size=args.queue_size, per_shop_limit=args.per_shop_limit,
+                                 dedupe_window=args.dedupe_window, result_webhook_url=args.result_webhook_url)
+    print(f"📥 Webhook ingestion on http://{args.host}:{args.port}/webhooks/<platform> -> {args.orca_endpoint}")
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        print("🛑 Webhook ingestion stopped")
+
+
+if __name__ == "__main__":
+    main()
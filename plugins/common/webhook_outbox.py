@@ -0,0 +1,415 @@
+"""
+Webhook Outbox
+
+Durable, asynchronous webhook delivery for plugin adapters.
+
+Checkouts enqueue webhook events into a SQLite outbox and return right away;
+a background dispatcher hands due events to a worker pool, which delivers
+them with a per-endpoint concurrency limit. Events for receivers that accept
+batches are coalesced into one POST. Failed deliveries are retried with
+exponential backoff and jitter, and events that exhaust their attempts (or
+are rejected outright) move to the dead-letter queue instead of being lost.
+Events still marked in flight when the process stopped are delivered again on
+the next start.
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Event states
+STATUS_PENDING = "pending"
+STATUS_DELIVERING = "delivering"
+STATUS_DELIVERED = "delivered"
+STATUS_DEAD = "dead"
+
+# Header marking a coalesced POST whose body is {"events": [...], "event_ids": [...]}
+BATCH_HEADER = "X-OCN-Webhook-Batch"
+EVENT_ID_HEADER = "X-OCN-Event-Id"
+
+# Responses worth retrying; any other non-2xx status dead-letters the event
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    headers TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS webhook_events_due ON webhook_events (status, next_attempt_at);
+"""
+
+
+class WebhookOutbox:
+    """
+    SQLite-backed webhook outbox with a background delivery worker pool.
+    """
+    
+    def __init__(self, path: str = "webhook_outbox.db", workers: int = 4,
+                 per_endpoint_concurrency: int = 2, batch_size: int = 20,
+                 batch_endpoints: Optional[Iterable[str]] = None, max_attempts: int = 6,
+                 base_delay: float = 1.0, max_delay: float = 300.0, timeout: float = 10.0,
+                 keep_delivered: bool = False):
+        """
+        Initialize the outbox.
+        
+        Args:
+            path: SQLite database file (":memory:" for a non-durable outbox)
+            workers: Delivery threads shared by all endpoints
+            per_endpoint_concurrency: Deliveries in flight per webhook URL
+            batch_size: Events coalesced into one POST for batch endpoints
+            batch_endpoints: Webhook URLs that accept batched events
+            max_attempts: Attempts before an event is dead-lettered
+            base_delay: First retry delay in seconds
+            max_delay: Largest retry delay in seconds
+            timeout: Timeout per delivery request in seconds
+            keep_delivered: Keep delivered events in the database instead of deleting them
+        """
+        self.path = path
+        self.workers = workers
+        self.per_endpoint_concurrency = per_endpoint_concurrency
+        self.batch_size = batch_size
+        self.batch_endpoints = set(batch_endpoints or [])
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.keep_delivered = keep_delivered
+        self.logger = logging.getLogger("ocn.webhook.outbox")
+        
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            # Deliveries interrupted by a crash or shutdown go out again
+            self._db.execute("UPDATE webhook_events SET status = ? WHERE status = ?",
+                             (STATUS_PENDING, STATUS_DELIVERING))
+        
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_maxsize=workers))
+        self._session.mount('https://', HTTPAdapter(pool_maxsize=workers))
+        self._rng = random.Random()
+        self._wakeup = threading.Condition()
+        self._in_flight: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._running = False
+        self._stats = {"delivered": 0, "failed_attempts": 0, "dead_lettered": 0, "batches": 0}
+    
+    # Producer side
+    
+    def enqueue(self, url: str, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> int:
+        """
+        Durably queue one webhook event for delivery.
+        
+        Args:
+            url: Webhook endpoint URL
+            data: JSON payload
+            headers: Extra request headers
+        
+        Returns:
+            Event id
+        """
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "INSERT INTO webhook_events (url, payload, headers, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, json.dumps(data, default=str), json.dumps(headers) if headers else None,
+                 STATUS_PENDING, now, now)
+            )
+            event_id = cursor.lastrowid
+        self._notify()
+        return event_id
+    
+    def enable_batching(self, url: str):
+        """Coalesce events for a receiver that accepts batched POSTs."""
+        self.batch_endpoints.add(url)
+        self._notify()
+    
+    # Lifecycle
+    
+    def start(self):
+        """Start the dispatcher and worker pool."""
+        if self._running:
+            return
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook-outbox")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="webhook-outbox-dispatcher",
+                                            daemon=True)
+        self._dispatcher.start()
+        self.logger.info(f"Webhook outbox started with {self.workers} workers ({self.path})")
+    
+    def stop(self, timeout: Optional[float] = 10.0):
+        """
+        Stop dispatching and wait for in-flight deliveries.
+        
+        Events not yet delivered stay in the outbox for the next start.
+        
+        Args:
+            timeout: Seconds to wait for the dispatcher to exit
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._notify()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.logger.info("Webhook outbox stopped")
+    
+    def close(self):
+        """Stop delivery and close the database."""
+        self.stop()
+        self._session.close()
+        with self._db_lock:
+            self._db.close()
+    
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Wait until no event is pending or in flight.
+        
+        Args:
+            timeout: Seconds to wait
+        
+        Returns:
+            True if the outbox drained, False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            counts = self.counts()
+            if not counts.get(STATUS_PENDING) and not counts.get(STATUS_DELIVERING):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    # Dispatch
+    
+    def _notify(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+    
+    def _dispatch_loop(self):
+        while self._running:
+            try:
+                wait = self._dispatch_due()
+            except Exception as e:
+                self.logger.error(f"Webhook outbox dispatch failed: {e}")
+                wait = 1.0
+            with self._wakeup:
+                if self._running:
+                    self._wakeup.wait(wait)
+    
+    def _dispatch_due(self) -> float:
+        """
+        Claim due events for endpoints with free delivery slots and submit them.
+        
+        Returns:
+            Seconds until the next event becomes due (capped at one second)
+        """
+        now = time.time()
+        with self._db_lock:
+            urls = [row[0] for row in self._db.execute(
+                "SELECT DISTINCT url FROM webhook_events WHERE status = ? AND next_attempt_at <= ?",
+                (STATUS_PENDING, now)
+            )]
+        
+        for url in urls:
+            size = self.batch_size if url in self.batch_endpoints else 1
+            with self._wakeup:
+                free = self.per_endpoint_concurrency - self._in_flight.get(url, 0)
+            if free <= 0:
+                continue
+            with self._db_lock:
+                events = self._db.execute(
+                    "SELECT id, url, payload, headers, attempts FROM webhook_events "
+                    "WHERE url = ? AND status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (url, STATUS_PENDING, now, free * size)
+                ).fetchall()
+                self._db.execute(
+                    f"UPDATE webhook_events SET status = ? WHERE id IN ({','.join('?' * len(events))})",
+                    [STATUS_DELIVERING] + [event[0] for event in events]
+                )
+            for start in range(0, len(events), size):
+                with self._wakeup:
+                    self._in_flight[url] = self._in_flight.get(url, 0) + 1
+                self._executor.submit(self._deliver, url, events[start:start + size])
+        
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM webhook_events WHERE status = ?", (STATUS_PENDING,)
+            ).fetchone()
+        if row[0] is None:
+            return 1.0
+        return min(max(row[0] - time.time(), 0.01), 1.0)
+    
+    # Delivery
+    
+    def _deliver(self, url: str, events: List[tuple]):
+        """POST one event (or one batch) and record the outcome."""
+        try:
+            ids = [event[0] for event in events]
+            headers = {'Content-Type': 'application/json'}
+            if len(events) == 1 and url not in self.batch_endpoints:
+                event_id, _, payload, extra_headers, _ = events[0]
+                if extra_headers:
+                    headers.update(json.loads(extra_headers))
+                headers[EVENT_ID_HEADER] = str(event_id)
+                body = payload
+            else:
+                headers[BATCH_HEADER] = "true"
+                body = '{"events": [%s], "event_ids": %s}' % (
+                    ", ".join(event[2] for event in events), json.dumps(ids))
+            
+            error, retryable = None, True
+            try:
+                response = self._session.post(url, data=body.encode('utf-8'), headers=headers,
+                                              timeout=self.timeout)
+                if not 200 <= response.status_code < 300:
+                    error = f"status {response.status_code}"
+                    retryable = response.status_code in RETRYABLE_STATUS_CODES
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+            
+            if error is None:
+                self._mark_delivered(ids)
+                if len(events) > 1 or url in self.batch_endpoints:
+                    self._count("batches")
+                self.logger.info(f"Delivered {len(ids)} webhook event(s) to {url}")
+            else:
+                self._mark_failed(events, error, retryable)
+        except Exception as e:
+            self.logger.error(f"Webhook delivery to {url} failed unexpectedly: {e}")
+            self._mark_failed(events, str(e), True)
+        finally:
+            with self._wakeup:
+                self._in_flight[url] -= 1
+                self._wakeup.notify_all()
+    
+    def _mark_delivered(self, ids: List[int]):
+        placeholders = ','.join('?' * len(ids))
+        with self._db_lock:
+            if self.keep_delivered:
+                self._db.execute(
+                    f"UPDATE webhook_events SET status = ?, delivered_at = ?, attempts = attempts + 1 "
+                    f"WHERE id IN ({placeholders})",
+                    [STATUS_DELIVERED, time.time()] + ids
+                )
+            else:
+                self._db.execute(f"DELETE FROM webhook_events WHERE id IN ({placeholders})", ids)
+        self._count("delivered", len(ids))
+    
+    def _mark_failed(self, events: List[tuple], error: str, retryable: bool):
+        """Schedule a retry with backoff, or dead-letter the events."""
+        self._count("failed_attempts", len(events))
+        now = time.time()
+        with self._db_lock:
+            for event_id, url, _, _, attempts in events:
+                attempts += 1
+                if retryable and attempts < self.max_attempts:
+                    self._db.execute(
+                        "UPDATE webhook_events SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                        "WHERE id = ?",
+                        (STATUS_PENDING, attempts, now + self.retry_delay(attempts), error, event_id)
+                    )
+                else:
+                    self._db.execute(
+                        "UPDATE webhook_events SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                        (STATUS_DEAD, attempts, error, event_id)
+                    )
+                    self._count("dead_lettered")
+                    self.logger.error(f"Webhook event {event_id} to {url} dead-lettered after "
+                                      f"{attempts} attempt(s): {error}")
+    
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff after the given number of failed attempts: exponential with jitter, capped."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return self._rng.uniform(ceiling / 2, ceiling)
+    
+    def _count(self, key: str, amount: int = 1):
+        with self._wakeup:
+            self._stats[key] += amount
+    
+    # Inspection
+    
+    def counts(self) -> Dict[str, int]:
+        """Events per status."""
+        with self._db_lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM webhook_events GROUP BY status").fetchall()
+        return dict(rows)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Delivery counters and queue depth.
+        
+        Returns:
+            Dictionary with delivered, failed_attempts, dead_lettered, batches and per-status counts
+        """
+        with self._wakeup:
+            stats = dict(self._stats)
+        stats.update(self.counts())
+        return stats
+    
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Events that will not be retried.
+        
+        Args:
+            limit: Maximum events to return
+        
+        Returns:
+            Oldest first: id, url, payload, attempts, last_error, created_at
+        """
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id, url, payload, attempts, last_error, created_at FROM webhook_events "
+                "WHERE status = ? ORDER BY id LIMIT ?", (STATUS_DEAD, limit)
+            ).fetchall()
+        return [
+            {'id': row[0], 'url': row[1], 'payload': json.loads(row[2]), 'attempts': row[3],
+             'last_error': row[4], 'created_at': row[5]}
+            for row in rows
+        ]
+    
+    def requeue_dead(self, ids: Optional[List[int]] = None) -> int:
+        """
+        Move dead-lettered events back to the queue with a fresh attempt budget.
+        
+        Args:
+            ids: Events to requeue (all dead letters if omitted)
+        
+        Returns:
+            Number of events requeued
+        """
+        query = "UPDATE webhook_events SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?"
+        params: List[Any] = [STATUS_PENDING, time.time(), STATUS_DEAD]
+        if ids is not None:
+            if not ids:
+                return 0
+            query += f" AND id IN ({','.join('?' * len(ids))})"
+            params += list(ids)
+        with self._db_lock:
+            count = self._db.execute(query, params).rowcount
+        self._notify()
+        return count
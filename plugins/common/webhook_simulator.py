@@ -2,137 +2,173 @@
 Webhook Simulator
 
 Simulates webhook endpoints for testing plugin adapters.
+
+The server handles connections concurrently (one thread per connection, with
+HTTP keep-alive) so it keeps up with load tests. Received webhooks are kept
+in a bounded ring buffer, optionally also appended to a JSON Lines spill
+file, and GET /webhooks pages through them with a cursor, filtered by
+platform and time. GET / reports throughput counters.
 """
 
 import json
 import logging
-from typing import Dict, Any, List
+from collections import deque
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+# Request headers kept in each webhook's _metadata
+RECORDED_HEADERS = ('Content-Type', 'User-Agent', 'X-OCN-Event-Id', 'X-OCN-Webhook-Batch')
+
+# Page size bounds for GET /webhooks
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Window for the recent requests-per-second figure on GET /
+RATE_WINDOW_SECONDS = 10
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an ISO-8601 string or epoch number; None if absent."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Request handler; the simulator is reachable as self.server.simulator."""
+    
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, keep-alive
+    # connections stall on delayed ACKs
+    disable_nagle_algorithm = True
+    
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        """Handle POST requests (webhook calls)."""
+        simulator = self.server.simulator
+        try:
+            # Read request body
+            content_length = int(self.headers.get('Content-Length', 0))
+            post_data = self.rfile.read(content_length)
+            
+            # Parse JSON data
+            webhook_data = json.loads(post_data.decode('utf-8'))
+            
+            # A batched delivery from the webhook outbox carries several events
+            batched = bool(self.headers.get('X-OCN-Webhook-Batch'))
+            events = webhook_data.get('events', []) if batched else [webhook_data]
+            
+            headers = {name: self.headers[name] for name in RECORDED_HEADERS if name in self.headers}
+            simulator.record(events, headers, self.path, len(post_data), batched)
+            
+            self._send_json(200, {
+                'status': 'success',
+                'message': 'Webhook received',
+                'received': len(events),
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        except Exception as e:
+            simulator.record_error()
+            simulator.logger.error(f"Webhook processing failed: {e}")
+            self._send_json(500, {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            })
+    
+    def do_GET(self):
+        """Handle GET requests (webhook history and status)."""
+        simulator = self.server.simulator
+        url = urlparse(self.path)
+        if url.path == '/webhooks':
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                page = simulator.query_webhooks(
+                    cursor=int(query.get('cursor', 0)),
+                    limit=int(query.get('limit', DEFAULT_PAGE_SIZE)),
+                    platform=query.get('platform'),
+                    since=_parse_time(query.get('since')),
+                    until=_parse_time(query.get('until'))
+                )
+            except ValueError as e:
+                self._send_json(400, {'status': 'error', 'message': f"Invalid query: {e}"})
+                return
+            page['timestamp'] = datetime.now().isoformat()
+            self._send_json(200, page)
+        else:
+            self._send_json(200, simulator.get_status())
+    
+    def log_message(self, format, *args):
+        """Override to use our logger (at debug level; per-request logs dominate under load)."""
+        self.server.simulator.logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    """Thread-per-connection server with a listen backlog sized for load tests."""
+    
+    daemon_threads = True
+    request_queue_size = 128
+
 
 class WebhookSimulator:
     """
     Simulates webhook endpoints for testing OCN plugin adapters.
     """
     
-    def __init__(self, port: int = 9000):
+    def __init__(self, port: int = 9000, max_history: int = 10000, spill_path: Optional[str] = None):
         """
         Initialize the webhook simulator.
         
         Args:
             port: Port to run the simulator on
+            max_history: Webhooks kept in memory; the oldest are dropped beyond this
+            spill_path: Optional JSON Lines file every received webhook is appended to
         """
         self.port = port
-        self.received_webhooks: List[Dict[str, Any]] = []
+        self.max_history = max_history
+        self.spill_path = spill_path
         self.logger = logging.getLogger("ocn.webhook.simulator")
         self.server = None
         self.server_thread = None
+        
+        # (sequence, received_at, platform, webhook) in sequence order
+        self._history: deque = deque(maxlen=max_history)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._spill_file = open(spill_path, 'a', encoding='utf-8') if spill_path else None
+        self._recent: deque = deque()
+        self._started_at = time.time()
+        self._counters = {'requests': 0, 'webhooks': 0, 'batches': 0, 'bytes': 0, 'errors': 0, 'spilled': 0}
+    
+    @property
+    def received_webhooks(self) -> List[Dict[str, Any]]:
+        """Webhooks currently held in memory, oldest first."""
+        return self.get_webhooks()
     
     def start_server(self):
         """Start the webhook simulator server."""
         try:
-            from http.server import HTTPServer, BaseHTTPRequestHandler
-            import urllib.parse
-            
-            class WebhookHandler(BaseHTTPRequestHandler):
-                def __init__(self, simulator, *args, **kwargs):
-                    self.simulator = simulator
-                    super().__init__(*args, **kwargs)
-                
-                def do_POST(self):
-                    """Handle POST requests (webhook calls)."""
-                    try:
-                        # Read request body
-                        content_length = int(self.headers.get('Content-Length', 0))
-                        post_data = self.rfile.read(content_length)
-                        
-                        # Parse JSON data
-                        webhook_data = json.loads(post_data.decode('utf-8'))
-                        
-                        # Add metadata
-                        webhook_data['_metadata'] = {
-                            'timestamp': datetime.now().isoformat(),
-                            'headers': dict(self.headers),
-                            'path': self.path,
-                            'method': 'POST'
-                        }
-                        
-                        # Store webhook data
-                        self.simulator.received_webhooks.append(webhook_data)
-                        
-                        # Log the webhook
-                        self.simulator.logger.info(f"Received webhook: {webhook_data.get('platform', 'unknown')}")
-                        
-                        # Send response
-                        self.send_response(200)
-                        self.send_header('Content-Type', 'application/json')
-                        self.end_headers()
-                        
-                        response = {
-                            'status': 'success',
-                            'message': 'Webhook received',
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        self.wfile.write(json.dumps(response).encode('utf-8'))
-                        
-                    except Exception as e:
-                        self.simulator.logger.error(f"Webhook processing failed: {e}")
-                        self.send_response(500)
-                        self.send_header('Content-Type', 'application/json')
-                        self.end_headers()
-                        
-                        error_response = {
-                            'status': 'error',
-                            'message': str(e),
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        self.wfile.write(json.dumps(error_response).encode('utf-8'))
-                
-                def do_GET(self):
-                    """Handle GET requests (webhook history)."""
-                    if self.path == '/webhooks':
-                        # Return webhook history
-                        self.send_response(200)
-                        self.send_header('Content-Type', 'application/json')
-                        self.end_headers()
-                        
-                        response = {
-                            'webhooks': self.simulator.received_webhooks,
-                            'count': len(self.simulator.received_webhooks),
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        self.wfile.write(json.dumps(response, indent=2).encode('utf-8'))
-                    else:
-                        # Return status
-                        self.send_response(200)
-                        self.send_header('Content-Type', 'application/json')
-                        self.end_headers()
-                        
-                        status = {
-                            'status': 'running',
-                            'port': self.simulator.port,
-                            'webhook_count': len(self.simulator.received_webhooks),
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        self.wfile.write(json.dumps(status, indent=2).encode('utf-8'))
-                
-                def log_message(self, format, *args):
-                    """Override to use our logger."""
-                    self.simulator.logger.info(f"{self.address_string()} - {format % args}")
-            
-            # Create server
-            def handler(*args, **kwargs):
-                return WebhookHandler(self, *args, **kwargs)
-            
-            self.server = HTTPServer(('localhost', self.port), handler)
+            self.server = _WebhookServer(('localhost', self.port), _WebhookHandler)
+            self.server.simulator = self
+            # Port 0 picks a free port
+            self.port = self.server.server_address[1]
             
             # Start server in a separate thread
             def run_server():
@@ -142,11 +178,9 @@ class WebhookSimulator:
             self.server_thread = threading.Thread(target=run_server, daemon=True)
             self.server_thread.start()
             
-            # Wait a moment for server to start
-            time.sleep(0.1)
-            
+            self._started_at = time.time()
             self.logger.info(f"Webhook simulator running at http://localhost:{self.port}")
-            
+        
         except Exception as e:
             self.logger.error(f"Failed to start webhook simulator: {e}")
             raise
@@ -157,6 +191,142 @@ class WebhookSimulator:
             self.server.shutdown()
             self.server.server_close()
             self.logger.info("Webhook simulator stopped")
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+    
+    def record(self, events: List[Dict[str, Any]], headers: Dict[str, str], path: str,
+               size: int = 0, batched: bool = False):
+        """
+        Store received webhooks.
+        
+        Args:
+            events: Webhook payloads from one request
+            headers: Request headers to keep in each webhook's metadata
+            path: Request path
+            size: Request body size in bytes
+            batched: Whether the request was a batched delivery
+        
+        Raises:
+            TypeError: If an event is not a JSON object (nothing is recorded)
+        """
+        if not all(isinstance(event, dict) for event in events):
+            raise TypeError("Webhook events must be JSON objects")
+        with self._lock:
+            received_at = time.time()
+            timestamp = datetime.fromtimestamp(received_at).isoformat()
+            self._counters['requests'] += 1
+            self._counters['bytes'] += size
+            if batched:
+                self._counters['batches'] += 1
+            self._recent.append(received_at)
+            while self._recent[0] < received_at - RATE_WINDOW_SECONDS:
+                self._recent.popleft()
+            for event in events:
+                self._sequence += 1
+                event['_metadata'] = {
+                    'sequence': self._sequence,
+                    'timestamp': timestamp,
+                    'headers': headers,
+                    'path': path,
+                    'method': 'POST'
+                }
+                platform = event.get('platform', 'unknown')
+                self._history.append((self._sequence, received_at, platform, event))
+                self._counters['webhooks'] += 1
+                if self._spill_file is not None:
+                    self._spill_file.write(json.dumps(event, default=str) + '\n')
+                    self._counters['spilled'] += 1
+        self.logger.debug(f"Received {len(events)} webhook(s) on {path}")
+    
+    def record_error(self):
+        """Count a request that could not be processed."""
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['errors'] += 1
+    
+    def query_webhooks(self, cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE, platform: Optional[str] = None,
+                       since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """
+        One page of webhooks received after a cursor.
+        
+        Args:
+            cursor: Sequence number of the last webhook already seen (0 for the start)
+            limit: Maximum webhooks to return
+            platform: Only webhooks from this platform
+            since: Only webhooks received at or after this epoch time
+            until: Only webhooks received before this epoch time
+        
+        Returns:
+            Dictionary with webhooks, count, next_cursor (pass back to continue),
+            has_more and dropped (webhooks after the cursor already evicted from memory)
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        page: List[Dict[str, Any]] = []
+        with self._lock:
+            history = self._history
+            first = history[0][0] if history else self._sequence + 1
+            # Sequences in the buffer are contiguous, so the cursor maps straight to an index
+            start = max(cursor - first + 1, 0)
+            dropped = max(first - cursor - 1, 0)
+            next_cursor = max(cursor, first - 1)
+            has_more = False
+            for index in range(start, len(history)):
+                sequence, received_at, event_platform, event = history[index]
+                if until is not None and received_at >= until:
+                    break
+                if platform is not None and event_platform != platform:
+                    next_cursor = sequence
+                    continue
+                if since is not None and received_at < since:
+                    next_cursor = sequence
+                    continue
+                # Only a further webhook that passes the filters means another page
+                if len(page) == limit:
+                    has_more = True
+                    break
+                next_cursor = sequence
+                page.append(event)
+        return {
+            'webhooks': page,
+            'count': len(page),
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'dropped': dropped
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Simulator status and throughput counters.
+        
+        Returns:
+            Status dictionary
+        """
+        now = time.time()
+        with self._lock:
+            counters = dict(self._counters)
+            recent = self._recent
+            while recent and recent[0] < now - RATE_WINDOW_SECONDS:
+                recent.popleft()
+            recent_requests = len(recent)
+            history_size = len(self._history)
+        uptime = max(now - self._started_at, 1e-9)
+        return {
+            'status': 'running',
+            'port': self.port,
+            'webhook_count': counters['webhooks'],
+            'history_size': history_size,
+            'history_capacity': self.max_history,
+            'dropped_from_history': counters['webhooks'] - history_size,
+            'spill_path': self.spill_path,
+            'counters': counters,
+            'uptime_seconds': round(uptime, 3),
+            'requests_per_second': round(counters['requests'] / uptime, 2),
+            'webhooks_per_second': round(counters['webhooks'] / uptime, 2),
+            'recent_requests_per_second': round(recent_requests / min(uptime, RATE_WINDOW_SECONDS), 2),
+            'timestamp': datetime.now().isoformat()
+        }
     
     def get_webhook_url(self) -> str:
         """
@@ -169,16 +339,19 @@ class WebhookSimulator:
     
     def get_webhooks(self) -> List[Dict[str, Any]]:
         """
-        Get all received webhooks.
+        Get the received webhooks still held in memory.
         
         Returns:
-            List of webhook data
+            List of webhook data, oldest first
         """
-        return self.received_webhooks.copy()
+        with self._lock:
+            return [entry[3] for entry in self._history]
     
     def clear_webhooks(self):
         """Clear all received webhooks."""
-        self.received_webhooks.clear()
+        with self._lock:
+            self._history.clear()
+            self._counters['webhooks'] = 0
         self.logger.info("Webhook history cleared")
     
     def get_webhook_count(self) -> int:
@@ -186,9 +359,11 @@ class WebhookSimulator:
         Get the number of received webhooks.
         
         Returns:
-            Number of webhooks
+            Number of webhooks received since start (or the last clear), including
+            ones dropped from the in-memory history
         """
-        return len(self.received_webhooks)
+        with self._lock:
+            return self._counters['webhooks']
     
     def get_latest_webhook(self) -> Optional[Dict[str, Any]]:
         """
@@ -197,7 +372,7 @@ class WebhookSimulator:
         Returns:
             Latest webhook data or None
         """
-        if self.received_webhooks:
-            return self.received_webhooks[-1]
+        with self._lock:
+            if self._history:
+                return self._history[-1][3]
         return None
-
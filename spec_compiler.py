@@ -0,0 +1,31 @@
+"""
+Spec Compiler
+
+Turns generated Python source into a function. Shared by the declarative
+specs that compile themselves once at import: llm_extraction_spec (agent
+response extraction) and plugins/common/cart_mapping (platform cart
+mappings).
+"""
+
+from typing import Any, Callable, Dict, List
+
+
+def compile_function(name: str, lines: List[str], namespace: Dict[str, Any], label: str) -> Callable:
+    """
+    Compile generated source and return the function it defines.
+
+    Args:
+        name: Name of the function defined by the source
+        lines: Source lines
+        namespace: Globals the function runs with (copied, not modified)
+        label: Shown in tracebacks as "<label name>"
+
+    Returns:
+        The compiled function, with its source on __source__
+    """
+    source = "\n".join(lines)
+    namespace = dict(namespace)
+    exec(compile(source, f"<{label} {name}>", "exec"), namespace)
+    function = namespace[name]
+    function.__source__ = source
+    return function
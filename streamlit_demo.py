@@ -12,12 +12,16 @@ This demo showcases the complete OCN payment flow with ML-powered agents:
 
 import streamlit as st
 import json
+import os
 import requests
+import threading
+from requests.adapters import HTTPAdapter
 from llm_response_parser import LLMResponseParser, MLModelEnhancer
+from ml_feature_store import FeatureStore
 import time
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -99,6 +103,38 @@ AGENT_CONFIGS = {
     "weave": {"port": 8006, "name": "Weave (Processor Agent)", "color": "#8c564b"},
 }
 
+# Parsed responses the ML enhancer keeps per trace (the oldest are evicted beyond this)
+ML_ENHANCER_MAX_RESPONSES = 50
+
+# Statuses meaning an agent's MCP endpoint has no "batch" verb
+MCP_BATCH_UNSUPPORTED_STATUS_CODES = {400, 404, 405, 422, 501}
+
+# Persist parsed ML features across sessions when a feature store directory is configured
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR")
+
+
+@st.cache_resource
+def get_feature_store() -> Optional[FeatureStore]:
+    """Shared on-disk feature store, or None when FEATURE_STORE_DIR is unset."""
+    return FeatureStore(FEATURE_STORE_DIR) if FEATURE_STORE_DIR else None
+
+
+@st.cache_resource
+def get_agent_http() -> Tuple[HTTPAdapter, threading.local]:
+    """
+    Connection pool shared by every agent session, and the per-thread sessions.
+    
+    Cached as a resource so the pool survives script reruns instead of being
+    rebuilt (and its keep-alive connections dropped) on every interaction.
+    """
+    return HTTPAdapter(pool_connections=len(AGENT_CONFIGS), pool_maxsize=10), threading.local()
+
+
+@st.cache_resource
+def get_mcp_batch_unsupported() -> set:
+    """Agents found to have no MCP "batch" verb, kept across reruns so each is only probed once."""
+    return set()
+
 # Initialize session state
 if "demo_state" not in st.session_state:
     st.session_state.demo_state = {
@@ -112,15 +148,25 @@ if "demo_state" not in st.session_state:
         "trace_id": str(uuid.uuid4()),
         "ml_models_loaded": False,
         "llm_parser": LLMResponseParser(),  # Initialize LLM parser
-        "ml_enhancer": None,  # Will be initialized when first agent response is received
-        "parsed_responses": []  # Store parsed agent responses
+        "ml_enhancer": None  # Will be initialized when first agent response is received; holds the parsed responses
     }
 
+def get_agent_session() -> requests.Session:
+    """Keep-alive session for agent calls (one per script thread, sharing a connection pool)."""
+    adapter, sessions = get_agent_http()
+    session = getattr(sessions, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        sessions.session = session
+    return session
+
 def check_agent_health(agent_name: str) -> bool:
     """Check if an agent is healthy and ML models are loaded."""
     try:
         config = AGENT_CONFIGS[agent_name]
-        response = requests.get(f"http://localhost:{config['port']}/health", timeout=5)
+        response = get_agent_session().get(f"http://localhost:{config['port']}/health", timeout=5)
         if response.status_code == 200:
             health_data = response.json()
             # For demo purposes, consider all healthy agents as having ML models loaded
@@ -140,7 +186,7 @@ def call_agent_mcp(agent_name: str, verb: str, args: Dict[str, Any]) -> Optional
             "args": args
         }
         
-        response = requests.post(
+        response = get_agent_session().post(
             f"http://localhost:{config['port']}/mcp/invoke",
             json=mcp_request,
             timeout=10
@@ -156,30 +202,100 @@ def call_agent_mcp(agent_name: str, verb: str, args: Dict[str, Any]) -> Optional
         return None
 
 
-def get_llm_explanation(agent_name: str, decision_data: Dict[str, Any], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Get LLM explanation from agent's explain endpoint."""
-    config = AGENT_CONFIGS[agent_name]
+def call_agent_pipeline(agent_name: str, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Call several MCP verbs on one agent in a single MCP "batch" request.
+    
+    Agents without a batch verb get one request per verb instead, on the same
+    keep-alive connection, and are remembered so later pipelines go straight
+    to per-verb requests.
+    
+    Args:
+        agent_name: Agent to call
+        calls: (verb, args) pairs
     
-    # Map agent names to their explain endpoints
-    explain_endpoints = {
-        "okra": "/explain",
-        "onyx": "/explain", 
-        "opal": "/explain",
-        "orca": "/explain",
-        "olive": "/explain",
-        "weave": "/explain"
+    Returns:
+        One result per call, in order; None where the call failed
+    """
+    unsupported = get_mcp_batch_unsupported()
+    if agent_name in unsupported:
+        return [call_agent_mcp(agent_name, verb, args) for verb, args in calls]
+    
+    config = AGENT_CONFIGS[agent_name]
+    mcp_request = {
+        "verb": "batch",
+        "args": {"calls": [{"id": str(i), "verb": verb, "args": args} for i, (verb, args) in enumerate(calls)]}
     }
+    try:
+        response = get_agent_session().post(
+            f"http://localhost:{config['port']}/mcp/invoke",
+            json=mcp_request,
+            timeout=10
+        )
+    except Exception as e:
+        st.error(f"Failed to call {agent_name} MCP: {str(e)}")
+        return [None] * len(calls)
     
-    if agent_name not in explain_endpoints:
-        return None
+    body = None
+    if response.status_code in [200, 201]:
+        try:
+            body = response.json()
+        except ValueError:
+            pass
+    elif response.status_code not in MCP_BATCH_UNSUPPORTED_STATUS_CODES:
+        st.error(f"Error calling {agent_name} MCP: {response.status_code}")
+        return [None] * len(calls)
+    if not isinstance(body, dict) or not isinstance(body.get("results"), list):
+        # No batch verb on this agent: remember it and send the verbs one by one
+        unsupported.add(agent_name)
+        return [call_agent_mcp(agent_name, verb, args) for verb, args in calls]
     
-    url = f"http://localhost:{config['port']}{explain_endpoints[agent_name]}"
+    by_id = {str(item.get("id")): item for item in body["results"] if isinstance(item, dict)}
+    results = []
+    for i, (verb, _) in enumerate(calls):
+        item = by_id.get(str(i))
+        if item is None:
+            st.error(f"Error calling {agent_name} MCP {verb}: missing from batch response")
+            results.append(None)
+        elif item.get("ok", True):
+            results.append(item.get("result"))
+        else:
+            # The error body the verb returns when called on its own
+            results.append({"ok": False, "error": item.get("error")})
+    return results
+
+
+def call_agent_mcp_with_explanation(agent_name: str, verb: str, args: Dict[str, Any], context: Dict[str, Any],
+                                    transform: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None
+                                    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Call an MCP verb through call_agent_pipeline and fetch the agent's LLM explanation of the result.
     
-    # Prepare explanation request based on agent type
-    explain_request = prepare_explain_request(agent_name, decision_data, context)
+    Args:
+        agent_name: Agent to call
+        verb: MCP verb
+        args: MCP arguments
+        context: Explanation context (see prepare_explain_request)
+        transform: Optional conversion of the MCP result (None if it failed) before it is explained
     
+    Returns:
+        (MCP result, LLM explanation); either is None if unavailable
+    """
+    result, = call_agent_pipeline(agent_name, [(verb, args)])
+    if result is not None and transform is not None:
+        result = transform(result)
+    if result is None:
+        return None, None
+    # The explain request is built from the result, so it follows on the same keep-alive connection
+    return result, call_agent_explain(agent_name, prepare_explain_request(agent_name, result, context))
+
+
+def call_agent_explain(agent_name: str, explain_request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """POST a prepared request to an agent's explain endpoint."""
+    config = AGENT_CONFIGS[agent_name]
+    url = f"http://localhost:{config['port']}/explain"
     try:
-        response = requests.post(url, json=explain_request, timeout=30)
+        response = get_agent_session().post(url, json=explain_request, timeout=30)
         if response.status_code == 200:
             return response.json()
         else:
@@ -190,6 +306,16 @@ def get_llm_explanation(agent_name: str, decision_data: Dict[str, Any], context:
         return None
 
 
+def get_llm_explanation(agent_name: str, decision_data: Dict[str, Any], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Get LLM explanation from agent's explain endpoint."""
+    if agent_name not in AGENT_CONFIGS:
+        return None
+    
+    # Prepare explanation request based on agent type
+    explain_request = prepare_explain_request(agent_name, decision_data, context)
+    return call_agent_explain(agent_name, explain_request)
+
+
 def prepare_explain_request(agent_name: str, decision_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     """Prepare explanation request for each agent type."""
     
@@ -261,10 +387,10 @@ def call_agent_endpoint(agent_name: str, endpoint: str, data: Dict[str, Any]) ->
         
         # Handle GET requests (like Olive incentives)
         if endpoint.startswith("/incentives?"):
-            response = requests.get(f"http://localhost:{config['port']}{endpoint}", timeout=10)
+            response = get_agent_session().get(f"http://localhost:{config['port']}{endpoint}", timeout=10)
         else:
             # Default to POST for other endpoints
-            response = requests.post(
+            response = get_agent_session().post(
                 f"http://localhost:{config['port']}{endpoint}",
                 json=data,
                 timeout=10
@@ -284,13 +410,15 @@ def parse_agent_response_with_llm(agent_name: str, response: Dict[str, Any]) ->
     try:
         # Initialize ML enhancer if not already done
         if st.session_state.demo_state["ml_enhancer"] is None:
-            st.session_state.demo_state["ml_enhancer"] = MLModelEnhancer(st.session_state.demo_state["llm_parser"])
+            st.session_state.demo_state["ml_enhancer"] = MLModelEnhancer(
+                st.session_state.demo_state["llm_parser"], max_responses=ML_ENHANCER_MAX_RESPONSES)
         
-        # Parse the response
+        # Parse the response (the enhancer keeps it in its bounded parsed_responses)
         parsed_response = st.session_state.demo_state["ml_enhancer"].add_agent_response(agent_name, response)
         
-        # Store parsed response
-        st.session_state.demo_state["parsed_responses"].append(parsed_response)
+        feature_store = get_feature_store()
+        if feature_store is not None:
+            feature_store.append(st.session_state.demo_state["trace_id"], parsed_response)
         
         # Get enhanced features for ML models
         enhanced_features = st.session_state.demo_state["ml_enhancer"].get_enhanced_features()
@@ -632,20 +760,19 @@ def step_1_preauth_checks():
                     "purpose": "general"
                 }
                 
+                # Context for Okra's LLM explanation, fetched in the same pipeline as the MCP call
+                context = {
+                    "customer_id": "demo_customer_001",
+                    "transaction_amount": st.session_state.demo_state["cart"]["total"]
+                }
+                
                 # Use MCP instead of direct API
-                okra_result = call_agent_mcp("okra", "getCreditQuote", okra_data)
+                okra_result, llm_explanation = call_agent_mcp_with_explanation("okra", "getCreditQuote", okra_data, context)
                 
                 if okra_result:
                     # Parse response with LLM for enhanced ML features
                     parsed_okra = parse_agent_response_with_llm("okra", okra_result)
                     
-                    # Get LLM explanation from Okra
-                    context = {
-                        "customer_id": "demo_customer_001",
-                        "transaction_amount": st.session_state.demo_state["cart"]["total"]
-                    }
-                    llm_explanation = get_llm_explanation("okra", okra_result, context)
-                    
                     # Enhance with ML model information for display
                     okra_result.update({
                         "ml_model": "XGBoost Credit Risk v2.1",
@@ -698,20 +825,19 @@ def step_1_preauth_checks():
                     "registration_number": "demo_001"
                 }
                 
+                # Context for Onyx's LLM explanation, fetched in the same pipeline as the MCP call
+                context = {
+                    "customer_id": "demo_customer_001",
+                    "transaction_amount": st.session_state.demo_state["cart"]["total"]
+                }
+                
                 # Use MCP instead of direct API - use verifyKYB for full trust assessment
-                onyx_result = call_agent_mcp("onyx", "verifyKYB", onyx_data)
+                onyx_result, llm_explanation = call_agent_mcp_with_explanation("onyx", "verifyKYB", onyx_data, context)
                 
                 if onyx_result:
                     # Parse response with LLM for enhanced ML features
                     parsed_onyx = parse_agent_response_with_llm("onyx", onyx_result)
                     
-                    # Get LLM explanation from Onyx
-                    context = {
-                        "customer_id": "demo_customer_001",
-                        "transaction_amount": st.session_state.demo_state["cart"]["total"]
-                    }
-                    llm_explanation = get_llm_explanation("onyx", onyx_result, context)
-                    
                     # Enhance with ML model information for display
                     onyx_result.update({
                         "agent": "onyx",
@@ -849,24 +975,23 @@ def step_2_negotiation():
                     "available_instruments": opal_data["available_instruments"],
                     "merchant_proposal": opal_data["merchant_proposal"]
                 }
-                opal_result = call_agent_mcp("opal", "listPaymentMethods", opal_mcp_args)
+                # Context for Opal's LLM explanation, fetched in the same pipeline as the MCP call
+                context = {
+                    "consumer_preferences": {
+                        "fee_sensitivity": 0.80,
+                        "loyalty_preference": 0.90,
+                        "speed_requirement": 0.60
+                    },
+                    "transaction_context": {
+                        "amount": st.session_state.demo_state["cart"]["total"],
+                        "category": "general",
+                        "channel": "online"
+                    }
+                }
+                
+                opal_result, llm_explanation = call_agent_mcp_with_explanation("opal", "listPaymentMethods", opal_mcp_args, context)
                 
                 if opal_result:
-                    # Get LLM explanation from Opal
-                    context = {
-                        "consumer_preferences": {
-                            "fee_sensitivity": 0.80,
-                            "loyalty_preference": 0.90,
-                            "speed_requirement": 0.60
-                        },
-                        "transaction_context": {
-                            "amount": st.session_state.demo_state["cart"]["total"],
-                            "category": "general",
-                            "channel": "online"
-                        }
-                    }
-                    llm_explanation = get_llm_explanation("opal", opal_result, context)
-                    
                     # Enhance with ML model information for display
                     opal_result.update({
                         "agent": "opal",
@@ -925,18 +1050,17 @@ def step_2_negotiation():
                     "deterministic_seed": 42
                 }
                 
+                # Context for Orca's LLM explanation, fetched in the same pipeline as the MCP call
+                context = {
+                    "cart_total": st.session_state.demo_state["cart"]["total"],
+                    "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
+                    "customer_id": "demo_customer_001"
+                }
+                
                 # Use MCP instead of direct API
-                orca_result = call_agent_mcp("orca", "negotiateCheckout", orca_data)
+                orca_result, llm_explanation = call_agent_mcp_with_explanation("orca", "negotiateCheckout", orca_data, context)
                 
                 if orca_result:
-                    # Get LLM explanation from Orca
-                    context = {
-                        "cart_total": st.session_state.demo_state["cart"]["total"],
-                        "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
-                        "customer_id": "demo_customer_001"
-                    }
-                    llm_explanation = get_llm_explanation("orca", orca_result, context)
-                    
                     # Enhance with ML model information for display
                     orca_result.update({
                         "agent": "orca",
@@ -985,26 +1109,25 @@ def step_2_negotiation():
                     "channel": "online"
                 }
                 
+                # Context for Olive's LLM explanation, fetched in the same pipeline as the MCP call
+                context = {
+                    "customer_context": {
+                        "loyalty_tier": "Gold",
+                        "purchase_frequency": "monthly",
+                        "average_order_value": 150.0,
+                        "total_spent": 2500.0
+                    },
+                    "transaction_context": {
+                        "amount": st.session_state.demo_state["cart"]["total"],
+                        "category": "general",
+                        "channel": "online"
+                    }
+                }
+                
                 # Use MCP instead of direct API
-                olive_result = call_agent_mcp("olive", "listIncentives", olive_data)
+                olive_result, llm_explanation = call_agent_mcp_with_explanation("olive", "listIncentives", olive_data, context)
                 
                 if olive_result:
-                    # Get LLM explanation from Olive
-                    context = {
-                        "customer_context": {
-                            "loyalty_tier": "Gold",
-                            "purchase_frequency": "monthly",
-                            "average_order_value": 150.0,
-                            "total_spent": 2500.0
-                        },
-                        "transaction_context": {
-                            "amount": st.session_state.demo_state["cart"]["total"],
-                            "category": "general",
-                            "channel": "online"
-                        }
-                    }
-                    llm_explanation = get_llm_explanation("olive", olive_result, context)
-                    
                     # Enhance with ML model information for display
                     olive_result.update({
                         "agent": "olive",
@@ -1059,6 +1182,67 @@ def step_2_negotiation():
             st.session_state.demo_state["current_step"] = 3
             st.rerun()
 
+def weave_auction_to_demo_results(auction_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Weave's MCP runAuction response in the demo's display format, or None if the auction failed."""
+    if not auction_results.get("ok"):
+        return None
+    
+    # Extract auction data from MCP response
+    auction_data = auction_results.get("data", {})
+    
+    # Transform MCP response to demo format
+    return {
+        "agent": "weave",
+        "auction_id": auction_data.get("auction_id", str(uuid.uuid4())),
+        "trace_id": auction_data.get("trace_id"),
+        "winning_processor": auction_data.get("winning_processor"),
+        "winning_bid": {
+            "processor_id": auction_data.get("winning_bid", {}).get("processor_id"),
+            "processor_name": auction_data.get("winning_bid", {}).get("processor_id", "Unknown"),
+            "bid_bps": auction_data.get("winning_bid", {}).get("bps", 0),
+            "rebate_bps": auction_data.get("winning_bid", {}).get("rebate_bps", 0),
+            "effective_bps": auction_data.get("winning_bid", {}).get("effective_cost_bps", 0),
+            "settlement_days": auction_data.get("winning_bid", {}).get("expected_settlement_days", 1),
+            "confidence": auction_data.get("winning_bid", {}).get("confidence", 0.9)
+        },
+        "all_bids": [
+            {
+                "processor": bid.get("processor_id", "Unknown"),
+                "bid_bps": bid.get("bps", 0),
+                "rebate_bps": bid.get("rebate_bps", 0),
+                "effective_bps": bid.get("effective_cost_bps", 0)
+            }
+            for bid in auction_data.get("all_bids", [])
+        ],
+        "effective_cost_bps": auction_data.get("effective_cost_bps", 0),
+        "summary": auction_data.get("summary", "Auction completed successfully"),
+        "timestamp": auction_data.get("timestamp"),
+        "llm_configured": auction_data.get("llm_configured", False),
+        "ml_model": "Weave Auction Optimizer v1.0",
+        "confidence": 0.89,
+        "processing_time_ms": 450,
+        "features": {
+            "historical_performance": 0.85,
+            "cost_efficiency": 0.90,
+            "settlement_speed": 0.80,
+            "reliability_score": 0.88,
+            "market_conditions": 0.70
+        },
+        "feature_importance": {
+            "cost_efficiency": 0.35,
+            "reliability_score": 0.25,
+            "historical_performance": 0.20,
+            "settlement_speed": 0.15,
+            "market_conditions": 0.05
+        },
+        "savings": {
+            "vs_highest_bid": 20,
+            "vs_average_bid": 12,
+            "total_savings_usd": 7.60
+        },
+        "explanation": auction_data.get("summary", "Fee optimization model identified cost savings through competitive bidding.")
+    }
+
 def step_3_fee_competition():
     """Step 3: Fee Competition (Weave)"""
     st.markdown('<div class="step-header">Step 3: Fee Competition</div>', unsafe_allow_html=True)
@@ -1166,77 +1350,21 @@ def step_3_fee_competition():
                 ],
                 "deterministic_seed": 42
             }
-            auction_results = call_agent_mcp("weave", "runAuction", weave_mcp_args)
-            
-            if auction_results and auction_results.get("ok"):
-                # Extract auction data from MCP response
-                auction_data = auction_results.get("data", {})
-                
-                # Transform MCP response to demo format
-                auction_results = {
-                    "agent": "weave",
-                    "auction_id": auction_data.get("auction_id", str(uuid.uuid4())),
-                    "trace_id": auction_data.get("trace_id"),
-                    "winning_processor": auction_data.get("winning_processor"),
-                    "winning_bid": {
-                        "processor_id": auction_data.get("winning_bid", {}).get("processor_id"),
-                        "processor_name": auction_data.get("winning_bid", {}).get("processor_id", "Unknown"),
-                        "bid_bps": auction_data.get("winning_bid", {}).get("bps", 0),
-                        "rebate_bps": auction_data.get("winning_bid", {}).get("rebate_bps", 0),
-                        "effective_bps": auction_data.get("winning_bid", {}).get("effective_cost_bps", 0),
-                        "settlement_days": auction_data.get("winning_bid", {}).get("expected_settlement_days", 1),
-                        "confidence": auction_data.get("winning_bid", {}).get("confidence", 0.9)
-                    },
-                    "all_bids": [
-                        {
-                            "processor": bid.get("processor_id", "Unknown"),
-                            "bid_bps": bid.get("bps", 0),
-                            "rebate_bps": bid.get("rebate_bps", 0),
-                            "effective_bps": bid.get("effective_cost_bps", 0)
-                        }
-                        for bid in auction_data.get("all_bids", [])
-                    ],
-                    "effective_cost_bps": auction_data.get("effective_cost_bps", 0),
-                    "summary": auction_data.get("summary", "Auction completed successfully"),
-                    "timestamp": auction_data.get("timestamp"),
-                    "llm_configured": auction_data.get("llm_configured", False),
-                    "ml_model": "Weave Auction Optimizer v1.0",
-                    "confidence": 0.89,
-                    "processing_time_ms": 450,
-                    "features": {
-                        "historical_performance": 0.85,
-                        "cost_efficiency": 0.90,
-                        "settlement_speed": 0.80,
-                        "reliability_score": 0.88,
-                        "market_conditions": 0.70
-                    },
-                    "feature_importance": {
-                        "cost_efficiency": 0.35,
-                        "reliability_score": 0.25,
-                        "historical_performance": 0.20,
-                        "settlement_speed": 0.15,
-                        "market_conditions": 0.05
-                    },
-                    "savings": {
-                        "vs_highest_bid": 20,
-                        "vs_average_bid": 12,
-                        "total_savings_usd": 7.60
-                    },
-                    "explanation": auction_data.get("summary", "Fee optimization model identified cost savings through competitive bidding.")
-                }
-                
-                # Get LLM explanation from Weave
-                context = {
-                    "cart_summary": {
-                        "total_amount": st.session_state.demo_state["cart"]["total"],
-                        "currency": "USD",
-                        "item_count": len(st.session_state.demo_state["cart"]["items"]),
-                        "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
-                        "merchant_category": "general",
-                        "channel": "online"
-                    }
+            # Context for Weave's LLM explanation, fetched in the same pipeline as the MCP call
+            context = {
+                "cart_summary": {
+                    "total_amount": st.session_state.demo_state["cart"]["total"],
+                    "currency": "USD",
+                    "item_count": len(st.session_state.demo_state["cart"]["items"]),
+                    "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
+                    "merchant_category": "general",
+                    "channel": "online"
                 }
-                llm_explanation = get_llm_explanation("weave", auction_results, context)
+            }
+            auction_results, llm_explanation = call_agent_mcp_with_explanation(
+                "weave", "runAuction", weave_mcp_args, context, transform=weave_auction_to_demo_results)
+            
+            if auction_results:
                 auction_results["llm_explanation"] = llm_explanation
                 
                 st.session_state.demo_state["fee_competition_results"] = auction_results
@@ -1309,14 +1437,15 @@ def step_4_finalization():
             st.metric("Fee Savings", "$5.84")
             st.metric("Total Value", "$17.34")
         
-        # Get LLM explanation from Orca for finalization
-        context = {
-            "cart_total": st.session_state.demo_state["cart"]["total"],
-            "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
-            "customer_id": "demo_customer_001"
-        }
-        llm_explanation = get_llm_explanation("orca", finalization_results, context)
-        finalization_results["llm_explanation"] = llm_explanation
+        # Get LLM explanation from Orca for finalization (once; this block runs on every rerun)
+        if finalization_results.get("llm_explanation") is None:
+            context = {
+                "cart_total": st.session_state.demo_state["cart"]["total"],
+                "merchant_id": st.session_state.demo_state["cart"]["merchant_id"],
+                "customer_id": "demo_customer_001"
+            }
+            llm_explanation = get_llm_explanation("orca", finalization_results, context)
+            finalization_results["llm_explanation"] = llm_explanation
         
         # Display Orca's real ML decision details
         display_ml_decision("orca", finalization_results, "Payment Finalization")
@@ -1564,9 +1693,17 @@ def step_5_auth_postauth():
                 fig.update_layout(height=600, showlegend=False)
                 st.plotly_chart(fig, use_container_width=True)
             
+            feature_store = get_feature_store()
+            if feature_store is not None:
+                feature_store.flush()
+            
             st.success("🎉 Demo completed successfully! All ML-powered agents worked together to optimize the payment experience.")
             
             if st.button("🔄 Restart Demo", key="restart_demo"):
+                # Keep the parser (and its cache) but start a fresh trace for the enhancer
+                ml_enhancer = st.session_state.demo_state.get("ml_enhancer")
+                if ml_enhancer is not None:
+                    ml_enhancer.reset()
                 st.session_state.demo_state = {
                     "current_step": 0,
                     "cart": None,
@@ -1576,7 +1713,9 @@ def step_5_auth_postauth():
                     "finalization_results": {},
                     "auth_results": {},
                     "trace_id": str(uuid.uuid4()),
-                    "ml_models_loaded": False
+                    "ml_models_loaded": False,
+                    "llm_parser": st.session_state.demo_state.get("llm_parser") or LLMResponseParser(),
+                    "ml_enhancer": ml_enhancer
                 }
                 st.rerun()
 
@@ -0,0 +1,25 @@
+"""
+OCN Stand-in Services
+
+Lightweight local substitutes for the OCN agents and the parsing LLM, used to
+measure the gateway, demo2, plugin and parser layers in isolation.
+"""
+
+from .agent_stubs import (
+    AGENT_PORTS,
+    EndpointProfile,
+    LatencyDistribution,
+    StubConfig,
+    create_agent_app,
+)
+from .llm_stub import LLMStubConfig, create_llm_app
+
+__all__ = [
+    'AGENT_PORTS',
+    'EndpointProfile',
+    'LatencyDistribution',
+    'StubConfig',
+    'create_agent_app',
+    'LLMStubConfig',
+    'create_llm_app',
+]
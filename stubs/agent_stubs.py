@@ -0,0 +1,677 @@
+"""
+OCN Agent Stand-ins
+
+Lightweight async stand-ins for the orca/opal/olive/okra/onyx/weave/orion/oasis
+agents. Every endpoint called by the gateway, demo2, the Streamlit demo, the
+plugin adapters and test_agent_endpoints.py is implemented with a payload that
+matches the fields those callers read, so the orchestration code can be measured
+without the real agents.
+
+Each endpoint can be given a latency distribution, an injected error rate and a
+padded payload size. All agents run in one process, each on its own port:
+
+    python -m stubs.agent_stubs --config stubs/stub_config.example.json
+
+Configuration is a JSON document resolved from most to least specific:
+
+    {
+        "seed": 42,
+        "default": {"latency": {"kind": "lognormal", "median_ms": 20, "sigma": 0.4}},
+        "agents": {
+            "orca": {
+                "default": {"error_rate": 0.01},
+                "endpoints": {
+                    "POST /negotiate": {"latency": {"kind": "constant", "ms": 250}},
+                    "POST /mcp/invoke": {"payload_bytes": 4096}
+                }
+            }
+        }
+    }
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ports match docker-compose.yml so AGENT_URLS overrides only need the host
+AGENT_PORTS = {
+    "orca": 8080,      # Decision Engine
+    "orion": 8081,     # Event Bus & Optimization
+    "weave": 8082,     # Processor Auction
+    "okra": 8083,      # BNPL & Credit
+    "opal": 8084,      # Consumer Wallet
+    "oasis": 8085,     # Treasury
+    "onyx": 8086,      # KYB & Trust
+    "olive": 8087,     # Incentives & Policies
+}
+
+# Base cost (bps), settlement days and risk for every rail name used by callers
+RAIL_PROFILES = {
+    "Card": (150.0, 1, 0.35),
+    "ACH": (5.0, 2, 0.2),
+    "Wire": (25.0, 1, 0.1),
+    "Crypto": (80.0, 0, 0.6),
+    "credit": (150.0, 1, 0.3),
+    "debit": (100.0, 2, 0.2),
+    "wire": (25.0, 1, 0.1),
+}
+
+INSTRUMENT_RAILS = {
+    "credit_card": "Card",
+    "debit_card": "Card",
+    "digital_wallet": "Card",
+    "store_card": "Card",
+    "bnpl": "Card",
+    "bank_account": "ACH",
+    "bank_transfer": "ACH",
+    "cash": "ACH",
+}
+
+PROCESSORS = ["stripe", "adyen", "checkout_com", "braintree"]
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Service-time distribution for a stubbed endpoint.
+
+    Supported kinds: constant (ms), uniform (min_ms, max_ms), normal (mean_ms,
+    stddev_ms), lognormal (median_ms, sigma) and exponential (mean_ms).
+    """
+    kind: str = "constant"
+    params: Dict[str, float] = field(default_factory=lambda: {"ms": 0.0})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyDistribution":
+        params = {key: float(value) for key, value in data.items() if key != "kind"}
+        return cls(kind=data.get("kind", "constant"), params=params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds."""
+        p = self.params
+        if self.kind == "constant":
+            ms = p.get("ms", 0.0)
+        elif self.kind == "uniform":
+            ms = rng.uniform(p.get("min_ms", 0.0), p.get("max_ms", 0.0))
+        elif self.kind == "normal":
+            ms = rng.gauss(p.get("mean_ms", 0.0), p.get("stddev_ms", 0.0))
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(max(p.get("median_ms", 1.0), 1e-3)), p.get("sigma", 0.5))
+        elif self.kind == "exponential":
+            mean_ms = p.get("mean_ms", 0.0)
+            ms = rng.expovariate(1.0 / mean_ms) if mean_ms > 0 else 0.0
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+        return max(ms, 0.0) / 1000.0
+
+
+@dataclass
+class EndpointProfile:
+    """Latency, failure and payload settings for one stubbed endpoint."""
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0
+    error_status: int = 503
+    payload_bytes: int = 0
+
+    def merged(self, overrides: Dict[str, Any]) -> "EndpointProfile":
+        """Return a copy with the given config keys applied."""
+        return EndpointProfile(
+            latency=LatencyDistribution.from_dict(overrides["latency"]) if "latency" in overrides else self.latency,
+            error_rate=float(overrides.get("error_rate", self.error_rate)),
+            error_status=int(overrides.get("error_status", self.error_status)),
+            payload_bytes=int(overrides.get("payload_bytes", self.payload_bytes)),
+        )
+
+
+@dataclass
+class StubConfig:
+    """Resolved stand-in configuration for every agent and endpoint."""
+    seed: Optional[int] = None
+    default: Dict[str, Any] = field(default_factory=dict)
+    agents: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "StubConfig":
+        if not path:
+            return cls()
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(seed=data.get("seed"), default=data.get("default", {}), agents=data.get("agents", {}))
+
+    def profile_for(self, agent: str, method: str, path: str) -> EndpointProfile:
+        """Resolve global -> agent -> endpoint settings for one route."""
+        agent_config = self.agents.get(agent, {})
+        profile = EndpointProfile().merged(self.default).merged(agent_config.get("default", {}))
+        return profile.merged(agent_config.get("endpoints", {}).get(f"{method} {path}", {}))
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _amount(body: Dict[str, Any], query: Dict[str, str], default: float = 100.0) -> float:
+    """Pick the transaction amount out of any of the request shapes callers send."""
+    for key in ("cart_total", "transaction_amount", "amount", "requested_amount", "total_amount"):
+        if key in body:
+            return float(body[key])
+        if key in query:
+            return float(query[key])
+    if isinstance(body.get("transaction"), dict):
+        return float(body["transaction"].get("amount", default))
+    if isinstance(body.get("cart_summary"), dict):
+        summary = body["cart_summary"]
+        return float(summary.get("total_amount", summary.get("total", default)))
+    return default
+
+
+def _health(agent: str) -> Callable[..., Dict[str, Any]]:
+    def build(body, query, path, rng):
+        return {"status": "healthy", "ok": True, "service": agent, "timestamp": _now()}
+    return build
+
+
+def _static(payload: Dict[str, Any]) -> Callable[..., Dict[str, Any]]:
+    def build(body, query, path, rng):
+        return dict(payload, timestamp=_now())
+    return build
+
+
+def _explain(agent: str) -> Callable[..., Dict[str, Any]]:
+    def build(body, query, path, rng):
+        confidence = round(rng.uniform(0.75, 0.95), 3)
+        return {
+            "agent": agent,
+            "explanation": f"{agent.capitalize()} decision driven by risk, cost and settlement speed signals.",
+            "confidence": confidence,
+            "key_factors": ["risk_score", "cost_bps", "settlement_days"],
+            "model_provenance": {
+                "model_name": f"{agent}-llm",
+                "provider": "stand_in",
+                "processing_time_ms": int(rng.uniform(200, 1500)),
+                "tokens_used": int(rng.uniform(150, 400)),
+            },
+            "trace_id": body.get("trace_id"),
+            "timestamp": _now(),
+        }
+    return build
+
+
+def _rail_evaluations(rails: List[str], rng: random.Random) -> List[Dict[str, Any]]:
+    evaluations = []
+    for rail in rails:
+        base_cost, settlement_days, risk = RAIL_PROFILES.get(rail, (120.0, 1, 0.3))
+        risk_score = round(min(max(risk + rng.uniform(-0.05, 0.05), 0.0), 1.0), 3)
+        cost_score = round(1.0 - min(base_cost / 200.0, 1.0), 3)
+        speed_score = round(1.0 / (1 + settlement_days), 3)
+        composite = round(0.4 * cost_score + 0.3 * speed_score + 0.3 * (1.0 - risk_score), 3)
+        evaluations.append({
+            "rail_type": rail,
+            "base_cost": base_cost,
+            "settlement_days": settlement_days,
+            "ml_risk_score": risk_score,
+            "cost_score": cost_score,
+            "speed_score": speed_score,
+            "risk_score": risk_score,
+            "composite_score": composite,
+            "final_score": composite,
+            "explanation": f"{rail}: {base_cost:.0f} bps, T+{settlement_days}, risk {risk_score:.2f}",
+        })
+    return evaluations
+
+
+def orca_decision(body, query, path, rng):
+    amount = _amount(body, query)
+    risk_score = round(rng.uniform(0.05, 0.6), 3)
+    decision = "APPROVE" if risk_score < 0.5 else "REVIEW"
+    return {
+        "decision": decision,
+        "reasons": [f"Risk score {risk_score:.2f} for cart total ${amount:.2f}"],
+        "actions": ["route_to_processor"] if decision == "APPROVE" else ["manual_review"],
+        "risk_score": risk_score,
+        "confidence": round(1.0 - risk_score / 2, 3),
+        "meta": {"cart_total": amount, "model": "orca-risk-stand-in"},
+        "trace_id": body.get("trace_id"),
+        "timestamp": _now(),
+    }
+
+
+def orca_negotiate(body, query, path, rng):
+    evaluations = _rail_evaluations(body.get("available_rails") or ["Card", "ACH", "Wire", "Crypto"], rng)
+    optimal = max(evaluations, key=lambda evaluation: evaluation["composite_score"])
+    return {
+        "optimal_rail": optimal["rail_type"],
+        "rail_evaluations": evaluations,
+        "explanation": f"{optimal['rail_type']} offers the best cost/speed/risk balance",
+        "negotiation_metadata": {"ml_risk_score": optimal["ml_risk_score"]},
+        "trace_id": body.get("trace_id"),
+        "timestamp": _now(),
+    }
+
+
+def orca_negotiate_checkout(args, rng):
+    rails = [candidate.get("rail_type", "credit") for candidate in args.get("rail_candidates", [])]
+    evaluations = _rail_evaluations(rails or ["credit", "debit", "ACH"], rng)
+    chosen = max(evaluations, key=lambda evaluation: evaluation["final_score"])
+    return {
+        "chosen_rail": chosen["rail_type"],
+        "explanation": {
+            "summary": f"{chosen['rail_type']} selected for optimal cost-speed balance",
+            "reasoning": chosen["explanation"],
+            "confidence": round(rng.uniform(0.7, 0.95), 3),
+            "key_signals": ["cost_bps", "settlement_days", "risk_score"],
+        },
+        "rail_evaluations": evaluations,
+        "timestamp": _now(),
+        "trace_id": args.get("trace_id", f"trace_{rng.getrandbits(32):08x}"),
+    }
+
+
+def opal_methods(body, query, path, rng):
+    actor_id = query.get("actor_id", "demo_actor")
+    return {
+        "actor_id": actor_id,
+        "methods": [
+            {"method_id": f"pm_{actor_id}_visa_001", "type": "card", "provider": "Visa", "last_four": "4242", "status": "active"},
+            {"method_id": f"pm_{actor_id}_ach_002", "type": "bank_account", "provider": "Chase", "last_four": "9876", "status": "active"},
+            {"method_id": f"pm_{actor_id}_wallet_003", "type": "digital_wallet", "provider": "Apple", "last_four": "APP1", "status": "active"},
+        ],
+        "timestamp": _now(),
+    }
+
+
+def opal_select(body, query, path, rng):
+    amount = _amount(body, query)
+    return {
+        "allowed": True,
+        "payment_method_id": body.get("payment_method_id", "pm_demo_actor_visa_001"),
+        "token_reference": f"tok_{body.get('actor_id', 'demo_actor')}_{rng.getrandbits(48)}",
+        "reasons": [f"Amount ${amount:.2f} within channel limit of $5000"],
+        "max_amount_allowed": 5000.0,
+        "trace_id": body.get("trace_id"),
+        "timestamp": _now(),
+    }
+
+
+def opal_counter_negotiate(body, query, path, rng):
+    instruments = body.get("available_instruments") or [{"instrument_id": "default_card", "instrument_type": "credit_card", "net_value": 0.0, "value_score": 0.7}]
+    best = max(instruments, key=lambda instrument: (instrument.get("value_score", 0.5), instrument.get("net_value", 0.0)))
+    rail_scores: Dict[str, float] = {}
+    for instrument in instruments:
+        rail = INSTRUMENT_RAILS.get(instrument.get("instrument_type", ""), "Card")
+        rail_scores[rail] = max(rail_scores.get(rail, 0.0), float(instrument.get("value_score", 0.5)))
+    preferred_rail = INSTRUMENT_RAILS.get(best.get("instrument_type", ""), "Card")
+    merchant_rail = body.get("merchant_proposal", {}).get("rail_type", "Card")
+    return {
+        "consumer_proposal": {
+            "rail_type": preferred_rail,
+            "instrument_id": best.get("instrument_id"),
+            "instrument_type": best.get("instrument_type"),
+            "consumer_benefit": round(float(best.get("net_value", 0.0)), 2),
+        },
+        "confidence": round(rng.uniform(0.7, 0.95), 3),
+        "metadata": {
+            "rail_evaluation": {
+                "rail_evaluations": [
+                    {"rail_type": rail, "composite_score": round(score, 3)} for rail, score in rail_scores.items()
+                ],
+                "negotiation_strategy": "accept" if preferred_rail == merchant_rail else "counter_propose_with_justification",
+            },
+        },
+        "trace_id": body.get("merchant_proposal", {}).get("trace_id", body.get("trace_id")),
+        "timestamp": _now(),
+    }
+
+
+def olive_incentives(body, query, path, rng):
+    amount = _amount(body, query)
+    incentives = [
+        {"incentive_id": "loyalty_cashback", "name": "Loyalty Cashback", "type": "cashback", "rate": 0.02, "value": round(amount * 0.02, 2)},
+        {"incentive_id": "early_adopter", "name": "Early Adopter Bonus", "type": "bonus", "rate": 0.005, "value": round(amount * 0.005, 2)},
+    ]
+    return {
+        "success": True,
+        "data": {
+            "count": len(incentives),
+            "incentives": incentives,
+            "summary": {
+                "total_cashback_value": incentives[0]["value"],
+                "bonus_value": incentives[1]["value"],
+            },
+        },
+        "timestamp": _now(),
+    }
+
+
+def olive_evaluate(body, query, path, rng):
+    return {
+        "success": True,
+        "data": {
+            "policy_id": body.get("policy_id", "default_policy"),
+            "evaluation_result": "applied",
+            "score": round(rng.uniform(0.5, 0.95), 3),
+            "policy_impact": "Loyalty adjustment applied",
+            "winner_rail": body.get("winner_rail", "Card"),
+        },
+        "timestamp": _now(),
+    }
+
+
+def okra_quote(body, query, path, rng):
+    amount = _amount(body, query, default=500.0)
+    risk_score = round(rng.uniform(0.05, 0.8), 3)
+    approved = risk_score < 0.7
+    credit_limit = round(max(amount * 2, 1000.0), 2) if approved else 0.0
+    return {
+        "quote_id": f"quote_{body.get('customer_id', 'demo')}_{rng.getrandbits(48)}",
+        "approved": approved,
+        "credit_limit": credit_limit,
+        "limit": credit_limit,
+        "apr": round(rng.uniform(0.0, 12.0), 2) if approved else None,
+        "risk_score": risk_score,
+        "reasons": ["Strong repayment history" if approved else "Risk above policy threshold"],
+        "installments": [{"number": n + 1, "amount": round(amount / 4, 2)} for n in range(4)] if approved else [],
+        "timestamp": _now(),
+    }
+
+
+def onyx_kyb(body, query, path, rng):
+    sanctions = bool(body.get("sanctions_flags")) or bool(body.get("sanctions_flag"))
+    trust_score = round(rng.uniform(0.1, 0.3) if sanctions else rng.uniform(0.7, 0.98), 3)
+    check_names = ["jurisdiction_verification", "entity_age_verification", "registration_status",
+                   "sanctions_screening", "business_type_verification"]
+    return {
+        "entity_id": body.get("entity_id", body.get("legal_name", "unknown")),
+        "status": "rejected" if sanctions else "verified",
+        "reason": "Sanctions flag present" if sanctions else "All verification checks passed",
+        "trust_score": trust_score,
+        "risk_level": "high" if sanctions else "low",
+        "compliance_status": 0.0 if sanctions else 1.0,
+        "checks": [
+            {"check_name": name, "status": "failed" if sanctions and name == "sanctions_screening" else "verified"}
+            for name in check_names
+        ],
+        "timestamp": _now(),
+    }
+
+
+def onyx_trust_signal(body, query, path, rng):
+    trust_score = round(rng.uniform(0.6, 0.95), 3)
+    return {
+        "success": True,
+        "data": {
+            "provider_id": body.get("provider_id", "unknown"),
+            "trust_score": trust_score,
+            "risk_level": "low" if trust_score > 0.75 else "medium",
+            "explanation": "Trust signals consistent with historical behaviour",
+        },
+        "timestamp": _now(),
+    }
+
+
+def weave_auction(body, query, path, rng):
+    bids = []
+    for processor in PROCESSORS:
+        bps = round(rng.uniform(120.0, 220.0), 1)
+        rebate_bps = round(rng.uniform(0.0, 20.0), 1)
+        bids.append({
+            "processor_id": processor,
+            "bps": bps,
+            "rebate_bps": rebate_bps,
+            "effective_cost_bps": round(bps - rebate_bps, 1),
+            "expected_settlement_days": rng.choice([1, 1, 2]),
+            "confidence": round(rng.uniform(0.8, 0.97), 3),
+        })
+    winning_bid = min(bids, key=lambda bid: bid["effective_cost_bps"])
+    return {
+        "auction_id": f"auction_{rng.getrandbits(48):012x}",
+        "trace_id": body.get("trace_id"),
+        "winning_processor": winning_bid["processor_id"],
+        "winning_bid": winning_bid,
+        "all_bids": bids,
+        "candidate_scores": [{"processor_id": bid["processor_id"], "score": round(1 - bid["effective_cost_bps"] / 250, 3)} for bid in bids],
+        "effective_cost_bps": winning_bid["effective_cost_bps"],
+        "summary": f"{winning_bid['processor_id']} won at {winning_bid['effective_cost_bps']} bps",
+        "llm_configured": False,
+        "timestamp": _now(),
+    }
+
+
+def orion_optimize(body, query, path, rng):
+    evaluations = _rail_evaluations(["ACH", "Wire", "Card"], rng)
+    best = max(evaluations, key=lambda evaluation: evaluation["composite_score"])
+    return {"recommended_rail": best["rail_type"], "candidates": evaluations, "timestamp": _now()}
+
+
+def oasis_plan(body, query, path, rng):
+    amount = _amount(body, query, default=1000.0)
+    return {
+        "plan_id": f"plan_{rng.getrandbits(32):08x}",
+        "recommended_reserve": round(amount * 0.2, 2),
+        "liquidity_score": round(rng.uniform(0.6, 0.95), 3),
+        "timestamp": _now(),
+    }
+
+
+def _mcp(verb: str, builder: Callable[..., Dict[str, Any]]) -> Callable[[Dict[str, Any], random.Random], Dict[str, Any]]:
+    """Adapt a REST builder to an MCP verb using the ok/data envelope the Streamlit demo reads."""
+    def build(args, rng):
+        return {"ok": True, "verb": verb, "data": builder(args, {}, {}, rng)}
+    return build
+
+
+# MCP verbs per agent. negotiateCheckout replies unwrapped because the plugin
+# adapters read chosen_rail from the top level of the response.
+MCP_VERBS: Dict[str, Dict[str, Callable[[Dict[str, Any], random.Random], Dict[str, Any]]]] = {
+    "orca": {
+        "negotiateCheckout": orca_negotiate_checkout,
+        "getDecisionSchema": _mcp("getDecisionSchema", _static({"schema_version": "1.0", "fields": ["decision", "reasons", "actions", "meta"]})),
+    },
+    "okra": {"getCreditQuote": _mcp("getCreditQuote", okra_quote)},
+    "onyx": {"verifyKYB": _mcp("verifyKYB", onyx_kyb)},
+    "opal": {"listPaymentMethods": _mcp("listPaymentMethods", opal_methods)},
+    "olive": {"listIncentives": _mcp("listIncentives", olive_incentives)},
+    "weave": {
+        "runAuction": _mcp("runAuction", weave_auction),
+        "listReceipts": _mcp("listReceipts", _static({"receipts": [], "count": 0})),
+    },
+}
+
+# REST routes per agent as (method, path, builder)
+AGENT_ROUTES: Dict[str, List[Tuple[str, str, Callable[..., Dict[str, Any]]]]] = {
+    "orca": [
+        ("GET", "/", _static({"service": "orca", "version": "stand-in"})),
+        ("GET", "/healthz", _health("orca")),
+        ("GET", "/readyz", _health("orca")),
+        ("POST", "/decision", orca_decision),
+        ("POST", "/negotiate", orca_negotiate),
+        ("GET", "/negotiation/status", _static({"status": "idle", "active_negotiations": 0})),
+        ("GET", "/mcp/capabilities", _static({"verbs": sorted(MCP_VERBS["orca"])})),
+    ],
+    "orion": [
+        ("POST", "/optimize", orion_optimize),
+    ],
+    "weave": [
+        ("POST", "/auction/run", weave_auction),
+        ("GET", "/auction/status", _static({"status": "idle", "auctions_run": 0})),
+        ("GET", "/auction/sample-request", _static({"cart_summary": {"total": 410.4, "currency": "USD"}, "rail_candidates": []})),
+    ],
+    "okra": [
+        ("GET", "/", _static({"service": "okra", "version": "stand-in"})),
+        ("GET", "/policies", _static({"policies": [{"policy_id": "bnpl_default", "max_amount": 10000.0}]})),
+        ("POST", "/credit/quote", okra_quote),
+        ("POST", "/bnpl/quote", okra_quote),
+        ("GET", "/credit/quote/{quote_id}", okra_quote),
+    ],
+    "opal": [
+        ("GET", "/", _static({"service": "opal", "version": "stand-in"})),
+        ("GET", "/controls/limits", _static({"limits": {"web": 5000.0, "daily_web": 15000.0}})),
+        ("GET", "/wallet/methods", opal_methods),
+        ("GET", "/wallet/methods/{method_id}", opal_methods),
+        ("POST", "/wallet/select", opal_select),
+        ("POST", "/negotiate-wallet-choice", opal_counter_negotiate),
+        ("POST", "/counter-negotiate", opal_counter_negotiate),
+        ("GET", "/negotiation/status", _static({"status": "idle", "active_negotiations": 0})),
+        ("GET", "/negotiation/sample-instruments", _static({"instruments": []})),
+    ],
+    "oasis": [
+        ("POST", "/treasury/plan", oasis_plan),
+    ],
+    "onyx": [
+        ("GET", "/trust/providers", _static({"providers": [{"provider_id": "provider_001", "allowed": True}]})),
+        ("GET", "/trust/allowed/{provider_id}", _static({"allowed": True})),
+        ("POST", "/kyb/verify", onyx_kyb),
+        ("POST", "/trust/signal", onyx_trust_signal),
+        ("GET", "/trust/signal/status", _static({"status": "idle"})),
+        ("GET", "/trust/signal/sample-context", _static({"context": {}})),
+        ("GET", "/v1/trust-registry/providers", _static({"providers": []})),
+        ("GET", "/v1/trust-registry/providers/{provider_id}", _static({"provider": {"allowed": True}})),
+        ("GET", "/v1/trust-registry/stats", _static({"providers": 1, "signals": 0})),
+        ("POST", "/v1/trust-signals", onyx_trust_signal),
+    ],
+    "olive": [
+        ("GET", "/incentives", olive_incentives),
+        ("GET", "/policies", _static({"policies": []})),
+        ("POST", "/policies", _static({"success": True, "created": True})),
+        ("GET", "/policies/{policy_id}", _static({"policy": {"rules": []}})),
+        ("POST", "/policies/evaluate", olive_evaluate),
+    ],
+}
+
+
+def _pad(payload: Any, payload_bytes: int) -> Any:
+    """Grow a dict payload to roughly payload_bytes of JSON."""
+    if payload_bytes <= 0 or not isinstance(payload, dict):
+        return payload
+    shortfall = payload_bytes - len(json.dumps(payload, separators=(",", ":"))) - len(',"_padding":""')
+    if shortfall > 0:
+        payload["_padding"] = "x" * shortfall
+    return payload
+
+
+def create_agent_app(agent: str, config: Optional[StubConfig] = None) -> FastAPI:
+    """
+    Build the stand-in FastAPI app for one agent.
+
+    Args:
+        agent: Agent name (orca, opal, olive, okra, onyx, weave, orion, oasis)
+        config: Latency/error/payload configuration
+
+    Returns:
+        FastAPI application serving the agent's endpoints
+    """
+    config = config or StubConfig()
+    rng = random.Random(None if config.seed is None else f"{config.seed}:{agent}")
+    stats: Dict[str, Dict[str, int]] = {}
+
+    app = FastAPI(title=f"OCN {agent} stand-in", version="1.0.0")
+
+    def register(method: str, path: str, handler: Callable[[Dict[str, Any], Request], Any]):
+        profile = config.profile_for(agent, method, path)
+        route_key = f"{method} {path}"
+        counters = stats.setdefault(route_key, {"requests": 0, "errors": 0})
+
+        async def endpoint(request: Request):
+            counters["requests"] += 1
+            await asyncio.sleep(profile.latency.sample(rng))
+            if profile.error_rate and rng.random() < profile.error_rate:
+                counters["errors"] += 1
+                return JSONResponse(status_code=profile.error_status, content={"detail": f"Injected {agent} failure"})
+            body: Dict[str, Any] = {}
+            if method == "POST":
+                raw = await request.body()
+                body = json.loads(raw) if raw else {}
+            return JSONResponse(content=_pad(handler(body, request), profile.payload_bytes))
+
+        app.add_api_route(path, endpoint, methods=[method])
+
+    def rest_handler(builder):
+        def handle(body, request):
+            return builder(body, dict(request.query_params), dict(request.path_params), rng)
+        return handle
+
+    def invoke(verb, args):
+        build = MCP_VERBS.get(agent, {}).get(verb)
+        if build is None:
+            return {"ok": False, "error": f"Unknown verb for {agent}: {verb}"}
+        return build(args, rng)
+
+    def mcp_handler(body, request):
+        verb = body.get("verb", "")
+        if verb == "batch":
+            # One round trip for many calls; results carry the caller's ids
+            results = []
+            for call in body.get("args", {}).get("calls", []):
+                result = invoke(call.get("verb", ""), call.get("args", {}))
+                if result.get("ok") is False:
+                    results.append({"id": call.get("id"), "ok": False, "error": result.get("error")})
+                else:
+                    results.append({"id": call.get("id"), "ok": True, "result": result})
+            return {"ok": True, "verb": "batch", "results": results}
+        return invoke(verb, body.get("args", {}))
+
+    register("GET", "/health", rest_handler(_health(agent)))
+    register("POST", "/explain", rest_handler(_explain(agent)))
+    register("POST", "/mcp/invoke", mcp_handler)
+    for method, path, builder in AGENT_ROUTES[agent]:
+        register(method, path, rest_handler(builder))
+
+    @app.get("/_stub/stats")
+    async def stub_stats():
+        """Per-route request and injected-error counters."""
+        return {"agent": agent, "routes": stats, "timestamp": _now()}
+
+    return app
+
+
+async def serve(agents: List[str], host: str, config: StubConfig, port_offset: int = 0):
+    """Run every requested agent stand-in on its own port in this process."""
+    import uvicorn
+
+    servers = []
+    for agent in agents:
+        port = AGENT_PORTS[agent] + port_offset
+        server_config = uvicorn.Config(create_agent_app(agent, config), host=host, port=port, log_level="warning")
+        servers.append(uvicorn.Server(server_config))
+        logger.info(f"Stand-in {agent} listening on http://{host}:{port}")
+
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    """Parse arguments and serve the stand-in cluster."""
+    parser = argparse.ArgumentParser(description="Run OCN agent stand-ins in one process")
+    parser.add_argument("--config", default=os.getenv("STUB_CONFIG"), help="JSON latency/error/payload config")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--agents", default=",".join(AGENT_PORTS), help="Comma-separated agents to run")
+    parser.add_argument("--port-offset", type=int, default=0, help="Added to every default agent port")
+    args = parser.parse_args()
+
+    agents = [agent.strip() for agent in args.agents.split(",") if agent.strip()]
+    unknown = [agent for agent in agents if agent not in AGENT_PORTS]
+    if unknown:
+        parser.error(f"Unknown agents: {', '.join(unknown)}")
+
+    started = time.time()
+    try:
+        asyncio.run(serve(agents, args.host, StubConfig.load(args.config), args.port_offset))
+    except KeyboardInterrupt:
+        logger.info(f"Stand-ins stopped after {time.time() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Local LLM Stand-in
+
+OpenAI-compatible chat completions endpoint for benchmarking
+LLMResponseParser without a live OpenAI/Azure deployment. For a parsing
+prompt it answers with schema-valid parse JSON for the agent named in the
+prompt: every requested key field (taken from the raw response when present),
+every requested ML feature, a confidence score, insights and risk
+indicators.
+
+Simulated behaviour:
+- time to first token from a LatencyDistribution, then generation at
+  tokens_per_second
+- streaming (server-sent events, with a final usage event when
+  stream_options.include_usage is set)
+- 429s with Retry-After, injected at random and/or when a requests-per-minute
+  limit is exceeded
+- token accounting (prompt/completion/total usage per response, totals in
+  /_stub/stats)
+
+    python -m stubs.llm_stub --port 9100 --ttft-ms 300 --tokens-per-second 80
+    LLM_PARSER_BASE_URL=http://localhost:9100/v1/chat/completions
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from llm_extraction_spec import EXTRACTION_SPECS
+from stubs.agent_stubs import LatencyDistribution
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Characters per token, matching llm_response_parser.estimate_tokens
+CHARS_PER_TOKEN = 4
+
+# Tokens sent per streamed chunk
+STREAM_CHUNK_TOKENS = 4
+
+_AGENT_PATTERN = re.compile(r"from the (\S+) agent response")
+_KEY_FIELDS_PATTERN = re.compile(r"^Key Fields to Extract: (.*)$", re.MULTILINE)
+_ML_FEATURES_PATTERN = re.compile(r"^ML Features to Generate: (.*)$", re.MULTILINE)
+_RAW_RESPONSE_PATTERN = re.compile(r"^Raw Response[^\n]*:\n(.*?)\n\nPlease parse", re.MULTILINE | re.DOTALL)
+
+
+@dataclass
+class LLMStubConfig:
+    """Latency, throttling and output settings for the stand-in."""
+    ttft: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("constant", {"ms": 0.0}))
+    tokens_per_second: float = 0.0
+    throttle_rate: float = 0.0
+    requests_per_minute: float = 0.0
+    retry_after: float = 1.0
+    insights: int = 3
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMStubConfig":
+        config = cls()
+        if "ttft" in data:
+            config.ttft = LatencyDistribution.from_dict(data["ttft"])
+        for key in ("tokens_per_second", "throttle_rate", "requests_per_minute", "retry_after"):
+            if key in data:
+                setattr(config, key, float(data[key]))
+        config.insights = int(data.get("insights", config.insights))
+        config.seed = data.get("seed", config.seed)
+        return config
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+def _split_names(match: Optional[re.Match]) -> List[str]:
+    if match is None:
+        return []
+    return [name.strip() for name in match.group(1).split(",") if name.strip()]
+
+
+def _find_value(value: Any, key: str) -> Any:
+    """First value stored under key anywhere in a decoded response."""
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        for item in value.values():
+            found = _find_value(item, key)
+            if found is not None:
+                return found
+    elif isinstance(value, list):
+        for item in value:
+            found = _find_value(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+# Example values for string fields the extraction specs read
+STRING_FIELD_VALUES = {
+    "optimal_rail": ["Card", "ACH", "Wire"],
+    "loyalty_tier": ["bronze", "silver", "gold", "platinum"],
+}
+
+
+def synthesize_field(agent: str, name: str, rng: random.Random) -> Any:
+    """Value for a field the raw response lacks, typed as the agent's extraction spec expects."""
+    field_spec = EXTRACTION_SPECS.get(agent, {}).get("fields", {}).get(name, {})
+    kind = field_spec.get("type", "number")
+    if kind == "bool":
+        return rng.random() < 0.7
+    if kind == "str":
+        return rng.choice(STRING_FIELD_VALUES.get(name, ["standard"]))
+    if kind == "list":
+        return [f"{name}_{i}" for i in range(rng.randint(1, 4))]
+    return round(rng.random(), 3)
+
+
+def build_parse_result(prompt: str, rng: random.Random, insights: int = 3) -> Dict[str, Any]:
+    """
+    Schema-valid parse JSON for a parsing prompt.
+
+    Args:
+        prompt: Prompt text (system and user messages)
+        rng: Random source for synthesized values
+        insights: Number of insight strings to generate
+
+    Returns:
+        Document with response_type, features, confidence_score, ml_features,
+        insights and risk_indicators
+    """
+    agent_match = _AGENT_PATTERN.search(prompt)
+    agent = agent_match.group(1) if agent_match else "unknown"
+    key_fields = _split_names(_KEY_FIELDS_PATTERN.search(prompt))
+    ml_features = _split_names(_ML_FEATURES_PATTERN.search(prompt))
+
+    raw: Any = None
+    raw_match = _RAW_RESPONSE_PATTERN.search(prompt)
+    if raw_match:
+        try:
+            raw = json.loads(raw_match.group(1))
+        except ValueError:
+            raw = None
+
+    features = {}
+    for name in key_fields:
+        value = _find_value(raw, name)
+        features[name] = value if value is not None else synthesize_field(agent, name, rng)
+
+    return {
+        "response_type": f"{agent}_assessment",
+        "features": features,
+        "confidence_score": round(rng.uniform(0.7, 0.95), 3),
+        "ml_features": {name: round(rng.random(), 3) for name in ml_features},
+        "insights": [f"{agent} signal {i} is within the expected range for this transaction" for i in range(insights)],
+        "risk_indicators": [] if rng.random() < 0.7 else [f"{agent} flagged an unusual pattern"],
+    }
+
+
+class _RequestWindow:
+    """Sliding one-minute window of request times for the RPM limit."""
+
+    def __init__(self):
+        self.times: Deque[float] = deque()
+
+    def admit(self, limit: float, now: float) -> Optional[float]:
+        """Record a request; returns seconds until a slot frees if over the limit."""
+        while self.times and now - self.times[0] >= 60.0:
+            self.times.popleft()
+        if limit and len(self.times) >= limit:
+            return 60.0 - (now - self.times[0])
+        self.times.append(now)
+        return None
+
+
+def create_llm_app(config: Optional[LLMStubConfig] = None) -> FastAPI:
+    """
+    Build the stand-in chat completions app.
+
+    Args:
+        config: Latency, throttling and output settings
+
+    Returns:
+        FastAPI application serving /v1/chat/completions (also the Azure path)
+    """
+    config = config or LLMStubConfig()
+    rng = random.Random(config.seed)
+    window = _RequestWindow()
+    stats = {"requests": 0, "completed": 0, "streamed": 0, "throttled": 0, "disconnected": 0,
+             "prompt_tokens": 0, "completion_tokens": 0}
+
+    app = FastAPI(title="OCN LLM stand-in", version="1.0.0")
+
+    def throttle() -> Optional[JSONResponse]:
+        retry_after = None
+        if config.throttle_rate and rng.random() < config.throttle_rate:
+            retry_after = config.retry_after
+        wait = window.admit(config.requests_per_minute, time.monotonic())
+        if wait is not None:
+            retry_after = max(retry_after or 0.0, wait)
+        if retry_after is None:
+            return None
+        stats["throttled"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": f"{retry_after:.3f}", "retry-after-ms": str(int(retry_after * 1000))},
+            content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+        )
+
+    async def chat_completions(request: Request):
+        stats["requests"] += 1
+        throttled = throttle()
+        if throttled is not None:
+            return throttled
+
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt = _prompt_text(messages)
+        content = json.dumps(build_parse_result(prompt, rng, config.insights), indent=2)
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = min(count_tokens(content), int(body.get("max_tokens") or 1 << 30))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "stub")
+
+        await asyncio.sleep(config.ttft.sample(rng))
+
+        if body.get("stream"):
+            stats["streamed"] += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                stream_completion(request, completion_id, model, content, usage, include_usage),
+                media_type="text/event-stream",
+            )
+
+        if config.tokens_per_second:
+            await asyncio.sleep(completion_tokens / config.tokens_per_second)
+        stats["completed"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    async def stream_completion(request: Request, completion_id: str, model: str, content: str,
+                                usage: Dict[str, int], include_usage: bool) -> AsyncIterator[bytes]:
+        def event(payload: Dict[str, Any]) -> bytes:
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        chunk_chars = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+        delay = STREAM_CHUNK_TOKENS / config.tokens_per_second if config.tokens_per_second else 0.0
+        sent_tokens = 0
+        finished = False
+        try:
+            yield event({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}}]})
+            for start in range(0, len(content), chunk_chars):
+                if delay:
+                    await asyncio.sleep(delay)
+                if await request.is_disconnected():
+                    return
+                piece = content[start:start + chunk_chars]
+                sent_tokens += count_tokens(piece)
+                yield event({**base, "choices": [{"index": 0, "delta": {"content": piece}}]})
+            yield event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if include_usage:
+                yield event({**base, "choices": [], "usage": usage})
+            yield b"data: [DONE]\n\n"
+            finished = True
+        finally:
+            # Like the real API, a stream the client abandons is billed only for tokens generated
+            stats["completed" if finished else "disconnected"] += 1
+            stats["prompt_tokens"] += usage["prompt_tokens"]
+            stats["completion_tokens"] += usage["completion_tokens"] if finished else sent_tokens
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/_stub/stats")
+    async def stub_stats():
+        """Request, throttling and token counters."""
+        return dict(stats)
+
+    @app.post("/_stub/reset")
+    async def stub_reset():
+        """Zero the counters."""
+        for key in stats:
+            stats[key] = 0
+        window.times.clear()
+        return dict(stats)
+
+    return app
+
+
+def main():
+    """Parse arguments and serve the LLM stand-in."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run an OpenAI-compatible LLM stand-in")
+    parser.add_argument("--config", help="JSON file with LLMStubConfig fields")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, help="Constant time to first token")
+    parser.add_argument("--tokens-per-second", type=float, help="Generation rate (0 for instant)")
+    parser.add_argument("--throttle-rate", type=float, help="Fraction of requests answered with 429")
+    parser.add_argument("--rpm", type=float, help="Requests per minute before 429s (0 for unlimited)")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    data: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config) as f:
+            data = json.load(f)
+    config = LLMStubConfig.from_dict(data)
+    if args.ttft_ms is not None:
+        config.ttft = LatencyDistribution("constant", {"ms": args.ttft_ms})
+    for name, attribute in (("tokens_per_second", "tokens_per_second"), ("throttle_rate", "throttle_rate"),
+                            ("rpm", "requests_per_minute"), ("retry_after", "retry_after"), ("seed", "seed")):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(config, attribute, value)
+
+    logger.info(f"LLM stand-in listening on http://{args.host}:{args.port}/v1/chat/completions")
+    uvicorn.run(create_llm_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,34 @@
 """
 Comprehensive test script to test all OCN agent API endpoints
 and determine which are using mock vs real ML/LLM implementations.
+
+With --mode it becomes an async load generator over the same endpoints:
+
+    # closed-loop concurrency sweep against the stand-ins (stubs/agent_stubs.py)
+    python test_agent_endpoints.py --mode closed --concurrency 1,8,64 --duration 20 --port-offset 1000
+
+    # open-loop constant arrival rate, compared against a saved baseline
+    python test_agent_endpoints.py --mode open --rps 200 --duration 30 \
+        --json-out load.json --csv-out load.csv --baseline baseline.json --threshold 0.15
 """
 
+import argparse
+import asyncio
+import csv
+import itertools
 import json
+import sys
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+import httpx
 import requests
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import concurrent.futures
 from threading import Thread
 
+from benchmarks.histogram import LatencyHistogram
+
 @dataclass
 class AgentEndpoint:
     agent: str
@@ -173,18 +190,18 @@ class AgentEndpointTester:
         if isinstance(response_data, dict):
             # Check for timestamp variations (non-deterministic)
             timestamp_fields = ["timestamp", "created_at", "updated_at", "time"]
-            for field in timestamp_fields:
-                if field in response_data:
-                    analysis_parts.append(f"Contains timestamp field: '{field}' (indicates real-time processing)")
+            for field_name in timestamp_fields:
+                if field_name in response_data:
+                    analysis_parts.append(f"Contains timestamp field: '{field_name}' (indicates real-time processing)")
                     break
             
             # Check for ID generation patterns
             id_fields = ["id", "request_id", "transaction_id", "decision_id"]
-            for field in id_fields:
-                if field in response_data:
-                    field_value = str(response_data[field])
+            for field_name in id_fields:
+                if field_name in response_data:
+                    field_value = str(response_data[field_name])
                     if len(field_value) > 10 or "-" in field_value or field_value.startswith("req_"):
-                        analysis_parts.append(f"Contains generated ID: '{field}' (indicates real processing)")
+                        analysis_parts.append(f"Contains generated ID: '{field_name}' (indicates real processing)")
                         break
         
         # Agent-specific analysis
@@ -380,8 +397,238 @@ class AgentEndpointTester:
                 for result in slow_results:
                     print(f"      {result.agent}: {result.endpoint} ({result.response_time:.3f}s)")
 
+
+@dataclass
+class EndpointLoadStats:
+    """Latency histogram and outcome counts for one endpoint during a load run."""
+    agent: str
+    endpoint: str
+    method: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.agent} {self.method} {self.endpoint}"
+
+    def record(self, outcome: str, latency: float, ok: bool):
+        self.status_counts[outcome] = self.status_counts.get(outcome, 0) + 1
+        if ok:
+            self.histogram.record(latency)
+        else:
+            self.errors += 1
+
+
+class AgentLoadTester(AgentEndpointTester):
+    """
+    Async load generator over the AgentEndpointTester endpoint catalogue.
+
+    Open-loop runs issue requests on a fixed schedule and measure latency from
+    the scheduled send time, so a slow server cannot hide queueing delay
+    (coordinated omission). Closed-loop runs keep a fixed number of requests
+    in flight and measure each request from its actual send time.
+    """
+
+    def __init__(self, base_url: str = "http://localhost", port_offset: int = 0,
+                 agents: Optional[List[str]] = None, timeout: float = 10.0):
+        super().__init__()
+        self.base_url = base_url
+        self.port_offset = port_offset
+        self.timeout = timeout
+        if agents:
+            self.endpoints = [endpoint for endpoint in self.endpoints if endpoint.agent in agents]
+        self.runs: List[Dict[str, Any]] = []
+
+    def _url(self, endpoint: AgentEndpoint) -> str:
+        return f"{self.base_url}:{endpoint.port + self.port_offset}{endpoint.endpoint}"
+
+    def _new_stats(self) -> List[EndpointLoadStats]:
+        return [EndpointLoadStats(e.agent, e.endpoint, e.method) for e in self.endpoints]
+
+    async def _fire(self, client: httpx.AsyncClient, endpoint: AgentEndpoint,
+                    stats: EndpointLoadStats, started_at: float):
+        try:
+            if endpoint.method == "GET":
+                response = await client.get(self._url(endpoint))
+            else:
+                response = await client.post(self._url(endpoint), json=endpoint.payload)
+            outcome, ok = str(response.status_code), 200 <= response.status_code < 300
+        except httpx.HTTPError as e:
+            outcome, ok = type(e).__name__, False
+        stats.record(outcome, time.perf_counter() - started_at, ok)
+
+    async def run_open_loop(self, rps: float, duration: float) -> Dict[str, Any]:
+        """Send requests at a constant arrival rate, round-robin over endpoints."""
+        stats = self._new_stats()
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            in_flight = set()
+            start = time.perf_counter()
+            for i in range(int(rps * duration)):
+                scheduled_at = start + i / rps
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                index = i % len(self.endpoints)
+                task = asyncio.create_task(self._fire(client, self.endpoints[index], stats[index], scheduled_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            await asyncio.gather(*in_flight)
+            elapsed = time.perf_counter() - start
+        return self._run_result("open", rps, stats, elapsed)
+
+    async def run_closed_loop(self, concurrency: int, duration: float) -> Dict[str, Any]:
+        """Keep `concurrency` requests in flight for `duration` seconds."""
+        stats = self._new_stats()
+        sequence = itertools.count()
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + duration
+
+            async def worker():
+                while time.perf_counter() < deadline:
+                    index = next(sequence) % len(self.endpoints)
+                    await self._fire(client, self.endpoints[index], stats[index], time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+        return self._run_result("closed", concurrency, stats, elapsed)
+
+    def _run_result(self, mode: str, level: float, stats: List[EndpointLoadStats], elapsed: float) -> Dict[str, Any]:
+        total = sum(sum(s.status_counts.values()) for s in stats)
+        errors = sum(s.errors for s in stats)
+        overall = LatencyHistogram()
+        for s in stats:
+            overall.merge(s.histogram)
+        result = {
+            "mode": mode,
+            "level": level,
+            "duration_s": elapsed,
+            "requests": total,
+            "errors": errors,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "overall": overall.summary(),
+            "endpoints": {
+                s.key: {
+                    "agent": s.agent,
+                    "method": s.method,
+                    "endpoint": s.endpoint,
+                    "errors": s.errors,
+                    "status_counts": s.status_counts,
+                    "latency": s.histogram.summary(),
+                    "histogram": s.histogram.to_dict(),
+                }
+                for s in stats if s.status_counts
+            },
+        }
+        self.runs.append(result)
+        return result
+
+    async def run_sweep(self, mode: str, levels: List[float], duration: float) -> List[Dict[str, Any]]:
+        """Run one load level after another (RPS for open loop, concurrency for closed loop)."""
+        results = []
+        for level in levels:
+            print(f"🚀 {mode}-loop run at {level:g} {'rps' if mode == 'open' else 'concurrent'} for {duration:g}s...")
+            if mode == "open":
+                result = await self.run_open_loop(level, duration)
+            else:
+                result = await self.run_closed_loop(int(level), duration)
+            overall = result["overall"]
+            print(f"   {result['throughput_rps']:.1f} req/s, {result['error_rate']*100:.2f}% errors, "
+                  f"p50 {overall['p50_ms']:.1f}ms p99 {overall['p99_ms']:.1f}ms p999 {overall['p999_ms']:.1f}ms")
+            results.append(result)
+        return results
+
+    def write_json(self, path: str):
+        """Write every run, including raw histograms, as JSON."""
+        document = {
+            "generated_at": datetime.now().isoformat(),
+            "base_url": self.base_url,
+            "port_offset": self.port_offset,
+            "runs": self.runs,
+        }
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2)
+
+    def write_csv(self, path: str):
+        """Write one row per (run, endpoint) with latency percentiles."""
+        columns = ["mode", "level", "agent", "method", "endpoint", "count", "errors",
+                   "mean_ms", "p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for run in self.runs:
+                for data in run["endpoints"].values():
+                    row = {"mode": run["mode"], "level": run["level"], "agent": data["agent"],
+                           "method": data["method"], "endpoint": data["endpoint"], "errors": data["errors"]}
+                    row.update({column: data["latency"][column] for column in columns if column in data["latency"]})
+                    writer.writerow(row)
+
+    def compare_to_baseline(self, baseline_path: str, threshold: float,
+                            metrics: Tuple[str, ...] = ("p50_ms", "p99_ms")) -> List[str]:
+        """
+        Compare runs against a JSON file written by write_json().
+
+        Args:
+            baseline_path: Baseline results file
+            threshold: Allowed relative slowdown, e.g. 0.1 for 10%
+            metrics: Latency percentiles to compare per endpoint
+
+        Returns:
+            Human-readable list of regressions (empty if none)
+        """
+        with open(baseline_path, "r") as f:
+            baseline_runs = {(run["mode"], run["level"]): run for run in json.load(f).get("runs", [])}
+
+        regressions = []
+        for run in self.runs:
+            baseline = baseline_runs.get((run["mode"], run["level"]))
+            if baseline is None:
+                continue
+            label = f"{run['mode']}@{run['level']:g}"
+            if run["throughput_rps"] < baseline["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{label} throughput {run['throughput_rps']:.1f} < baseline {baseline['throughput_rps']:.1f} req/s")
+            if run["error_rate"] > baseline["error_rate"] + threshold / 10:
+                regressions.append(f"{label} error rate {run['error_rate']:.2%} > baseline {baseline['error_rate']:.2%}")
+            for key, data in run["endpoints"].items():
+                baseline_data = baseline["endpoints"].get(key)
+                if baseline_data is None or not data["latency"]["count"]:
+                    continue
+                for metric in metrics:
+                    current, previous = data["latency"][metric], baseline_data["latency"][metric]
+                    if previous and current > previous * (1 + threshold):
+                        regressions.append(f"{label} {key} {metric} {current:.1f}ms > baseline {previous:.1f}ms (+{current / previous - 1:.0%})")
+        return regressions
+
+
+def parse_levels(value: str) -> List[float]:
+    """Parse a comma-separated list of load levels."""
+    return [float(level) for level in value.split(",") if level.strip()]
+
+
 def main():
     """Main function to run the endpoint tests."""
+    parser = argparse.ArgumentParser(description="Test or load OCN agent endpoints")
+    parser.add_argument("--mode", choices=["open", "closed"], help="Run a load test instead of the one-shot report")
+    parser.add_argument("--rps", type=parse_levels, default=[50.0], help="Open-loop arrival rates, e.g. 50,100,200")
+    parser.add_argument("--concurrency", type=parse_levels, default=[1, 8, 32], help="Closed-loop concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load level")
+    parser.add_argument("--agents", help="Comma-separated agents to include")
+    parser.add_argument("--base-url", default="http://localhost")
+    parser.add_argument("--port-offset", type=int, default=0, help="Added to every agent port (see stubs/agent_stubs.py)")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--json-out", help="Write results (with histograms) as JSON")
+    parser.add_argument("--csv-out", help="Write per-endpoint percentiles as CSV")
+    parser.add_argument("--baseline", help="Compare against a JSON results file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative regression vs baseline")
+    args = parser.parse_args()
+
+    if args.mode:
+        return run_load_test(args)
+
     tester = AgentEndpointTester()
     
     try:
@@ -391,6 +638,38 @@ def main():
         print("\n⚠️ Test interrupted by user")
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
+    return 0
+
+
+def run_load_test(args) -> int:
+    """Run the requested load sweep, write results and check the baseline."""
+    agents = [agent.strip() for agent in args.agents.split(",")] if args.agents else None
+    tester = AgentLoadTester(args.base_url, args.port_offset, agents, args.timeout)
+    if not tester.endpoints:
+        print("❌ No endpoints selected")
+        return 1
+
+    levels = args.rps if args.mode == "open" else args.concurrency
+    print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} "
+          f"({len(tester.endpoints)} endpoints)")
+    asyncio.run(tester.run_sweep(args.mode, levels, args.duration))
+
+    if args.json_out:
+        tester.write_json(args.json_out)
+        print(f"📄 JSON results written to {args.json_out}")
+    if args.csv_out:
+        tester.write_csv(args.csv_out)
+        print(f"📄 CSV results written to {args.csv_out}")
+
+    if args.baseline:
+        regressions = tester.compare_to_baseline(args.baseline, args.threshold)
+        if regressions:
+            print(f"\n🐌 {len(regressions)} regressions vs {args.baseline} (threshold {args.threshold:.0%}):")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"\n✅ No regressions vs {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
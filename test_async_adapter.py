@@ -0,0 +1,90 @@
+"""
+Tests for the concurrent checkout pipeline shared by the platform adapters.
+
+Run with: python -m pytest test_async_adapter.py
+"""
+
+import asyncio
+
+import pytest
+
+from plugins.bigcommerce.bigcommerce_adapter import BigCommerceAdapter
+from plugins.common.async_adapter import DEFAULT_MAX_CONCURRENCY
+from plugins.shopify.shopify_adapter import ShopifyAdapter
+from plugins.woocommerce.woocommerce_adapter import WooCommerceAdapter
+
+
+class TimedAdapter(ShopifyAdapter):
+    """Shopify adapter whose checkouts sleep for cart["delay"] seconds, tracking how many run at once."""
+
+    def __init__(self, **options):
+        super().__init__("http://127.0.0.1:9", **options)
+        self.running = 0
+        self.peak = 0
+        self.started = []
+        self.cancelled = []
+
+    async def process_checkout_async(self, platform_cart, webhook_url=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.started.append(platform_cart["id"])
+        try:
+            await asyncio.sleep(platform_cart["delay"])
+        except asyncio.CancelledError:
+            self.cancelled.append(platform_cart["id"])
+            raise
+        finally:
+            self.running -= 1
+        return {"success": True, "id": platform_cart["id"]}
+
+
+async def _collect(adapter, carts, **options):
+    return [(index, result["id"]) async for index, result in adapter.process_checkouts(carts, **options)]
+
+
+@pytest.mark.parametrize("adapter_class", [ShopifyAdapter, WooCommerceAdapter, BigCommerceAdapter])
+def test_platform_adapters_accept_max_concurrency(adapter_class):
+    assert adapter_class("http://127.0.0.1:9", max_concurrency=4).max_concurrency == 4
+    assert adapter_class().max_concurrency == DEFAULT_MAX_CONCURRENCY
+
+
+def test_in_flight_checkouts_are_bounded():
+    adapter = TimedAdapter(max_concurrency=3)
+    carts = [{"id": n, "delay": 0.01 * (n % 4)} for n in range(20)]
+
+    results = asyncio.run(_collect(adapter, carts))
+
+    assert sorted(results) == [(n, n) for n in range(20)]
+    assert adapter.peak == 3
+    # The per-call override wins over the adapter's bound
+    adapter.peak = 0
+    asyncio.run(_collect(adapter, carts, max_concurrency=1))
+    assert adapter.peak == 1
+
+
+def test_results_are_yielded_in_completion_order():
+    adapter = TimedAdapter(max_concurrency=4)
+    carts = [{"id": n, "delay": delay} for n, delay in enumerate([0.2, 0.05, 0.15, 0.0])]
+
+    assert asyncio.run(_collect(adapter, carts)) == [(3, 3), (1, 1), (2, 2), (0, 0)]
+
+
+def test_stopping_early_cancels_in_flight_checkouts():
+    adapter = TimedAdapter(max_concurrency=3)
+    carts = iter([{"id": 0, "delay": 0.0}] + [{"id": n, "delay": 5} for n in range(1, 10)])
+
+    async def first_result():
+        checkouts = adapter.process_checkouts(carts)
+        async for index, _ in checkouts:
+            break
+        await checkouts.aclose()
+        # Let the cancelled checkouts unwind
+        await asyncio.sleep(0)
+        return index
+
+    assert asyncio.run(first_result()) == 0
+    # Every checkout still sleeping was cancelled, and no cart past the refilled slot was read
+    assert adapter.started[0] == 0
+    assert sorted(adapter.cancelled) == adapter.started[1:]
+    assert adapter.running == 0
+    assert next(carts)["id"] == 4
@@ -0,0 +1,139 @@
+"""
+Tests for the compiled platform cart mappings.
+
+The compiled transforms must produce exactly what the hand-written adapter
+transforms they replaced did (benchmarks/reference_transforms), key order
+and raised exceptions included.
+
+Run with: python -m pytest test_cart_mapping.py
+"""
+
+import copy
+import json
+import random
+
+import pytest
+
+from benchmarks.microbench import build_carts, build_orca_response
+from benchmarks.reference_transforms import REFERENCE_TRANSFORMS
+from plugins.bigcommerce.bigcommerce_adapter import BigCommerceAdapter
+from plugins.common.cart_mapping import get_cart_mapping
+from plugins.shopify.shopify_adapter import ShopifyAdapter
+from plugins.woocommerce.woocommerce_adapter import WooCommerceAdapter
+
+PLATFORMS = ["shopify", "woocommerce", "bigcommerce"]
+ADAPTERS = {"shopify": ShopifyAdapter, "woocommerce": WooCommerceAdapter, "bigcommerce": BigCommerceAdapter}
+
+EDGE_CARTS = [
+    {platform: {} for platform in PLATFORMS},
+    {"shopify": {"total_price": "1999", "customer": {"id": 5}, "line_items": [{}, {"quantity": 4}]},
+     "woocommerce": {"total": 3, "shipping": {"method": "x"}, "payment_method": "paypal"},
+     "bigcommerce": {"base_total": "7.5", "shipping_addresses": [{}], "line_items": {}}},
+    {"shopify": {"total_price": "abc"},
+     "woocommerce": {"total": None},
+     "bigcommerce": {"shipping_addresses": []}},
+]
+
+EDGE_RESPONSES = [
+    {},
+    {"chosen_rail": "wire", "rail_evaluations": [{"rail_type": "wire", "final_score": 1},
+                                                 {"rail_type": "wire", "final_score": 2}]},
+    {"chosen_rail": "ACH", "rail_evaluations": [{}, {"rail_type": "debit"}]},
+    {"chosen_rail": "zzz", "explanation": {"summary": "s"}, "trace_id": "t"},
+    {"rail_evaluations": None},
+]
+
+
+def _random_cart(rng, platform):
+    """A cart with each optional field present or absent at random."""
+    def maybe(value):
+        return value if rng.random() < 0.7 else None
+
+    items = [{"quantity": rng.randint(1, 5)} if rng.random() < 0.8 else {} for _ in range(rng.randint(0, 6))]
+    customer = {key: value for key, value in (("id", maybe(f"cust_{rng.randint(1, 99)}")),
+                                              ("email", maybe("buyer@example.com"))) if value is not None}
+    fields = {
+        "shopify": {"total_price": maybe(rng.randint(0, 100000)), "line_items": maybe(items),
+                    "shipping_address": maybe({"country_code": rng.choice(["US", "CA"])}),
+                    "shop_domain": maybe("shop.myshopify.com")},
+        "woocommerce": {"total": maybe(f"{rng.uniform(0, 1000):.2f}"), "items": maybe(items),
+                        "shipping": maybe({"country": "GB", "method": "express"}),
+                        "payment_method": maybe("paypal"), "store_id": maybe("wc_1")},
+        "bigcommerce": {"base_total": maybe(rng.uniform(0, 1000)),
+                        "line_items": maybe({"physical_items": items} if rng.random() < 0.8 else {}),
+                        "shipping_addresses": maybe([{"country_iso2": "DE"}]), "store_hash": maybe("abc")},
+    }[platform]
+    fields.update(currency=maybe("EUR"), customer=maybe(customer), category=maybe("apparel"))
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def _random_response(rng):
+    rails = ["credit", "debit", "ACH", "wire", "RTP"]
+    evaluations = [
+        {key: rng.random() for key in ("cost_score", "speed_score", "risk_score", "final_score") if rng.random() < 0.8}
+        for _ in range(rng.randint(0, 5))
+    ]
+    for evaluation in evaluations:
+        if rng.random() < 0.9:
+            evaluation["rail_type"] = rng.choice(rails)
+    response = {"chosen_rail": rng.choice(rails), "rail_evaluations": evaluations,
+                "explanation": {"summary": "s", "confidence": rng.random()},
+                "timestamp": "2025-01-01T00:00:00", "trace_id": "trace"}
+    return {key: value for key, value in response.items() if rng.random() < 0.85}
+
+
+def _outcome(transform, value):
+    """Result as order-preserving JSON, or the exception type raised."""
+    try:
+        return json.dumps(transform(copy.deepcopy(value)))
+    except Exception as e:
+        return type(e).__name__
+
+
+def _carts(platform):
+    rng = random.Random(platform)
+    carts = [build_carts(size)[platform] for size in (0, 3, 50)]
+    carts += [cart[platform] for cart in EDGE_CARTS]
+    return carts + [_random_cart(rng, platform) for _ in range(200)]
+
+
+def _responses():
+    rng = random.Random(0)
+    return [build_orca_response(4), build_orca_response(30)] + EDGE_RESPONSES + [_random_response(rng)
+                                                                                 for _ in range(200)]
+
+
+@pytest.mark.parametrize("platform", PLATFORMS)
+def test_cart_transform_matches_the_hand_written_one(platform):
+    reference = REFERENCE_TRANSFORMS[platform][0]
+    compiled = get_cart_mapping(platform).transform_cart
+
+    for cart in _carts(platform):
+        assert _outcome(compiled, cart) == _outcome(reference, cart), cart
+
+
+@pytest.mark.parametrize("platform", PLATFORMS)
+def test_response_transform_matches_the_hand_written_one(platform):
+    reference = REFERENCE_TRANSFORMS[platform][1]
+    compiled = get_cart_mapping(platform).transform_response
+
+    for response in _responses():
+        assert _outcome(compiled, response) == _outcome(reference, response), response
+
+
+@pytest.mark.parametrize("platform", PLATFORMS)
+def test_adapters_use_the_compiled_mapping(platform):
+    adapter = ADAPTERS[platform]()
+    cart = build_carts(3)[platform]
+    response = build_orca_response(4)
+
+    assert adapter.transform_cart_to_orca_request(cart) == REFERENCE_TRANSFORMS[platform][0](cart)
+    assert adapter.transform_orca_response_to_platform(response) == REFERENCE_TRANSFORMS[platform][1](response)
+
+
+def test_cart_requests_do_not_share_mutable_constants():
+    mapping = get_cart_mapping("shopify")
+    first = mapping.transform_cart({})
+    first["rail_candidates"][0]["risk_score"] = 1.0
+
+    assert mapping.transform_cart({})["rail_candidates"][0]["risk_score"] == 0.3
@@ -0,0 +1,98 @@
+"""
+Tests for the memory-compact ParsedAgentResponse and RawResponseStore.
+
+Run with: python -m pytest test_llm_compact_response.py
+"""
+
+import pickle
+from datetime import datetime
+from decimal import Decimal
+
+from llm_compact_response import ParsedAgentResponse, RawResponseStore
+
+
+def make_response(store, raw=None, **overrides):
+    fields = {
+        "agent_name": "okra",
+        "response_type": "credit_decision",
+        "extracted_features": {"credit_score": 720, "approved": True},
+        "confidence_score": 0.9,
+        "raw_response": raw if raw is not None else {"credit_score": 720, "approved": True},
+        "timestamp": 1700000000.0,
+        "ml_ready_data": {"response_confidence": 0.9, "response_completeness": 1.0,
+                          "credit_score_normalized": 0.72, "approval_flag": 1, "note": "kept in extras"},
+        "store": store,
+    }
+    fields.update(overrides)
+    return ParsedAgentResponse(**fields)
+
+
+def test_views_match_the_dicts_they_were_built_from():
+    store = RawResponseStore()
+    ml_ready_data = {"response_confidence": 0.9, "response_completeness": 1.0,
+                     "credit_score_normalized": 0.72, "approval_flag": 1, "note": "kept in extras"}
+    parsed = make_response(store, ml_ready_data=ml_ready_data)
+
+    assert dict(parsed.ml_ready_data) == ml_ready_data
+    assert isinstance(parsed.ml_ready_data["approval_flag"], int)
+    assert dict(parsed.extracted_features) == {"credit_score": 720, "approved": True}
+    assert parsed.raw_response == {"credit_score": 720, "approved": True}
+    assert parsed.timestamp == datetime.fromtimestamp(1700000000.0).isoformat()
+
+
+def test_identical_raw_responses_are_stored_once_and_freed_with_the_last_reference():
+    store = RawResponseStore()
+    first = make_response(store, raw={"credit_score": 700})
+    second = make_response(store, raw={"credit_score": 700})
+    other = make_response(store, raw={"credit_score": 650})
+    assert store.stats() == {"responses": 2, "references": 3}
+
+    del first
+    assert store.stats() == {"responses": 2, "references": 2}
+    del second, other
+    assert store.stats() == {"responses": 0, "references": 0}
+
+
+def test_caller_mutations_do_not_reach_stored_or_deduplicated_responses():
+    store = RawResponseStore()
+    raw = {"credit_score": 700, "reasons": ["income"]}
+    first = make_response(store, raw=raw)
+    second = make_response(store, raw={"credit_score": 700, "reasons": ["income"]})
+
+    raw["credit_score"] = 0
+    raw["reasons"].append("mutated")
+    first.raw_response["credit_score"] = -1
+
+    assert first.raw_response == {"credit_score": 700, "reasons": ["income"]}
+    assert second.raw_response == {"credit_score": 700, "reasons": ["income"]}
+
+
+def test_non_marshallable_responses_round_trip_exactly():
+    store = RawResponseStore()
+    raw = {"decided_at": datetime(2024, 1, 2, 3, 4, 5), "score": 1}
+    parsed = make_response(store, raw=raw)
+    raw["score"] = 2
+
+    assert parsed.raw_response == {"decided_at": datetime(2024, 1, 2, 3, 4, 5), "score": 1}
+
+
+def test_non_marshallable_responses_with_equal_str_values_are_kept_apart():
+    store = RawResponseStore()
+    at = datetime(2024, 1, 1)
+    as_decimal = make_response(store, raw={"amount": Decimal("10.5"), "at": at})
+    as_string = make_response(store, raw={"amount": "10.5", "at": at})
+
+    assert store.stats() == {"responses": 2, "references": 2}
+    assert as_decimal.raw_response == {"amount": Decimal("10.5"), "at": at}
+    assert as_string.raw_response["amount"] == "10.5"
+    assert type(as_string.raw_response["amount"]) is str
+
+
+def test_pickle_round_trip_preserves_equality():
+    parsed = make_response(RawResponseStore())
+    restored = pickle.loads(pickle.dumps(parsed))
+
+    assert restored.raw_response == parsed.raw_response
+    assert dict(restored.ml_ready_data) == dict(parsed.ml_ready_data)
+    assert dict(restored.extracted_features) == dict(parsed.extracted_features)
+    assert restored.created_at == parsed.created_at
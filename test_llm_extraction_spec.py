@@ -0,0 +1,111 @@
+"""
+Tests for the extraction spec fast path in LLMResponseParser.
+
+The fast path (every spec field read straight from the response, no LLM
+call) must produce the same ml_ready_data as the LLM path for the same
+content. The LLM path is exercised by holding one spec field back from the
+response and having a stand-in LLM return it.
+
+Run with: python -m pytest test_llm_extraction_spec.py
+"""
+
+import random
+
+import pytest
+
+from llm_extraction_spec import SPEC_CONFIDENCE, get_extraction_spec
+from llm_response_parser import LLMResponseParser
+from stubs import agent_stubs
+
+_rng = random.Random(7)
+
+# Complete responses for every agent with a spec: the parser's own samples,
+# stub agent responses and hand-written ones for agents whose stubs don't
+# report every spec field
+SAMPLE_RESPONSES = [
+    ("okra", {"approved": True, "credit_limit": 5000, "apr": 7.99, "risk_score": "low",
+              "reasons": ["Good credit score", "Low risk profile"]}),
+    ("okra", agent_stubs.okra_quote({"amount": 500}, {}, "/", _rng)),
+    ("onyx", {"trust_score": 0.85, "compliance_status": "verified", "sanctions_check": "clear"}),
+    ("onyx", {"trust_score": 0.2, "compliance_status": "rejected", "sanctions_check": "match",
+              "risk_factors": ["sanctions list"]}),
+    ("onyx", agent_stubs.onyx_kyb({"entity_id": "acme"}, {}, "/", _rng)),
+    ("onyx", dict(agent_stubs.onyx_kyb({"entity_id": "acme", "sanctions_flags": ["ofac"]}, {}, "/", _rng),
+                  sanctions_flags=["ofac"])),
+    ("opal", {"payment_methods": ["card", "ach"], "avg_fee": 0.025, "security_score": 0.9, "fees": {"card": 0.029}}),
+    ("orca", {"chosen_rail": "ACH", "confidence": 0.8, "cost_score": 0.9, "efficiency_score": 0.75}),
+    ("olive", {"loyalty_tier": "gold", "total_discount": 12.5, "retention_score": 0.7, "incentives": ["10% off"]}),
+    ("weave", {"auction_success": 0.9, "cost_savings": 0.04, "performance_score": 0.8}),
+]
+
+
+class HeldOutFieldLLMParser(LLMResponseParser):
+    """Parser whose LLM returns a fixed set of features, as if read from the response."""
+
+    def __init__(self, llm_features):
+        super().__init__(openai_api_key="test")
+        self.llm_features = llm_features
+        self.llm_calls = 0
+
+    def _call_llm_for_parsing(self, prompt, priority=None):
+        self.llm_calls += 1
+        return {"response_type": "llm_parsed", "features": dict(self.llm_features),
+                "confidence_score": SPEC_CONFIDENCE, "ml_features": {}, "insights": [], "risk_indicators": []}
+
+
+def _ids():
+    return [f"{agent}-{index}" for index, (agent, _) in enumerate(SAMPLE_RESPONSES)]
+
+
+@pytest.mark.parametrize("agent_name,response", SAMPLE_RESPONSES, ids=_ids())
+def test_samples_take_the_fast_path(agent_name, response):
+    parsed = LLMResponseParser().parse_agent_response(agent_name, response)
+
+    assert parsed.response_type == "spec_extracted"
+    assert parsed.confidence_score == SPEC_CONFIDENCE
+
+
+@pytest.mark.parametrize("agent_name,response", SAMPLE_RESPONSES, ids=_ids())
+def test_fast_path_ml_ready_data_matches_llm_path(agent_name, response):
+    fast = LLMResponseParser().parse_agent_response(agent_name, response)
+
+    spec = get_extraction_spec(agent_name)
+    extracted, _ = spec.extract(response)
+    for held_out in spec.required_fields:
+        # The spec reads the field under its own name, so dropping that key makes it missing
+        source = spec.fields[held_out]["from"][0]
+        partial = {key: value for key, value in response.items() if key != source}
+        parser = HeldOutFieldLLMParser({held_out: extracted[held_out]})
+
+        via_llm = parser.parse_agent_response(agent_name, partial)
+
+        assert parser.llm_calls == 1
+        assert dict(via_llm.ml_ready_data) == dict(fast.ml_ready_data), held_out
+
+
+def test_onyx_sanctions_risk_reads_the_raw_response():
+    parser = LLMResponseParser()
+    clear = parser.parse_agent_response("onyx", {"trust_score": 0.9, "compliance_status": 1.0,
+                                                 "sanctions_check": "clear"})
+    flagged = parser.parse_agent_response("onyx", {"trust_score": 0.9, "compliance_status": 1.0,
+                                                   "sanctions_flags": ["ofac"]})
+
+    assert clear.ml_ready_data["sanctions_risk"] == 0.0
+    assert flagged.ml_ready_data["sanctions_risk"] == 1.0
+
+
+def test_onyx_string_compliance_status_maps_to_risk():
+    parser = LLMResponseParser()
+    verified = parser.parse_agent_response("onyx", {"trust_score": 0.9, "compliance_status": "verified"})
+    rejected = parser.parse_agent_response("onyx", {"trust_score": 0.9, "compliance_status": "Rejected"})
+
+    assert verified.ml_ready_data["compliance_risk"] == 0.0
+    assert rejected.ml_ready_data["compliance_risk"] == 1.0
+
+
+def test_response_completeness_counts_key_fields_present_in_the_response():
+    parsed = LLMResponseParser().parse_agent_response(
+        "okra", {"approved": True, "credit_limit": 5000, "risk_score": 0.2, "apr": 5.0, "reasons": []})
+
+    # approved, credit_limit, apr, risk_score and reasons are all okra key fields
+    assert parsed.ml_ready_data["response_completeness"] == 1.0
@@ -0,0 +1,103 @@
+"""
+Tests for the two-tier LLM parse cache.
+
+Run with: python -m pytest test_llm_parse_cache.py
+"""
+
+import multiprocessing
+import random
+
+import llm_response_parser
+from llm_parse_cache import ParseCache, make_cache_key
+from llm_response_parser import LLMResponseParser
+
+
+def _fill(db_path, seed, count, max_disk_bytes):
+    cache = ParseCache(max_memory_entries=4, db_path=db_path, max_disk_bytes=max_disk_bytes)
+    rng = random.Random(seed)
+    for index in range(count):
+        cache.put(f"{seed}-{index}", {"value": "x" * rng.randint(50, 400)})
+    cache.close()
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = ParseCache(max_memory_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.stats()["memory_evictions"] == 1
+
+
+def test_disk_tier_survives_restart_and_promotes_hits(tmp_path):
+    db_path = str(tmp_path / "parse.db")
+    cache = ParseCache(db_path=db_path)
+    cache.put("key", {"features": {"approved": True}})
+    cache.close()
+
+    reopened = ParseCache(db_path=db_path)
+    assert reopened.get("key") == {"features": {"approved": True}}
+    assert reopened.get("key") == {"features": {"approved": True}}
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    reopened.close()
+
+
+def test_disk_size_tracks_overwrites_and_clear(tmp_path):
+    cache = ParseCache(db_path=str(tmp_path / "parse.db"))
+    cache.put("key", {"v": "short"})
+    cache.put("key", {"v": "a much longer value"})
+    actual = cache._db.execute("SELECT SUM(size) FROM parse_cache").fetchone()[0]
+
+    assert cache.stats()["disk_bytes"] == actual
+    cache.clear()
+    assert cache.stats()["disk_bytes"] == 0
+    cache.close()
+
+
+def test_disk_budget_holds_across_processes(tmp_path):
+    db_path = str(tmp_path / "parse.db")
+    max_disk_bytes = 20000
+    workers = [multiprocessing.Process(target=_fill, args=(db_path, seed, 200, max_disk_bytes)) for seed in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+
+    cache = ParseCache(db_path=db_path, max_disk_bytes=max_disk_bytes)
+    actual = cache._db.execute("SELECT SUM(size) FROM parse_cache").fetchone()[0]
+    assert cache.stats()["disk_bytes"] == actual
+    assert actual <= max_disk_bytes
+    cache.close()
+
+
+def test_cache_key_depends_on_agent_model_and_content():
+    response = {"b": 1, "a": [1, 2]}
+    key = make_cache_key("okra", "gpt-3.5-turbo", response)
+
+    assert key == make_cache_key("okra", "gpt-3.5-turbo", {"a": [1, 2], "b": 1})
+    assert key != make_cache_key("onyx", "gpt-3.5-turbo", response)
+    assert key != make_cache_key("okra", "gpt-4", response)
+    assert key != make_cache_key("okra", "gpt-3.5-turbo", {"b": 2, "a": [1, 2]})
+    assert key != make_cache_key("okra", "gpt-3.5-turbo", response, prompt_version="v2")
+
+
+def test_parser_cache_key_changes_with_the_prompt_and_spec(monkeypatch):
+    parser = LLMResponseParser(openai_api_key="test", cache=ParseCache())
+    response = {"approved": True}
+    before = parser._cache_key("okra", response)
+    assert parser._cache_key("okra", response) == before
+
+    monkeypatch.setattr(llm_response_parser, "_prompt_versions", {})
+    monkeypatch.setattr(llm_response_parser, "PROMPT_TEMPLATE", llm_response_parser.PROMPT_TEMPLATE + "Be brief.\n")
+    after_prompt = parser._cache_key("okra", response)
+    assert after_prompt != before
+
+    monkeypatch.setattr(llm_response_parser, "_prompt_versions", {})
+    specs = dict(llm_response_parser.EXTRACTION_SPECS, okra={"fields": {}})
+    monkeypatch.setattr(llm_response_parser, "EXTRACTION_SPECS", specs)
+    assert parser._cache_key("okra", response) not in (before, after_prompt)
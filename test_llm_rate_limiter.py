@@ -0,0 +1,87 @@
+"""
+Tests for the client-side LLM rate limiter.
+
+Run with: python -m pytest test_llm_rate_limiter.py
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import formatdate
+
+from llm_rate_limiter import (PRIORITY_BATCH, PRIORITY_INTERACTIVE, LLMRateLimiter, get_shared_rate_limiter,
+                              parse_retry_after)
+
+
+def test_parse_retry_after_forms():
+    assert parse_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert 8 <= parse_retry_after({"retry-after": formatdate(time.time() + 10, usegmt=True)}) <= 10
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+
+
+def test_requests_beyond_the_budget_wait():
+    limiter = LLMRateLimiter(requests_per_minute=2)
+
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert limiter.acquire(timeout=0.05) is False
+    assert limiter.stats()["queued"] == 0
+
+
+def test_token_budget_is_corrected_by_actual_usage():
+    limiter = LLMRateLimiter(tokens_per_minute=1000)
+    assert limiter.acquire(tokens=900)
+    assert limiter.acquire(tokens=900, timeout=0.05) is False
+
+    limiter.record_usage(reserved_tokens=900, actual_tokens=100)
+    assert limiter.acquire(tokens=800, timeout=0.05)
+
+
+def test_interactive_callers_are_admitted_before_batch_ones():
+    limiter = LLMRateLimiter(base_delay=0.01, max_delay=0.01)
+    limiter.throttled(retry_after=0.2, attempt=0)
+    order = []
+
+    def call(priority, name):
+        limiter.acquire(priority=priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(PRIORITY_BATCH, "batch"))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=call, args=(PRIORITY_INTERACTIVE, "interactive")))
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["interactive", "batch"]
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_retry_delay_backs_off_and_honors_retry_after():
+    limiter = LLMRateLimiter(base_delay=1.0, max_delay=8.0, max_retries=2, rng=random.Random(1))
+
+    assert 0.5 <= limiter.retry_delay(0) <= 1.0
+    assert 4.0 <= limiter.retry_delay(5) <= 8.0
+    assert limiter.retry_delay(0, retry_after=20.0) == 20.0
+    assert limiter.should_retry(1) and not limiter.should_retry(2)
+
+
+def test_async_callers_share_the_queue():
+    limiter = LLMRateLimiter(requests_per_minute=600)
+
+    async def run():
+        return await asyncio.gather(*(limiter.acquire_async(tokens=10) for _ in range(5)))
+
+    assert asyncio.run(run()) == [True] * 5
+    assert limiter.stats()["admitted"] == 5
+
+
+def test_shared_limiter_is_one_per_endpoint():
+    first = get_shared_rate_limiter("http://llm.test/a", factory=lambda: LLMRateLimiter(requests_per_minute=5))
+
+    assert get_shared_rate_limiter("http://llm.test/a") is first
+    assert get_shared_rate_limiter("http://llm.test/b") is not first
@@ -0,0 +1,70 @@
+"""
+Tests for incremental JSON parsing of streamed LLM completions.
+
+Run with: python -m pytest test_llm_stream_parser.py
+"""
+
+import json
+
+import pytest
+
+from llm_stream_parser import SSE_DONE, IncrementalJSONParser, iter_sse_content, parse_sse_line
+
+COMPLETION = {
+    "response_type": "credit_decision",
+    "features": {"approved": True, "note": "braces } and \"quotes\" in a string", "limits": [1, [2, 3]]},
+    "confidence_score": 0.9,
+    "ml_features": {},
+    "insights": ["low risk", "stable income"],
+    "risk_indicators": [],
+    "flag": None,
+}
+
+
+def _feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_members_are_emitted_in_order_whatever_the_chunking(size):
+    text = "```json\n" + json.dumps(COMPLETION, indent=2) + "\n```"
+    parser, events = _feed_in_chunks(text, size)
+
+    assert events == list(COMPLETION.items())
+    assert parser.result == COMPLETION
+    assert parser.done
+
+
+def test_ready_once_features_and_confidence_close():
+    text = json.dumps(COMPLETION)
+    parser = IncrementalJSONParser()
+    cut = text.index('"ml_features"')
+
+    parser.feed(text[:cut])
+    assert parser.is_ready()
+    assert not parser.done
+    assert "insights" not in parser.result
+
+
+def test_nothing_is_emitted_before_a_value_closes():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"features": {"approved": tr') == []
+    assert parser.feed('ue}, "confidence_score": 0.') == [("features", {"approved": True})]
+    assert parser.feed("8}") == [("confidence_score", 0.8)]
+    assert parser.feed(', "ignored": 1') == []
+
+
+def test_sse_lines():
+    delta = {"choices": [{"delta": {"content": "{\"a\""}}]}
+    usage = {"choices": [], "usage": {"total_tokens": 42}}
+    lines = [b"data: " + json.dumps(delta).encode(), "", ": keep-alive",
+             "data: " + json.dumps(usage), "data: [DONE]", "data: " + json.dumps(delta)]
+
+    assert parse_sse_line("data: [DONE]") is SSE_DONE
+    assert parse_sse_line("event: ping") is None
+    assert list(iter_sse_content(lines)) == [('{"a"', None), ("", {"total_tokens": 42})]
@@ -0,0 +1,121 @@
+"""
+Tests for the batch feature matrix and its vectorized recommendations.
+
+The matrix must agree with MLModelEnhancer, which computes the same features
+and labels one trace at a time.
+
+Run with: python -m pytest test_ml_feature_matrix.py
+"""
+
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from llm_compact_response import ParsedAgentResponse  # noqa: E402
+from llm_response_parser import LLMResponseParser, MLModelEnhancer  # noqa: E402
+from ml_feature_matrix import (APPROVE, DECLINE, FEATURE_COLUMNS, INSUFFICIENT_DATA, REVIEW,  # noqa: E402
+                               build_feature_matrix)
+
+AGENTS = sorted({column.split("_", 1)[0] for column in FEATURE_COLUMNS})
+
+
+def _random_response(rng):
+    agent_name = rng.choice(AGENTS)
+    features = [column.split("_", 1)[1] for column in FEATURE_COLUMNS if column.startswith(f"{agent_name}_")]
+    ml_ready_data = {name: rng.random() for name in rng.sample(features, rng.randint(0, len(features)))}
+    if rng.random() < 0.2:
+        # Not in the column schema: ignored by the matrix
+        ml_ready_data["unscheduled_note"] = 1.0
+    return ParsedAgentResponse(agent_name, "decision", {}, rng.random(), {"agent": agent_name},
+                               ml_ready_data=ml_ready_data)
+
+
+def _random_traces(seed, count):
+    rng = random.Random(seed)
+    return [(f"trace-{index}", [_random_response(rng) for _ in range(rng.randint(0, 6))]) for index in range(count)]
+
+
+def _enhancer(responses):
+    enhancer = MLModelEnhancer(LLMResponseParser())
+    for response in responses:
+        enhancer.add_parsed_response(response)
+    return enhancer
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_labels_and_features_match_the_enhancer(seed):
+    traces = _random_traces(seed, 300)
+
+    matrix = build_feature_matrix(traces)
+
+    labels = matrix.recommendations()
+    total_confidence = matrix.total_confidence()
+    completeness = matrix.response_completeness()
+    aggregate_risk = matrix.aggregate_risk()
+    for row, (trace_id, responses) in enumerate(traces):
+        enhancer = _enhancer(responses)
+        assert matrix.trace_ids[row] == trace_id
+        assert labels[row] == enhancer.get_decision_recommendation()["recommendation"], trace_id
+        if not responses:
+            continue
+        features = enhancer.get_enhanced_features()
+        assert total_confidence[row] == pytest.approx(features["total_confidence"])
+        assert completeness[row] == pytest.approx(features["response_completeness"])
+        assert (math.isnan(aggregate_risk[row]) if "aggregate_risk" not in features
+                else aggregate_risk[row] == pytest.approx(features["aggregate_risk"]))
+        for column in FEATURE_COLUMNS:
+            value = matrix.column(column)[row]
+            assert (math.isnan(value) if column not in features else value == features[column]), column
+
+
+def test_every_label_is_reachable():
+    def response(agent_name, **ml_ready_data):
+        return {"agent_name": agent_name, "ml_ready_data": ml_ready_data, "confidence_score": 0.9}
+
+    traces = [
+        ("declined", [response("okra", approval_probability=1.0), response("onyx", risk_score=0.8)]),
+        ("approved", [response("okra", approval_probability=0.9), response("onyx", approval_probability=0.6)]),
+        ("review", [response("okra", approval_probability=0.9), response("onyx", approval_probability=0.1)]),
+        ("empty", []),
+    ]
+
+    assert build_feature_matrix(traces).recommendations().tolist() == [DECLINE, APPROVE, REVIEW, INSUFFICIENT_DATA]
+
+
+def test_empty_traces_have_insufficient_data():
+    matrix = build_feature_matrix([("a", []), ("b", [])])
+
+    assert matrix.recommendations().tolist() == [INSUFFICIENT_DATA] * 2
+    assert matrix.response_counts.tolist() == [0, 0]
+    assert np.isnan(matrix.total_confidence()).all()
+    assert np.isnan(matrix.values).all()
+    assert len(build_feature_matrix([])) == 0
+
+
+def test_matrix_grows_past_its_initial_capacity():
+    rows = 2500
+    traces = [(f"trace-{index}", [{"agent_name": "okra", "confidence_score": 0.5,
+                                   "ml_ready_data": {"credit_risk_score": index / rows, "unscheduled_note": 1}}])
+              for index in range(rows)]
+
+    matrix = build_feature_matrix(traces)
+
+    assert len(matrix) == rows and matrix.values.shape == (rows, len(FEATURE_COLUMNS))
+    assert matrix.trace_ids[-1] == f"trace-{rows - 1}"
+    assert matrix.column("okra_credit_risk_score").tolist() == [index / rows for index in range(rows)]
+    assert matrix.response_counts.tolist() == [1] * rows
+    assert matrix.ignored_features == rows
+
+
+def test_custom_columns_project_the_schema():
+    traces = [("t", [{"agent_name": "okra", "ml_ready_data": {"credit_risk_score": 0.4, "approval_probability": 1.0}}])]
+
+    matrix = build_feature_matrix(traces, columns=["okra_credit_risk_score"])
+
+    assert matrix.project(["okra_credit_risk_score"]).tolist() == [[0.4]]
+    assert matrix.ignored_features == 1
+    # The recommendation counters do not depend on the projected columns
+    assert matrix.recommendations().tolist() == [APPROVE]
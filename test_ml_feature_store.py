@@ -0,0 +1,139 @@
+"""
+Tests for the columnar on-disk feature store.
+
+Run with: python -m pytest test_ml_feature_store.py
+"""
+
+import os
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ml_feature_store import FeatureStore  # noqa: E402
+
+DAY = "2025-01-31"
+TIMESTAMP = "2025-01-31T12:00:00+00:00"
+
+
+def _fill(store, traces, agent="okra", start=0):
+    for index, trace_id in enumerate(traces, start):
+        store.append(trace_id, {"agent_name": agent, "confidence_score": 0.5,
+                                "ml_ready_data": {"risk_score": index / 100, "label": "text"},
+                                "timestamp": TIMESTAMP})
+
+
+def _chunk_dirs(store, agent="okra"):
+    return sorted(name for name in os.listdir(store._partition_dir(DAY, agent)) if name.startswith("chunk-"))
+
+
+def test_rows_are_buffered_until_flush_and_read_back_projected(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    _fill(store, ["t1", "t2"])
+    store.append_row("t3", "onyx", {"trust_score": 0.9}, confidence=0.8, timestamp=TIMESTAMP)
+
+    assert store.read(["trace_id"])["trace_id"].size == 0
+    store.flush()
+
+    okra = store.read(["trace_id", "risk_score", "trust_score"], agent="okra")
+    assert okra["trace_id"].tolist() == [b"t1", b"t2"]
+    assert okra["risk_score"].tolist() == [0.0, 0.01]
+    # Columns a chunk lacks come back as NaN; non-numeric features are not stored
+    assert np.isnan(okra["trust_score"]).all()
+    assert "label" not in next(store.scan(agent="okra"))[2]
+    assert store.read(["trace_id"], start_date="2025-02-01")["trace_id"].size == 0
+
+
+def test_full_buffers_are_written_as_chunks(tmp_path):
+    store = FeatureStore(str(tmp_path), chunk_rows=2)
+    _fill(store, ["a", "b", "c"])
+
+    assert len(_chunk_dirs(store)) == 1
+    store.flush()
+    assert len(_chunk_dirs(store)) == 2
+
+
+def test_lookup_finds_every_row_of_a_trace(tmp_path):
+    store = FeatureStore(str(tmp_path), chunk_rows=3)
+    _fill(store, ["x", "y", "x", "z", "x"])
+    store.append_row("x", "onyx", {"trust_score": 0.9}, timestamp="2025-01-31T13:00:00+00:00")
+    store.flush()
+
+    rows = store.lookup("x")
+    assert [(row["agent_name"], row["features"]) for row in rows] == [
+        ("okra", {"risk_score": 0.0}), ("okra", {"risk_score": 0.02}), ("okra", {"risk_score": 0.04}),
+        ("onyx", {"trust_score": 0.9})]
+    assert len(store.lookup("x", agent="onyx")) == 1
+    assert store.lookup("missing") == []
+
+
+def test_compaction_merges_chunks_without_showing_rows_twice(tmp_path):
+    store = FeatureStore(str(tmp_path), chunk_rows=2)
+    traces = [f"t{index}" for index in range(7)]
+    _fill(store, traces)
+    store.flush()
+    before = store.read(["trace_id", "risk_score"])
+
+    store.compact()
+
+    # The replaced chunks stay on disk through the grace period, but are no longer read
+    assert len(_chunk_dirs(store)) == 5
+    assert len(list(store.scan())) == 1
+    after = store.read(["trace_id", "risk_score"])
+    assert sorted(after["trace_id"].tolist()) == sorted(before["trace_id"].tolist())
+    assert sorted(after["risk_score"].tolist()) == sorted(before["risk_score"].tolist())
+    assert len(store.lookup("t3")) == 1
+
+
+def test_replaced_chunks_are_removed_after_the_grace_period(tmp_path):
+    store = FeatureStore(str(tmp_path), chunk_rows=2)
+    _fill(store, ["a", "b", "c", "d"])
+    store.compact()
+    _fill(store, ["e", "f"], start=4)
+
+    # The second compaction removes the first one's replaced chunks and merges the rest
+    store.compact(grace_seconds=0)
+    store.compact(grace_seconds=0)
+
+    assert len(_chunk_dirs(store)) == 1
+    assert sorted(store.read(["trace_id"])["trace_id"].tolist()) == [b"a", b"b", b"c", b"d", b"e", b"f"]
+
+
+def test_a_partition_being_compacted_elsewhere_is_skipped(tmp_path):
+    store = FeatureStore(str(tmp_path), chunk_rows=1)
+    _fill(store, ["a", "b"])
+    partition = store._partition_dir(DAY, "okra")
+
+    with store._compact_lock(partition) as locked:
+        assert locked
+        FeatureStore(str(tmp_path)).compact()
+        assert len(list(store.scan())) == 2
+    store.compact()
+    assert len(list(store.scan())) == 1
+
+
+def test_concurrent_compactions_and_reads_keep_every_row_once(tmp_path):
+    writer = FeatureStore(str(tmp_path), chunk_rows=5)
+    expected = [f"t{index:03d}".encode() for index in range(200)]
+    _fill(writer, [trace.decode() for trace in expected])
+    errors = []
+
+    def compact():
+        try:
+            for _ in range(5):
+                FeatureStore(str(tmp_path)).compact(grace_seconds=0.2)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    compactors = [threading.Thread(target=compact) for _ in range(3)]
+    for thread in compactors:
+        thread.start()
+    reader = FeatureStore(str(tmp_path))
+    while any(thread.is_alive() for thread in compactors):
+        assert sorted(reader.read(["trace_id"])["trace_id"].tolist()) == expected
+    for thread in compactors:
+        thread.join()
+
+    assert not errors
+    assert sorted(reader.read(["trace_id"])["trace_id"].tolist()) == expected
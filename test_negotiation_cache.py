@@ -0,0 +1,54 @@
+"""
+Tests for the plugins' negotiation cache.
+
+Run with: python -m pytest test_negotiation_cache.py
+"""
+
+import time
+
+from plugins.common.negotiation_cache import NegotiationCache, make_fingerprint
+
+
+def test_fingerprint_ignores_key_order_and_trailing_slash():
+    request = {"cart_summary": {"total": 100, "currency": "USD"}, "rail_candidates": ["ACH", "card"]}
+    reordered = {"rail_candidates": ["ACH", "card"], "cart_summary": {"currency": "USD", "total": 100}}
+    key = make_fingerprint("http://orca:8080", request)
+
+    assert key == make_fingerprint("http://orca:8080/", reordered)
+    assert key != make_fingerprint("http://orca:8081", request)
+    assert key != make_fingerprint("http://orca:8080", dict(request, rail_candidates=["card"]))
+
+
+def test_entries_expire_after_the_ttl():
+    cache = NegotiationCache(ttl=0.05)
+    cache.put("key", {"chosen_rail": "ACH"})
+    assert cache.get("key") == {"chosen_rail": "ACH"}
+
+    time.sleep(0.06)
+    assert cache.get("key") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_get_returns_copies():
+    cache = NegotiationCache()
+    cache.put("key", {"rails": ["ACH"]})
+    cache.get("key")["rails"].append("card")
+
+    assert cache.get("key") == {"rails": ["ACH"]}
+
+
+def test_shared_tier_is_seen_by_other_workers_and_entry_bounded(tmp_path):
+    shared_path = str(tmp_path / "negotiations.db")
+    first = NegotiationCache(shared_path=shared_path, max_shared_entries=10)
+    second = NegotiationCache(shared_path=shared_path, max_shared_entries=10)
+    first.put("key", {"chosen_rail": "ACH"})
+
+    assert second.get("key") == {"chosen_rail": "ACH"}
+    assert second.stats()["shared_hits"] == 1
+
+    for index in range(25):
+        second.put(f"extra-{index}", {"index": index})
+    assert first.stats()["shared_entries"] <= 10
+    assert first.get("extra-24") == {"index": 24}
+    first.close()
+    second.close()
@@ -0,0 +1,130 @@
+"""
+Tests for the streaming order replay engine, against the stub Orca agent.
+
+Run with: python -m pytest test_order_replay.py
+"""
+
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+uvicorn = pytest.importorskip("uvicorn")
+
+from benchmarks.microbench import build_carts  # noqa: E402
+from plugins.common.order_replay import OrderReplayEngine, iter_orders  # noqa: E402
+from stubs import StubConfig, create_agent_app  # noqa: E402
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture(scope="module")
+def orca_endpoint():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_agent_app("orca", StubConfig(seed=1)), host="127.0.0.1",
+                                           port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+
+
+def _write_orders(path, count, bad=()):
+    cart = build_carts(2)["shopify"]
+    with open(path, "w") as f:
+        for index in range(count):
+            order = dict(cart, id=f"order-{index}", total_price="abc" if index in bad else 1000 + index)
+            f.write(json.dumps(order) + "\n")
+            if index == 2:
+                f.write("\n")
+
+
+def _read_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_writes_one_line_per_order(tmp_path, orca_endpoint):
+    orders, output = tmp_path / "orders.jsonl", tmp_path / "results.jsonl"
+    _write_orders(orders, 7, bad={3})
+    engine = OrderReplayEngine("shopify", orca_endpoint, workers=0, batch_size=2, window_batches=2)
+
+    stats = engine.replay(str(orders), str(output))
+
+    results = _read_results(output)
+    assert [result["record"] for result in results] == list(range(7))
+    assert [result["order_id"] for result in results] == [f"order-{index}" for index in range(7)]
+    assert not results[3]["success"] and "Cart transformation failed" in results[3]["error"]
+    assert all(result["success"] and result["platform_response"]["gateway"]
+               for result in results if result["record"] != 3)
+    assert (stats["processed"], stats["succeeded"], stats["failed"]) == (7, 6, 1)
+    assert sum(stats["rail_counts"].values()) == 6
+
+
+def test_interrupted_replay_resumes_from_the_checkpoint(tmp_path, orca_endpoint):
+    orders, output = tmp_path / "orders.jsonl", tmp_path / "results.jsonl"
+    _write_orders(orders, 10)
+
+    def stop_after_first_window(stats):
+        raise Interrupted()
+
+    engine = OrderReplayEngine("shopify", orca_endpoint, workers=0, batch_size=2, window_batches=2,
+                               progress=stop_after_first_window)
+    with pytest.raises(Interrupted):
+        engine.replay(str(orders), str(output))
+    # A partial window written after the checkpoint is dropped on resume
+    with open(output, "a") as f:
+        f.write('{"record": 99}\n')
+
+    windows = []
+    stats = OrderReplayEngine("shopify", orca_endpoint, workers=0, batch_size=2, window_batches=2,
+                              progress=windows.append).replay(str(orders), str(output))
+
+    assert [result["record"] for result in _read_results(output)] == list(range(10))
+    assert stats["processed"] == 10
+    # Only orders 4-9 were replayed again: two more windows, not three
+    assert [window["processed"] for window in windows] == [8, 10]
+
+
+def test_checkpoint_for_another_export_is_refused(tmp_path, orca_endpoint):
+    first, second, output = tmp_path / "a.jsonl", tmp_path / "b.jsonl", tmp_path / "results.jsonl"
+    _write_orders(first, 4)
+    _write_orders(second, 4)
+    engine = OrderReplayEngine("shopify", orca_endpoint, workers=0, batch_size=2, window_batches=1)
+    engine.replay(str(first), str(output))
+
+    with pytest.raises(ValueError):
+        engine.replay(str(second), str(output))
+    assert engine.replay(str(second), str(output), resume=False)["processed"] == 4
+
+
+def test_process_pool_matches_in_process_transforms(tmp_path, orca_endpoint):
+    orders = tmp_path / "orders.jsonl"
+    _write_orders(orders, 6, bad={1})
+    outputs = []
+    for workers in (0, 2):
+        output = tmp_path / f"results-{workers}.jsonl"
+        OrderReplayEngine("shopify", orca_endpoint, workers=workers, batch_size=3).replay(str(orders), str(output))
+        outputs.append([(result["record"], result["success"]) for result in _read_results(output)])
+
+    assert outputs[0] == outputs[1]
+
+
+def test_csv_exports_nest_dotted_columns(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text('id,total_price,customer.id,customer.email,line_items\n'
+                    'o1,1999,c1,a@example.com,"[{""quantity"": 2}]"\n'
+                    'o2,500,,,\n')
+
+    assert list(iter_orders(str(path))) == [
+        {"id": "o1", "total_price": "1999", "customer": {"id": "c1", "email": "a@example.com"},
+         "line_items": [{"quantity": 2}]},
+        {"id": "o2", "total_price": "500"},
+    ]
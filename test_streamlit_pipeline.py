@@ -0,0 +1,135 @@
+"""
+Tests for the Streamlit demo's batched MCP agent calls, against the stub agents.
+
+The demo's UI modules are swapped for minimal stand-ins so the module can be
+imported outside a Streamlit run.
+
+Run with: python -m pytest test_streamlit_pipeline.py
+"""
+
+import functools
+import socket
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+uvicorn = pytest.importorskip("uvicorn")
+fastapi = pytest.importorskip("fastapi")
+
+from stubs import StubConfig, create_agent_app  # noqa: E402
+
+
+class _SessionState(dict):
+    __getattr__ = dict.__getitem__
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+def _streamlit_stand_in():
+    st = types.ModuleType("streamlit")
+    st.session_state = _SessionState()
+    st.cache_resource = functools.lru_cache(maxsize=None)
+    st.set_page_config = st.markdown = st.error = st.warning = lambda *args, **kwargs: None
+    return st
+
+
+@pytest.fixture(scope="module")
+def demo():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(sys.modules, "streamlit", _streamlit_stand_in())
+        for name in ("pandas", "plotly", "plotly.express", "plotly.graph_objects", "plotly.subplots"):
+            patch.setitem(sys.modules, name, types.ModuleType(name))
+        sys.modules["plotly.subplots"].make_subplots = None
+        patch.delitem(sys.modules, "streamlit_demo", raising=False)
+        import streamlit_demo
+        patch.setattr(streamlit_demo, "AGENT_CONFIGS", {name: dict(config) for name, config
+                                                         in streamlit_demo.AGENT_CONFIGS.items()})
+        yield streamlit_demo
+        sys.modules.pop("streamlit_demo", None)
+
+
+def _serve(app):
+    """Serve app on a free port, recording the path of every POST it receives."""
+    posts = []
+
+    async def recording(scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            posts.append(scope["path"])
+        await app(scope, receive, send)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(recording, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, port, posts
+
+
+@pytest.fixture
+def agent(demo):
+    servers = []
+
+    def start(name, app=None):
+        server, port, posts = _serve(app or create_agent_app(name, StubConfig(seed=1)))
+        servers.append(server)
+        demo.AGENT_CONFIGS[name]["port"] = port
+        return posts
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def test_pipeline_sends_one_batch_and_keeps_call_order(demo, agent):
+    posts = agent("orca")
+
+    schema, negotiation, unknown = demo.call_agent_pipeline("orca", [
+        ("getDecisionSchema", {}),
+        ("negotiateCheckout", {"rail_candidates": [{"rail_type": "ACH"}], "trace_id": "t1"}),
+        ("refund", {}),
+    ])
+
+    assert posts == ["/mcp/invoke"]
+    assert schema["verb"] == "getDecisionSchema"
+    assert (negotiation["chosen_rail"], negotiation["trace_id"]) == ("ACH", "t1")
+    assert unknown["ok"] is False and "refund" in unknown["error"]
+
+
+def test_agents_without_a_batch_verb_get_one_request_per_call(demo, agent):
+    legacy = fastapi.FastAPI()
+    verbs = []
+
+    @legacy.post("/mcp/invoke")
+    async def invoke(request: fastapi.Request):
+        verb = (await request.json())["verb"]
+        verbs.append(verb)
+        if verb == "batch":
+            return fastapi.responses.JSONResponse(status_code=422, content={"detail": "unknown verb"})
+        return {"ok": True, "verb": verb}
+
+    agent("olive", legacy)
+
+    first = demo.call_agent_pipeline("olive", [("listIncentives", {}), ("getPolicy", {})])
+    again = demo.call_agent_pipeline("olive", [("listIncentives", {})])
+
+    assert [result["verb"] for result in first + again] == ["listIncentives", "getPolicy", "listIncentives"]
+    # The missing batch verb is only probed once
+    assert verbs == ["batch", "listIncentives", "getPolicy", "listIncentives"]
+
+
+def test_weave_auction_is_explained_in_the_demo_format(demo, agent):
+    posts = agent("weave")
+
+    auction, explanation = demo.call_agent_mcp_with_explanation(
+        "weave", "runAuction", {"rail_candidates": [{"rail_type": "Card"}]}, {"cart_summary": {}},
+        transform=demo.weave_auction_to_demo_results)
+
+    assert posts == ["/mcp/invoke", "/explain"]
+    assert auction["agent"] == "weave" and auction["winning_bid"]["processor_id"]
+    assert explanation["agent"] == "weave"
@@ -0,0 +1,147 @@
+"""
+Tests for the platform webhook ingestion server.
+
+Run with: python -m pytest test_webhook_ingest.py
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from plugins.common.platforms import PLATFORM_ADAPTERS, resolve_adapter_class  # noqa: E402
+from plugins.common.webhook_ingest import DedupeWindow, WebhookIngestServer  # noqa: E402
+from plugins.shopify.shopify_adapter import ShopifyAdapter  # noqa: E402
+
+
+class GatedAdapter:
+    """Adapter whose checkouts block until released, recording the carts it saw."""
+
+    def __init__(self, succeed=True):
+        self.release = threading.Event()
+        self.succeed = succeed
+        self.carts = []
+
+    def process_checkout(self, cart, webhook_url=None):
+        self.release.wait(5)
+        self.carts.append(cart)
+        return {"success": self.succeed}
+
+
+async def _with_server(adapter, scenario, **options):
+    server = WebhookIngestServer(host="127.0.0.1", port=0, adapters={"shopify": adapter}, **options)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as http:
+            async def post(body, event_id=None, shop="a.myshopify.com", platform="shopify"):
+                headers = {"X-Shopify-Shop-Domain": shop}
+                if event_id is not None:
+                    headers["X-Shopify-Webhook-Id"] = event_id
+                url = f"http://127.0.0.1:{server.port}/webhooks/{platform}"
+                async with http.post(url, data=json.dumps(body), headers=headers) as response:
+                    return response.status, response.headers.get("Retry-After")
+
+            return await scenario(server, post)
+    finally:
+        adapter.release.set()
+        await server.stop()
+
+
+async def _drain(server):
+    while server.get_metrics()["queue_depth"] or server.get_metrics()["processing"]:
+        await asyncio.sleep(0.01)
+
+
+def test_default_port_is_clear_of_the_gateway():
+    assert WebhookIngestServer(adapters={}).port != 8090
+
+
+def test_platform_registry_resolves_every_platform():
+    assert resolve_adapter_class("Shopify") is ShopifyAdapter
+    assert resolve_adapter_class(ShopifyAdapter) is ShopifyAdapter
+    assert {resolve_adapter_class(name).__name__ for name in PLATFORM_ADAPTERS} == {
+        "ShopifyAdapter", "WooCommerceAdapter", "BigCommerceAdapter"}
+    with pytest.raises(ValueError):
+        resolve_adapter_class("magento")
+
+
+def test_duplicates_are_acknowledged_but_processed_once():
+    adapter = GatedAdapter()
+
+    async def scenario(server, post):
+        adapter.release.set()
+        statuses = [await post({"total_price": 100}, event_id="e1"), await post({"total_price": 100}, event_id="e1"),
+                    await post({"cart": {"total_price": 5}}), await post({"cart": {"total_price": 5}})]
+        await _drain(server)
+        return [status for status, _ in statuses], server.get_metrics()["counters"]
+
+    statuses, counters = asyncio.run(_with_server(adapter, scenario))
+
+    assert statuses == [202, 200, 202, 200]
+    assert (counters["processed"], counters["duplicates"]) == (2, 2)
+    assert {"total_price": 5} in adapter.carts
+
+
+def test_backpressure_per_shop_and_queue():
+    adapter = GatedAdapter()
+
+    async def scenario(server, post):
+        shop_a = [await post({}, event_id="a0")]
+        while not server.get_metrics()["processing"]:
+            await asyncio.sleep(0.01)
+        shop_a += [await post({}, event_id=f"a{i}") for i in (1, 2)]
+        others = [await post({}, event_id=f"b{i}", shop=f"shop{i}") for i in range(4)]
+        adapter.release.set()
+        await _drain(server)
+        redelivered = await post({}, event_id="a2")
+        return shop_a, others, redelivered
+
+    shop_a, others, redelivered = asyncio.run(_with_server(adapter, scenario, workers=1, queue_size=3,
+                                                           per_shop_limit=2))
+
+    assert [status for status, _ in shop_a] == [202, 202, 429]
+    assert shop_a[2][1] is not None
+    # One of shop a's events is being processed, one is queued; two more fill the queue
+    assert [status for status, _ in others] == [202, 202, 503, 503]
+    assert redelivered[0] == 202
+
+
+def test_invalid_deliveries_are_rejected():
+    adapter = GatedAdapter()
+
+    async def scenario(server, post):
+        return [await post([1]), await post({"cart": "x"}), await post({}, platform="magento")]
+
+    statuses = asyncio.run(_with_server(adapter, scenario))
+
+    assert [status for status, _ in statuses] == [400, 400, 404]
+
+
+def test_failed_checkouts_can_be_redelivered():
+    adapter = GatedAdapter(succeed=False)
+
+    async def scenario(server, post):
+        adapter.release.set()
+        first = await post({}, event_id="e1")
+        await _drain(server)
+        return first, await post({}, event_id="e1")
+
+    first, again = asyncio.run(_with_server(adapter, scenario))
+
+    assert (first[0], again[0]) == (202, 202)
+
+
+def test_dedupe_window_expires_and_bounds_entries():
+    window = DedupeWindow(window_seconds=10, max_entries=2)
+
+    assert window.check_and_add("x", now=0) is False
+    assert window.check_and_add("x", now=5) is True
+    assert window.check_and_add("x", now=11) is False
+    for key in ("y", "z"):
+        window.check_and_add(key, now=12)
+    assert len(window) == 2
+    assert window.evicted == 1
+    assert window.check_and_add("x", now=12) is False
@@ -0,0 +1,128 @@
+"""
+Tests for the durable webhook outbox.
+
+Run with: python -m pytest test_webhook_outbox.py
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from plugins.common.webhook_outbox import (BATCH_HEADER, EVENT_ID_HEADER, STATUS_DEAD, STATUS_DELIVERING,
+                                           STATUS_PENDING, WebhookOutbox)
+
+
+class Receiver:
+    """Local webhook receiver answering each path with a scripted list of statuses (then 200)."""
+
+    def __init__(self):
+        self.requests = []
+        self.scripts = {}
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                receiver.requests.append((self.path, dict(self.headers), body))
+                script = receiver.scripts.get(self.path, [])
+                self.send_response(script.pop(0) if script else 200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+
+@pytest.fixture
+def receiver():
+    receiver = Receiver()
+    yield receiver
+    receiver.server.shutdown()
+
+
+def test_events_are_delivered_with_their_headers(receiver):
+    outbox = WebhookOutbox(":memory:")
+    event_id = outbox.enqueue(receiver.url("/hook"), {"order": 1}, headers={"X-Shop": "a"})
+    outbox.start()
+
+    assert outbox.flush(5)
+    assert outbox.stats()["delivered"] == 1
+    outbox.close()
+    (path, headers, body), = receiver.requests
+    assert (path, body) == ("/hook", {"order": 1})
+    assert headers[EVENT_ID_HEADER] == str(event_id)
+    assert headers["X-Shop"] == "a"
+
+
+def test_batch_endpoints_get_one_post(receiver):
+    outbox = WebhookOutbox(":memory:", batch_size=10)
+    url = receiver.url("/batch")
+    ids = [outbox.enqueue(url, {"order": n}) for n in range(5)]
+    outbox.enable_batching(url)
+    outbox.start()
+
+    assert outbox.flush(5)
+    outbox.close()
+    (_, headers, body), = receiver.requests
+    assert headers[BATCH_HEADER] == "true"
+    assert body == {"events": [{"order": n} for n in range(5)], "event_ids": ids}
+
+
+def test_retryable_failures_are_retried(receiver):
+    outbox = WebhookOutbox(":memory:", base_delay=0.01, max_delay=0.02)
+    receiver.scripts["/flaky"] = [503, 429]
+    outbox.enqueue(receiver.url("/flaky"), {"order": 1})
+    outbox.start()
+
+    assert outbox.flush(5)
+    stats = outbox.stats()
+    outbox.close()
+    assert len(receiver.requests) == 3
+    assert (stats["failed_attempts"], stats["delivered"]) == (2, 1)
+
+
+def test_rejected_and_exhausted_events_are_dead_lettered_and_can_be_requeued(receiver):
+    outbox = WebhookOutbox(":memory:", base_delay=0.01, max_delay=0.02, max_attempts=2)
+    receiver.scripts["/rejects"] = [400]
+    receiver.scripts["/down"] = [500, 500]
+    rejected = outbox.enqueue(receiver.url("/rejects"), {"order": 1})
+    exhausted = outbox.enqueue(receiver.url("/down"), {"order": 2})
+    outbox.start()
+
+    assert outbox.flush(5)
+    dead = {letter["id"]: letter for letter in outbox.dead_letters()}
+    assert dead[rejected]["attempts"] == 1
+    assert dead[exhausted]["attempts"] == 2
+    assert dead[exhausted]["last_error"] == "status 500"
+
+    assert outbox.requeue_dead([rejected, exhausted]) == 2
+    assert outbox.flush(5)
+    assert outbox.counts() == {}
+    outbox.close()
+
+
+def test_undelivered_events_survive_a_restart(receiver, tmp_path):
+    path = str(tmp_path / "outbox.db")
+    url = receiver.url("/hook")
+    outbox = WebhookOutbox(path)
+    interrupted = outbox.enqueue(url, {"order": 1})
+    outbox.enqueue(url, {"order": 2})
+    # As if the process died mid-delivery
+    outbox._db.execute("UPDATE webhook_events SET status = ? WHERE id = ?", (STATUS_DELIVERING, interrupted))
+    outbox.close()
+
+    reopened = WebhookOutbox(path)
+    assert reopened.counts() == {STATUS_PENDING: 2}
+    reopened.start()
+    assert reopened.flush(5)
+    assert STATUS_DEAD not in reopened.stats()
+    reopened.close()
+    assert sorted(body["order"] for _, _, body in receiver.requests) == [1, 2]
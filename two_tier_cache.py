@@ -0,0 +1,269 @@
+"""
+Two-Tier JSON Cache
+
+Shared base of the LLM parse cache (llm_parse_cache) and the plugins'
+negotiation cache (plugins/common/negotiation_cache):
+
+- an in-memory LRU bounded by entry count
+- an optional SQLite file shared by every process on the host, bounded by
+  total stored bytes and/or entry count, evicting the least recently used
+  rows first
+
+Values are JSON documents held as canonical JSON text in both tiers, so
+every get() returns a fresh copy. Entries can expire after a TTL.
+
+The SQLite tier's total size and entry count live in a one-row table kept up
+to date by triggers and are checked inside each write transaction, so the
+budgets hold however many processes write to the file.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+_COLUMNS = ["key", "value", "size", "expires_at", "last_access"]
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize with sorted keys and no whitespace so equal documents hash equally."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class TwoTierCache:
+    """
+    Memory LRU in front of an optional SQLite tier.
+
+    Subclasses set table (the SQLite table name) and tier (the name the
+    SQLite tier goes by in stats(), e.g. "disk_hits").
+    """
+
+    table = "cache"
+    tier = "disk"
+
+    def __init__(self, max_memory_entries: int, db_path: Optional[str] = None,
+                 max_disk_bytes: Optional[int] = None, max_disk_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_memory_entries: Entries kept in the in-memory LRU
+            db_path: SQLite file for the shared tier (None for memory only)
+            max_disk_bytes: Total size of stored values before LRU eviction (None for no limit)
+            max_disk_entries: Rows kept before LRU eviction (None for no limit)
+            ttl: Seconds an entry stays valid (None to never expire)
+        """
+        self.max_memory_entries = max_memory_entries
+        self.db_path = db_path
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        # key -> (expires_at or None, canonical JSON)
+        self._memory: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, f"{self.tier}_hits": 0, "misses": 0, "puts": 0, "expired": 0,
+                       "memory_evictions": 0, f"{self.tier}_evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            with self._transaction():
+                self._create_schema()
+
+    def _create_schema(self):
+        table = self.table
+        columns = [row[1] for row in self._db.execute(f"PRAGMA table_info({table})")]
+        if columns and columns != _COLUMNS:
+            # Written by an older layout; it is only a cache, so start over
+            self._db.execute(f"DROP TABLE {table}")
+            self._db.execute(f"DROP TABLE IF EXISTS {table}_size")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_lru ON {table} (last_access)")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_size ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL, entries INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            f"INSERT OR IGNORE INTO {table}_size (id, bytes, entries) "
+            f"SELECT 0, COALESCE(SUM(size), 0), COUNT(*) FROM {table}"
+        )
+        self._db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table} "
+            f"BEGIN UPDATE {table}_size SET bytes = bytes + NEW.size, entries = entries + 1; END"
+        )
+        self._db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF size ON {table} "
+            f"BEGIN UPDATE {table}_size SET bytes = bytes + NEW.size - OLD.size; END"
+        )
+        self._db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table} "
+            f"BEGIN UPDATE {table}_size SET bytes = bytes - OLD.size, entries = entries - 1; END"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front, so no other process writes in between."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _disk_size(self) -> Tuple[int, int]:
+        """(bytes, entries) stored in the SQLite tier."""
+        return self._db.execute(f"SELECT bytes, entries FROM {self.table}_size").fetchone()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry, promoting SQLite hits into memory.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            A fresh copy of the cached value, or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return json.loads(entry[1])
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[1] is None or row[1] > now:
+                        self._db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+                        self._remember(key, row[1], row[0])
+                        self._stats[f"{self.tier}_hits"] += 1
+                        return json.loads(row[0])
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        Store an entry in both tiers.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        encoded = canonical_json(value)
+        with self._lock:
+            self._remember(key, expires_at, encoded)
+            self._stats["puts"] += 1
+            if self._db is None:
+                return
+
+            size = len(encoded.encode())
+            if self.max_disk_bytes is not None and size > self.max_disk_bytes:
+                return
+            with self._transaction():
+                # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete doesn't fire the size trigger
+                self._db.execute(
+                    f"INSERT INTO {self.table} (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                    (key, encoded, size, expires_at, now),
+                )
+                self._evict_disk(now)
+
+    def _remember(self, key: str, expires_at: Optional[float], encoded: str):
+        self._memory[key] = (expires_at, encoded)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["memory_evictions"] += 1
+
+    def _over_budget(self, disk_bytes: int, entries: int, share: float = 1.0) -> bool:
+        return ((self.max_disk_bytes is not None and disk_bytes > self.max_disk_bytes * share)
+                or (self.max_disk_entries is not None and entries > self.max_disk_entries * share))
+
+    def _evict_disk(self, now: float):
+        """
+        Bring the SQLite tier below 90% of its budgets (inside a write transaction).
+
+        Expired rows go first, then the least recently used ones.
+        """
+        disk_bytes, entries = self._disk_size()
+        if not self._over_budget(disk_bytes, entries):
+            return
+        evicted = 0
+        if self.ttl is not None:
+            evicted = self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,)).rowcount
+            disk_bytes, entries = self._disk_size()
+        keys = []
+        rows = self._db.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access")
+        for key, size in rows:
+            if not self._over_budget(disk_bytes, entries, 0.9):
+                break
+            keys.append((key,))
+            disk_bytes -= size
+            entries -= 1
+        rows.close()
+        self._db.executemany(f"DELETE FROM {self.table} WHERE key = ?", keys)
+        self._stats[f"{self.tier}_evictions"] += evicted + len(keys)
+
+    def invalidate(self, key: str):
+        """
+        Drop one entry from both tiers.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and tier sizes.
+
+        Returns:
+            Dictionary with hits per tier, misses, hit_rate, expirations, evictions and sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats["memory_hits"] + stats[f"{self.tier}_hits"]
+            lookups = hits + stats["misses"]
+            stats["hit_rate"] = hits / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats[f"{self.tier}_bytes"], stats[f"{self.tier}_entries"] = self._disk_size()
+            return stats
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None